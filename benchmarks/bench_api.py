@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Micro-benchmarks of the Python side of the API: parameter packing and
+unpacking, VehicleData, facade dispatch, and the PlexeImp setters and
+getters. SUMO is replaced by the in-memory stub in traci_stub, so the
+results measure the cost paid by the library on every call, excluding the
+TraCI round trip. Results are written as JSON, e.g.,
+
+    python benchmarks/bench_api.py -o results.json
+    python benchmarks/bench_api.py --compare results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+import traci_stub
+traci_stub.install()
+from plexe import SPEED
+from plexe.plexe import Plexe
+from plexe.plexe_imp import ccparams as cc
+from plexe.vehicle_data import VehicleData
+
+# (name, statement, setup function returning the statement namespace)
+BENCHMARKS = []
+
+VEHICLES = ["v.%d" % i for i in range(16)]
+
+
+def benchmark(name, stmt):
+    """
+    Registers a benchmark
+    :param name: benchmark name, used in the results
+    :param stmt: statement to be timed
+    """
+    def decorator(setup):
+        BENCHMARKS.append((name, stmt, setup))
+        return setup
+    return decorator
+
+
+def _data():
+    return VehicleData(3, -0.0987, -0.1234, 27.7778, 1234.5678, -4.8, 120.1,
+                       4)
+
+
+@benchmark("ccparams.pack.vehicle_data",
+           "pack(3, 27.7778, -0.1234, 1234.5678, -4.8, 120.1, 4, -0.0987)")
+def _():
+    return {"pack": cc.pack}
+
+
+@benchmark("ccparams.pack.fixed_acceleration", "pack(1, -6)")
+def _():
+    return {"pack": cc.pack}
+
+
+@benchmark("ccparams.unpack.speed_and_acceleration", "unpack(value, schema)")
+def _():
+    return {"unpack": cc.unpack, "value": traci_stub.PAYLOADS["ccsa"],
+            "schema": cc.SCHEMAS[cc.PAR_SPEED_AND_ACCELERATION]}
+
+
+@benchmark("ccparams.unpack.no_schema", "unpack(value)")
+def _():
+    return {"unpack": cc.unpack, "value": traci_stub.PAYLOADS["ccsa"]}
+
+
+@benchmark("ccparams.unpack.escaped", "unpack(value)")
+def _():
+    return {"unpack": cc.unpack,
+            "value": cc.pack(1, "v:1", "a\\b", "", 2.5, '"x"')}
+
+
+@benchmark("vehicle_data.construct",
+           "VehicleData(3, -0.0987, -0.1234, 27.7778, 1234.5678, -4.8, "
+           "120.1, 4)")
+def _():
+    return {"VehicleData": VehicleData}
+
+
+@benchmark("vehicle_data.key_access", "data[SPEED]")
+def _():
+    return {"data": _data(), "SPEED": SPEED}
+
+
+@benchmark("vehicle_data.attribute_access", "data.speed")
+def _():
+    return {"data": _data()}
+
+
+@benchmark("facade.set_cc_desired_speed",
+           "plexe.set_cc_desired_speed('v.0', 30)")
+def _():
+    return {"plexe": Plexe()}
+
+
+@benchmark("facade.get_vehicle_data", "plexe.get_vehicle_data('v.0')")
+def _():
+    return {"plexe": Plexe()}
+
+
+@benchmark("facade.get_vehicle_data.snapshot",
+           "plexe.get_vehicle_data('v.0')")
+def _():
+    plexe = Plexe()
+    plexe.register_vehicle("v.0")
+    plexe.step(0)
+    return {"plexe": plexe}
+
+
+@benchmark("facade.enable_auto_feed",
+           "plexe.enable_auto_feed('v.1', True, 'v.0', 'v.0')")
+def _():
+    return {"plexe": Plexe()}
+
+
+@benchmark("imp.set_cc_desired_speed", "imp.set_cc_desired_speed('v.0', 30)")
+def _():
+    return {"imp": Plexe().plexe}
+
+
+@benchmark("imp.set_cc_desired_speed.cached",
+           "imp.set_cc_desired_speed('v.0', 30)")
+def _():
+    return {"imp": Plexe(cache_parameters=True).plexe}
+
+
+@benchmark("imp.set_front_vehicle_data",
+           "imp.set_front_vehicle_data('v.1', data)")
+def _():
+    return {"imp": Plexe().plexe, "data": _data()}
+
+
+@benchmark("imp.set_front_vehicle_data.deferred",
+           "imp.set_front_vehicle_data('v.1', data); imp.flush()")
+def _():
+    return {"imp": Plexe(defer_writes=True).plexe, "data": _data()}
+
+
+@benchmark("imp.get_vehicle_data", "imp.get_vehicle_data('v.0')")
+def _():
+    return {"imp": Plexe().plexe}
+
+
+@benchmark("imp.get_radar_data", "imp.get_radar_data('v.0')")
+def _():
+    return {"imp": Plexe().plexe}
+
+
+@benchmark("imp.get_active_controller", "imp.get_active_controller('v.0')")
+def _():
+    return {"imp": Plexe().plexe}
+
+
+@benchmark("imp.get_active_controller.cached",
+           "imp.get_active_controller('v.0')")
+def _():
+    imp = Plexe(cache_parameters=True).plexe
+    imp.set_active_controller("v.0", 2)
+    return {"imp": imp}
+
+
+@benchmark("imp.get_stored_vehicle_data",
+           "imp.get_stored_vehicle_data('v.0', 1)")
+def _():
+    return {"imp": Plexe().plexe}
+
+
+@benchmark("imp.get_vehicles_data.16", "imp.get_vehicles_data(vids)")
+def _():
+    return {"imp": Plexe().plexe, "vids": VEHICLES}
+
+
+@benchmark("imp.get_subscription_data.16",
+           "imp.get_subscription_data(vids)")
+def _():
+    plexe = Plexe()
+    for vid in VEHICLES:
+        plexe.register_vehicle(vid)
+    return {"imp": plexe.plexe, "vids": VEHICLES}
+
+
+def run(name, stmt, setup, repeat, min_time):
+    """
+    Times a benchmark
+    :param repeat: number of measurements
+    :param min_time: minimum duration of each measurement in seconds
+    :return: a dictionary with the results
+    """
+    traci_stub.vehicle.__init__()
+    timer = timeit.Timer(stmt, globals=setup())
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = sorted(t / number for t in timer.repeat(repeat, number))
+    best = times[0]
+    return {
+        "name": name,
+        "loops": number,
+        "repeat": repeat,
+        "best_ns": best * 1e9,
+        "median_ns": times[len(times) // 2] * 1e9,
+        "ops_per_s": 1 / best,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split(
+        "\n\n")[0])
+    parser.add_argument("-o", "--output", help="JSON file for the results. "
+                        "If not specified, results are printed on stdout")
+    parser.add_argument("-k", "--filter", default="",
+                        help="only run benchmarks whose name contains this "
+                        "string")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="measurements per benchmark")
+    parser.add_argument("-t", "--min-time", type=float, default=0.05,
+                        help="minimum duration of a measurement in seconds")
+    parser.add_argument("-c", "--compare", help="JSON file of a previous "
+                        "run. Relative changes are printed on stderr")
+    args = parser.parse_args()
+
+    results = [run(name, stmt, setup, args.repeat, args.min_time)
+               for name, stmt, setup in BENCHMARKS if args.filter in name]
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = {b["name"]: b for b in json.load(f)["benchmarks"]}
+        for result in results:
+            old = baseline.get(result["name"])
+            if old is None:
+                continue
+            change = result["best_ns"] / old["best_ns"] - 1
+            sys.stderr.write("%-45s %10.1f ns %+7.1f%%\n" %
+                             (result["name"], result["best_ns"],
+                              100 * change))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+In-memory replacement of the traci module, used to measure the Python side
+of the API without SUMO. Parameter writes are stored in a dictionary and
+parameter reads return realistic payloads, so that the whole request path
+(key building, packing, unpacking) is exercised, minus the socket.
+install() must be called before importing plexe.plexe
+"""
+import sys
+import types
+
+# values of the traci constants used by the API
+CONSTANTS = {
+    "TYPE_STRING": 0x0C,
+    "TYPE_COMPOUND": 0x0F,
+    "RTYPE_OK": 0x00,
+    "CMD_GET_VEHICLE_VARIABLE": 0xa4,
+    "CMD_SET_VEHICLE_VARIABLE": 0xc4,
+    "VAR_LANE_INDEX": 0x52,
+    "VAR_PARAMETER": 0x7e,
+}
+
+# payloads returned for the parameters which can be read
+PAYLOADS = {
+    "ccsa": "27.7778:-0.1234:-0.0987:1234.5678:-4.8:120.1",
+    "ccrd": "12.3456:-0.4321",
+    "cced": "5:2456.789",
+    "ccvd": "3:27.7778:-0.1234:1234.5678:-4.8:120.1:4:-0.0987",
+    "cccr": "0",
+    "cclc": "3",
+    "ccac": "2",
+    "ccsp": "5",
+    "ccacc": "-0.3456",
+    "ccdte": "8765.4321",
+    "ccdfb": "1234.5678",
+}
+
+
+class TraCIException(Exception):
+    def __init__(self, desc="", command=None, errorType=None):
+        Exception.__init__(self, desc)
+
+
+class StepListener(object):
+    def step(self, t=0):
+        return True
+
+
+class Vehicle(object):
+
+    def __init__(self):
+        self.parameters = {}
+        self.subscriptions = {}
+
+    def setParameter(self, vid, key, value):
+        self.parameters[(vid, key)] = value
+
+    def getParameter(self, vid, key):
+        # parameters with arguments (e.g., "ccvd:1") are looked up by name
+        return PAYLOADS.get(key[15:].split(":", 1)[0], "0")
+
+    def setLaneChangeMode(self, vid, mode):
+        pass
+
+    def getLaneIndex(self, vid):
+        return 0
+
+    def getLength(self, vid):
+        return 4.0
+
+    def subscribe(self, vid, varIDs=None, begin=0, end=0, parameters=None):
+        self.subscriptions[vid] = {
+            CONSTANTS["VAR_PARAMETER"]: PAYLOADS["ccsa"],
+            CONSTANTS["VAR_LANE_INDEX"]: 0,
+        }
+
+    def unsubscribe(self, vid):
+        self.subscriptions.pop(vid, None)
+
+    def getAllSubscriptionResults(self):
+        return self.subscriptions
+
+
+class Simulation(object):
+
+    def getTime(self):
+        return 0.0
+
+    def getArrivedIDList(self):
+        return ()
+
+
+vehicle = Vehicle()
+simulation = Simulation()
+
+
+def getVersion():
+    return 20, "SUMO 1.15.0"
+
+
+def getConnection(label="default"):
+    # no socket connection: batched requests fall back to single requests
+    raise TraCIException("connection '%s' is not known" % label)
+
+
+def install():
+    """
+    Installs this module as traci (and traci.constants) in sys.modules
+    """
+    module = sys.modules[__name__]
+    constants = types.ModuleType("traci.constants")
+    constants.__dict__.update(CONSTANTS)
+    module.constants = constants
+    for name, value in CONSTANTS.items():
+        setattr(module, name, value)
+    sys.modules["traci"] = module
+    sys.modules["traci.constants"] = constants
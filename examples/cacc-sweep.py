@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+
+import os
+import sys
+
+from utils import add_platooning_vehicle
+
+if 'SUMO_HOME' in os.environ:
+    tools = os.path.join(os.environ['SUMO_HOME'], 'tools')
+    sys.path.append(tools)
+else:
+    sys.exit("please declare environment variable 'SUMO_HOME'")
+import traci
+from plexe import ACC, CACC, PLOEG
+from plexe.communication import BeaconExchange
+from plexe.controllers import STANDSTILL
+from plexe.sweep import grid, sweep
+
+# vehicle length
+LENGTH = 4
+# cruising speed
+SPEED = 120/3.6
+# number of vehicles in the platoon
+N_VEHICLES = 8
+# vehicle who starts to brake
+BRAKING_VEHICLE = "v.0"
+
+
+def brake_test(plexe, controller="path", distance=5, xi=2, omega_n=1, c1=0.5,
+               k_p=0.2, k_d=0.7, headway=0.5):
+    """
+    Emergency braking of the platoon leader, as in brakedemo.py, using
+    either the PATH or the PLOEG CACC with the given parameters
+    :param plexe: API instance
+    :param controller: "path" or "ploeg"
+    :return: a dictionary with the minimum gap, the maximum spacing error
+    with respect to the desired gap of the controller (constant for PATH,
+    depending on the speed for PLOEG), and whether any vehicle crashed
+    """
+    followers = ["v.%d" % i for i in range(1, N_VEHICLES)]
+    exchange = BeaconExchange(plexe, length=LENGTH)
+    min_gap = 1e6
+    max_error = 0
+    crashed = False
+    for step in range(1500):
+        traci.simulationStep()
+        if step == 0:
+            for i in range(N_VEHICLES):
+                vid = "v.%d" % i
+                add_platooning_vehicle(plexe, vid, (N_VEHICLES - i + 1) *
+                                       (distance + LENGTH), 0, SPEED,
+                                       distance)
+                plexe.set_fixed_lane(vid, 0, False)
+                traci.vehicle.setSpeedMode(vid, 0)
+                plexe.use_controller_acceleration(vid, False)
+                if i == 0:
+                    plexe.set_active_controller(vid, ACC)
+                    continue
+                if controller == "ploeg":
+                    plexe.set_ploeg_cacc_parameters(vid, k_p, k_d, headway)
+                    plexe.set_active_controller(vid, PLOEG)
+                else:
+                    plexe.set_path_cacc_parameters(vid, distance, xi,
+                                                   omega_n, c1)
+                    plexe.set_active_controller(vid, CACC)
+                exchange.update(vid, "v.0", "v.%d" % (i - 1))
+        if step % 10 == 1:
+            # simulate vehicle communication every 100 ms
+            exchange.communicate()
+        if step == 500:
+            plexe.set_fixed_acceleration(BRAKING_VEHICLE, True, -6)
+        if step > 1:
+            radar = plexe.get_radar_data_many(followers)
+            if controller == "ploeg":
+                data = plexe.get_vehicles_data(followers)
+            for vid in followers:
+                gap = radar[vid].distance
+                if gap < 0:
+                    continue
+                min_gap = min(min_gap, gap)
+                if controller == "ploeg":
+                    desired = STANDSTILL + headway * data[vid].speed
+                else:
+                    desired = distance
+                max_error = max(max_error, abs(gap - desired))
+            if any(plexe.get_crashed_many(followers).values()):
+                crashed = True
+                break
+    return {"min_gap": min_gap, "max_spacing_error": max_error,
+            "crashed": int(crashed)}
+
+
+if __name__ == "__main__":
+    points = grid(controller=["path"], distance=[3, 5, 7], xi=[1, 2],
+                  omega_n=[0.2, 0.5, 1], c1=[0.5])
+    points += grid(controller=["ploeg"], distance=[2], k_p=[0.2],
+                   k_d=[0.5, 0.7], headway=[0.5, 0.8])
+    table = sweep(brake_test, "cfg/freeway.sumo.cfg", points,
+                  "cacc-sweep.csv", timeout=600)
+    for row in table:
+        print(row)
@@ -19,8 +19,7 @@
 import os
 import sys
 import random
-from utils import add_platooning_vehicle, communicate, get_distance, \
-    start_sumo, running
+from utils import add_platooning_vehicle, get_distance, start_sumo, running
 
 if 'SUMO_HOME' in os.environ:
     tools = os.path.join(os.environ['SUMO_HOME'], 'tools')
@@ -30,6 +29,8 @@ else:
 
 import traci
 from plexe import Plexe, ACC, CACC, FAKED_CACC, RPM, GEAR, ACCELERATION, SPEED
+from plexe.communication import BeaconExchange
+from plexe.platoon import Platoon
 
 # vehicle length
 LENGTH = 4
@@ -62,13 +63,13 @@ def add_vehicles(plexe, n, real_engine=False):
     :param n: number of vehicles of the platoon
     :param real_engine: set to true to use the realistic engine model,
     false to use a first order lag model
-    :return: returns the topology of the platoon, i.e., a dictionary which
-    indicates, for each vehicle, who is its leader and who is its front
+    :return: returns the topology of the platoon, i.e., a Platoon object
+    which indicates, for each vehicle, who is its leader and who is its front
     vehicle. The topology can the be used by the data exchange logic to
     automatically fetch data from leading and front vehicle to feed the CACC
     """
     # add a platoon of n vehicles
-    topology = {}
+    platoon = Platoon()
     for i in range(n):
         vid = "v.%d" % i
         add_platooning_vehicle(plexe, vid, (n - i + 1) * (DISTANCE + LENGTH) +
@@ -79,8 +80,7 @@ def add_vehicles(plexe, n, real_engine=False):
             plexe.set_active_controller(vid, ACC)
         else:
             plexe.set_active_controller(vid, CACC)
-        if i > 0:
-            topology[vid] = {"front": "v.%d" % (i - 1), "leader": LEADER}
+        platoon.join(vid)
     # add a vehicle that wants to join the platoon
     vid = "v.%d" % n
     add_platooning_vehicle(plexe, vid, 10, 1, SPEED, DISTANCE, real_engine)
@@ -88,29 +88,28 @@ def add_vehicles(plexe, n, real_engine=False):
     traci.vehicle.setSpeedMode(vid, 0)
     plexe.set_active_controller(vid, ACC)
     plexe.set_path_cacc_parameters(vid, distance=JOIN_DISTANCE)
-    return topology
+    return platoon
 
 
-def get_in_position(plexe, jid, fid, topology):
+def get_in_position(plexe, jid, fid):
     """
     Makes the joining vehicle get close to the join position. This is done by
-    changing the topology and setting the leader and the front vehicle for
-    the joiner. In addition, we increase the cruising speed and we switch to
+    creating a topology for the joiner, which sets its leader and its front
+    vehicle. In addition, we increase the cruising speed and we switch to
     the "fake" CACC, which uses a given GPS distance instead of the radar
     distance to compute the control action
     :param plexe: API instance
     :param jid: id of the joiner
     :param fid: id of the vehicle that will become the predecessor of the joiner
-    :param topology: the current platoon topology
-    :return: the modified topology
+    :return: the topology of the joiner
     """
-    topology[jid] = {"leader": LEADER, "front": fid}
+    joiner = Platoon([jid], leader=LEADER, front=fid)
     plexe.set_cc_desired_speed(jid, SPEED + 15)
     plexe.set_active_controller(jid, FAKED_CACC)
-    return topology
+    return joiner
 
 
-def open_gap(plexe, vid, jid, topology, n):
+def open_gap(plexe, vid, jid, platoon):
     """
     Makes the vehicle that will be behind the joiner open a gap to let the
     joiner in. This is done by creating a temporary platoon, i.e., setting
@@ -121,35 +120,28 @@ def open_gap(plexe, vid, jid, topology, n):
     :param plexe: API instance
     :param vid: vehicle that should open the gap
     :param jid: id of the joiner
-    :param topology: the current platoon topology
-    :param n: total number of vehicles currently in the platoon
-    :return: the modified topology
+    :param platoon: the current platoon topology
+    :return: the topology of the temporary platoon
     """
-    index = int(vid.split(".")[1])
-    for i in range(index + 1, n):
-        # temporarily change the leader
-        topology["v.%d" % i]["leader"] = vid
+    tail = platoon.split(vid)
     # the front vehicle if the vehicle opening the gap is the joiner
-    topology[vid]["front"] = jid
+    tail.set_external(leader=LEADER, front=jid)
     plexe.set_active_controller(vid, FAKED_CACC)
     plexe.set_path_cacc_parameters(vid, distance=JOIN_DISTANCE)
-    return topology
+    return tail
 
 
-def reset_leader(vid, topology, n):
+def reset_leader(platoon, joiner, tail):
     """
-    After the maneuver is completed, the vehicles behind the one that opened
-    the gap, reset the leader to the initial one
-    :param vid: id of the vehicle that let the joiner in
-    :param topology: the current platoon topology
-    :param n: total number of vehicles in the platoon (before the joiner)
-    :return: the modified topology
+    After the maneuver is completed, the joiner and the vehicles behind the
+    one that opened the gap become part of the platoon again, resetting the
+    leader to the initial one
+    :param platoon: the platoon topology
+    :param joiner: the topology of the joiner
+    :param tail: the topology of the temporary platoon
     """
-    index = int(vid.split(".")[1])
-    for i in range(index + 1, n):
-        # restore the real leader
-        topology["v.%d" % i]["leader"] = LEADER
-    return topology
+    platoon.merge(joiner)
+    platoon.merge(tail)
 
 
 def main(demo_mode, real_engine, setter=None):
@@ -157,8 +149,10 @@ def main(demo_mode, real_engine, setter=None):
     random.seed(1)
     start_sumo("cfg/freeway.sumo.cfg", False)
     plexe = Plexe()
+    traci.addStepListener(plexe)
     step = 0
     state = GOING_TO_POSITION
+    exchange = BeaconExchange(plexe)
     while running(demo_mode, step, 6000):
 
         # when reaching 60 seconds, reset the simulation when in demo_mode
@@ -166,28 +160,31 @@ def main(demo_mode, real_engine, setter=None):
             start_sumo("cfg/freeway.sumo.cfg", True)
             step = 0
             state = GOING_TO_POSITION
+            exchange = BeaconExchange(plexe)
             random.seed(1)
 
         traci.simulationStep()
 
         if step == 0:
             # create vehicles and track the joiner
-            topology = add_vehicles(plexe, N_VEHICLES, real_engine)
+            platoon = add_vehicles(plexe, N_VEHICLES, real_engine)
+            platoon.apply(exchange=exchange)
             traci.gui.trackVehicle("View #0", JOINER)
             traci.gui.setZoom("View #0", 20000)
         if step % 10 == 1:
             # simulate vehicle communication every 100 ms
-            communicate(plexe, topology)
+            exchange.communicate()
         if step == 100:
             # at 1 second, let the joiner get closer to the platoon
-            topology = get_in_position(plexe, JOINER, FRONT_JOIN, topology)
+            joiner = get_in_position(plexe, JOINER, FRONT_JOIN)
+            joiner.apply(exchange=exchange)
         if state == GOING_TO_POSITION and step > 0:
             # when the distance of the joiner is small enough, let the others
             # open a gap to let the joiner enter the platoon
             if get_distance(plexe, JOINER, FRONT_JOIN) < JOIN_DISTANCE + 1:
                 state = OPENING_GAP
-                topology = open_gap(plexe, BEHIND_JOIN, JOINER, topology,
-                                    N_VEHICLES)
+                tail = open_gap(plexe, BEHIND_JOIN, JOINER, platoon)
+                tail.apply(exchange=exchange)
         if state == OPENING_GAP:
             # when the gap is large enough, complete the maneuver
             if get_distance(plexe, BEHIND_JOIN, FRONT_JOIN) > \
@@ -198,7 +195,8 @@ def main(demo_mode, real_engine, setter=None):
                 plexe.set_path_cacc_parameters(JOINER, distance=DISTANCE)
                 plexe.set_active_controller(BEHIND_JOIN, CACC)
                 plexe.set_path_cacc_parameters(BEHIND_JOIN, distance=DISTANCE)
-                topology = reset_leader(BEHIND_JOIN, topology, N_VEHICLES)
+                reset_leader(platoon, joiner, tail)
+                platoon.apply(exchange=exchange)
         if real_engine and setter is not None:
             # if we are running with the dashboard, update its values
             tracked_id = traci.gui.getTrackedVehicle("View #0")
@@ -21,6 +21,7 @@ def main(demo_mode, real_engine, setter=None):
 
     start_sumo("cfg/freeway.sumo.cfg", False)
     plexe = Plexe()
+    traci.addStepListener(plexe)
     step = 0
     state_left = None
     state_right = None
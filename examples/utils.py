@@ -28,6 +28,7 @@ else:
 import sumolib
 import traci
 from plexe import POS_X, POS_Y, ENGINE_MODEL_REALISTIC
+from plexe import communication
 
 
 # lane change state bits
@@ -81,6 +82,10 @@ def add_platooning_vehicle(plexe, vid, position, lane, speed, cacc_spacing,
     model
     """
     add_vehicle(plexe, vid, position, lane, speed, vtype)
+    # receive vehicle data through a subscription at every step, if the
+    # version of SUMO supports it
+    if plexe.snapshot_supported:
+        plexe.register_vehicle(vid)
 
     plexe.set_path_cacc_parameters(vid, cacc_spacing, 2, 1, 0.5)
     plexe.set_cc_desired_speed(vid, speed)
@@ -117,22 +122,7 @@ def communicate(plexe, topology):
     vehicle and platoon leader. each entry of the dictionary is a dictionary
     which includes the keys "leader" and "front"
     """
-    for vid, l in topology.items():
-        if "leader" in l.keys():
-            # get data about platoon leader
-            ld = plexe.get_vehicle_data(l["leader"])
-            # pass leader vehicle data to CACC
-            plexe.set_leader_vehicle_data(vid, ld)
-            # pass data to the fake CACC as well, in case it's needed
-            plexe.set_leader_vehicle_fake_data(vid, ld)
-        if "front" in l.keys():
-            # get data about platoon leader
-            fd = plexe.get_vehicle_data(l["front"])
-            # pass front vehicle data to CACC
-            plexe.set_front_vehicle_data(vid, fd)
-            # compute GPS distance and pass it to the fake CACC
-            distance = get_distance(plexe, vid, l["front"])
-            plexe.set_front_vehicle_fake_data(vid, fd, distance)
+    communication.communicate(plexe, topology)
 
 
 def start_sumo(config_file, already_running, gui=True, sublane=True):
@@ -1,5 +1,22 @@
-from .plexe import Plexe
-from .plexe import DRIVER, ACC, CACC, FAKED_CACC, PLOEG, CONSENSUS
-from .plexe import U, ACCELERATION, SPEED, POS_X, POS_Y, TIME, INDEX, LENGTH,\
-                  GEAR, RPM, RADAR_DISTANCE, RADAR_REL_SPEED,\
-                  ENGINE_MODEL_FOLM, ENGINE_MODEL_REALISTIC
+from os import environ
+from os.path import join
+import sys
+if 'SUMO_HOME' in environ:
+    _tools = join(environ['SUMO_HOME'], 'tools')
+    if _tools not in sys.path:
+        sys.path.append(_tools)
+from .constants import DRIVER, ACC, CACC, FAKED_CACC, PLOEG, CONSENSUS
+from .constants import U, ACCELERATION, SPEED, POS_X, POS_Y, TIME, INDEX,\
+                       LENGTH, GEAR, RPM, RADAR_DISTANCE, RADAR_REL_SPEED,\
+                       ENGINE_MODEL_FOLM, ENGINE_MODEL_REALISTIC
+from .constants import BACKEND_TRACI, BACKEND_LIBSUMO
+
+
+def __getattr__(name):
+    # the API class requires traci, which is only imported when needed, so
+    # that constants and data types can be used without SUMO
+    if name == "Plexe":
+        from .plexe import Plexe
+        globals()["Plexe"] = Plexe
+        return Plexe
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
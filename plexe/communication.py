@@ -0,0 +1,115 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+import math
+
+
+class BeaconExchange:
+    """
+    Simulates the exchange of beacons between vehicles, i.e., fetches data
+    from leading and front vehicles to feed the CACC algorithms. The data of
+    each sender is fetched only once per round, no matter how many vehicles
+    receive it, and all the writes are sent with a single TraCI message
+    """
+
+    def __init__(self, plexe, topology=None, length=4):
+        """
+        Constructor
+        :param plexe: API instance
+        :param topology: a dictionary pointing each vehicle id to its front
+        vehicle and platoon leader. each entry of the dictionary is a
+        dictionary which includes the keys "leader" and "front"
+        :param length: vehicle length in meters, removed from the distance
+        between a vehicle and its front vehicle
+        """
+        self.plexe = plexe
+        self.topology = {} if topology is None else topology
+        self.length = length
+
+    def set_topology(self, topology):
+        """
+        Replaces the topology
+        :param topology: the new topology. See the constructor
+        """
+        self.topology = topology
+
+    def update(self, vid, leader=None, front=None):
+        """
+        Changes the leader and the front vehicle of a vehicle
+        :param vid: vehicle id
+        :param leader: id of the new leader, or None if the vehicle does not
+        receive data from a leader
+        :param front: id of the new front vehicle, or None if the vehicle
+        does not receive data from a front vehicle
+        """
+        links = {}
+        if leader is not None:
+            links["leader"] = leader
+        if front is not None:
+            links["front"] = front
+        self.topology[vid] = links
+
+    def remove(self, vid):
+        """
+        Removes a vehicle from the set of receivers
+        :param vid: vehicle id
+        """
+        self.topology.pop(vid, None)
+
+    def communicate(self):
+        """
+        Performs a round of data exchange
+        """
+        vids = set()
+        for vid, links in self.topology.items():
+            if "leader" in links:
+                vids.add(links["leader"])
+            if "front" in links:
+                vids.add(links["front"])
+                vids.add(vid)
+        if len(vids) == 0:
+            return
+        data = self.plexe.get_vehicles_data(list(vids))
+        with self.plexe.batch_writes():
+            for vid, links in self.topology.items():
+                if "leader" in links:
+                    ld = data[links["leader"]]
+                    # pass leader vehicle data to CACC
+                    self.plexe.set_leader_vehicle_data(vid, ld)
+                    # pass data to the fake CACC as well, in case it's needed
+                    self.plexe.set_leader_vehicle_fake_data(vid, ld)
+                if "front" in links:
+                    fd = data[links["front"]]
+                    vd = data[vid]
+                    # pass front vehicle data to CACC
+                    self.plexe.set_front_vehicle_data(vid, fd)
+                    # compute GPS distance and pass it to the fake CACC
+                    distance = math.sqrt((vd.pos_x - fd.pos_x) ** 2 +
+                                         (vd.pos_y - fd.pos_y) ** 2) - \
+                        self.length
+                    self.plexe.set_front_vehicle_fake_data(vid, fd, distance)
+
+
+def communicate(plexe, topology, length=4):
+    """
+    Performs a round of data exchange between vehicles. See BeaconExchange
+    :param plexe: API instance
+    :param topology: a dictionary pointing each vehicle id to its front
+    vehicle and platoon leader. each entry of the dictionary is a dictionary
+    which includes the keys "leader" and "front"
+    :param length: vehicle length in meters
+    """
+    BeaconExchange(plexe, topology, length).communicate()
@@ -0,0 +1,48 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Constants of the Plexe API. This module does not depend on traci, so that
+it can be imported without a SUMO installation
+"""
+
+# available controllers
+DRIVER = 0
+ACC = 1
+CACC = 2
+FAKED_CACC = 3
+PLOEG = 4
+CONSENSUS = 5
+
+U = "u"
+ACCELERATION = "acceleration"
+SPEED = "speed"
+POS_X = "posx"
+POS_Y = "posy"
+TIME = "time"
+INDEX = "index"
+LENGTH = "length"
+GEAR = "gear"
+RPM = "rpm"
+RADAR_DISTANCE = "rd"
+RADAR_REL_SPEED = "rs"
+
+ENGINE_MODEL_FOLM = 0x00
+ENGINE_MODEL_REALISTIC = 0x01
+
+# backends used to communicate with SUMO
+BACKEND_TRACI = "traci"
+BACKEND_LIBSUMO = "libsumo"
@@ -0,0 +1,235 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Vectorized control laws of the Plexe controllers. Each law computes the
+control input (desired acceleration in m/s^2) of a set of vehicles with a
+single call, taking arrays for the vehicle states and either scalars or
+arrays for the controller parameters. This allows to evaluate what each
+controller would command for a whole fleet under candidate parameters,
+e.g., before setting them through the API:
+
+    slots = fleet.slots_of(followers)
+    fronts = fleet.slots_of(fronts_of_followers)
+    u = fleet_acc(fleet, slots, fronts, headway=1.2)
+
+The fleet_* functions take their inputs from a FleetState. The input of
+the controllers is not limited by the acceleration and deceleration
+capabilities of the vehicles.
+"""
+import numpy as np
+
+# gain of the cruise control
+CC_KP = 1.0
+# standstill distance used by the ACC and PLOEG controllers
+STANDSTILL = 2.0
+# distance to the front vehicle below which the cooperative controllers
+# ignore the cruise control
+CACC_RANGE = 20.0
+
+
+def cc(speed, desired_speed, kp=CC_KP):
+    """
+    Cruise control
+    :param speed: speed of the vehicles in m/s
+    :param desired_speed: desired speed in m/s
+    :param kp: proportional gain
+    :return: array of control inputs
+    """
+    return -kp * (np.asarray(speed) - desired_speed)
+
+
+def acc(speed, front_speed, distance, headway=1.5, lam=0.1, u_cc=None):
+    """
+    Adaptive cruise control
+    :param speed: speed of the vehicles in m/s
+    :param front_speed: speed of the respective front vehicles in m/s
+    :param distance: distance to the front vehicles in meters. Vehicles
+    without a (visible) front vehicle have an infinite distance
+    :param headway: time headway in seconds (see set_acc_headway_time)
+    :param lam: gain of the spacing error
+    :param u_cc: optional cruise control input (see cc()). If given, the
+    result is the minimum between the two inputs, and the cruise control
+    input for vehicles without a front vehicle, as done by Plexe
+    :return: array of control inputs
+    """
+    speed = np.asarray(speed)
+    u = -1.0 / headway * (speed - front_speed + lam *
+                          (-np.asarray(distance) + headway * speed +
+                           STANDSTILL))
+    if u_cc is None:
+        return u
+    return np.where(np.isfinite(distance), np.minimum(u_cc, u), u_cc)
+
+
+def path_cacc(speed, front_speed, front_acceleration, distance,
+              leader_speed, leader_acceleration, spacing=5.0, xi=1.0,
+              omega_n=0.2, c1=0.5):
+    """
+    PATH CACC (Rajamani)
+    :param speed: speed of the vehicles in m/s
+    :param front_speed: speed of the front vehicles in m/s
+    :param front_acceleration: acceleration of the front vehicles in m/s^2
+    (either the actual one or the controller input, see
+    use_controller_acceleration)
+    :param distance: distance to the front vehicles in meters
+    :param leader_speed: speed of the platoon leaders in m/s
+    :param leader_acceleration: acceleration of the platoon leaders
+    :param spacing: constant spacing in meters
+    :param xi: damping ratio
+    :param omega_n: bandwidth
+    :param c1: leader data weighting parameter
+    :return: array of control inputs
+    """
+    speed = np.asarray(speed)
+    xi = np.asarray(xi, dtype=float)
+    root = np.sqrt(np.maximum(xi * xi - 1, 0))
+    alpha3 = -(2 * xi - c1 * (xi + root)) * omega_n
+    alpha4 = -c1 * (xi + root) * omega_n
+    return (1 - c1) * np.asarray(front_acceleration) + \
+        c1 * np.asarray(leader_acceleration) + \
+        alpha3 * (speed - front_speed) + alpha4 * (speed - leader_speed) - \
+        omega_n * omega_n * (spacing - np.asarray(distance))
+
+
+def ploeg(speed, acceleration, u, front_speed, front_u, distance, dt,
+          headway=0.5, kp=0.2, kd=0.7):
+    """
+    PLOEG CACC. The controller defines the derivative of the control input,
+    which is integrated over a time step
+    :param speed: speed of the vehicles in m/s
+    :param acceleration: actual acceleration of the vehicles in m/s^2
+    :param u: current control input of the vehicles in m/s^2
+    :param front_speed: speed of the front vehicles in m/s
+    :param front_u: control input of the front vehicles in m/s^2
+    :param distance: distance to the front vehicles in meters
+    :param dt: time step in seconds
+    :param headway: time headway in seconds
+    :param kp: proportional gain
+    :param kd: derivative gain
+    :return: array of control inputs at the end of the time step
+    """
+    speed = np.asarray(speed)
+    u = np.asarray(u)
+    return u + dt / headway * (
+        -u + kp * (np.asarray(distance) - (STANDSTILL + headway * speed)) +
+        kd * (np.asarray(front_speed) - speed - headway *
+              np.asarray(acceleration)) + front_u)
+
+
+def limit(u_cc, u, distance, cacc_range=CACC_RANGE):
+    """
+    Limits the input of a cooperative controller with the one of the cruise
+    control, unless the front vehicle is closer than cacc_range, as done by
+    Plexe
+    :param u_cc: cruise control input
+    :param u: cooperative controller input
+    :param distance: distance to the front vehicles in meters
+    :return: array of control inputs
+    """
+    return np.where(np.asarray(distance) < cacc_range, u,
+                    np.minimum(u_cc, u))
+
+
+def _front(fleet, slots, front_slots):
+    """
+    Returns distance and speed of the front vehicles. Negative front slots
+    mean no front vehicle, resulting in an infinite distance
+    """
+    slots = np.asarray(slots)
+    front_slots = np.asarray(front_slots)
+    has_front = front_slots >= 0
+    fronts = np.where(has_front, front_slots, slots)
+    distance = np.where(has_front, fleet.distances(slots, fronts), np.inf)
+    return distance, fleet.speed[fronts], fronts
+
+
+def fleet_acc(fleet, slots, front_slots, headway=1.5, lam=0.1,
+              desired_speed=None):
+    """
+    Evaluates the ACC over a set of vehicles of a FleetState
+    :param fleet: FleetState
+    :param slots: slots of the vehicles
+    :param front_slots: slots of their front vehicles, -1 for none
+    :param headway: time headway in seconds
+    :param lam: gain of the spacing error
+    :param desired_speed: if given, the cruise control with this desired
+    speed limits the input (see acc())
+    :return: array of control inputs
+    """
+    distance, front_speed, _ = _front(fleet, slots, front_slots)
+    speed = fleet.speed[slots]
+    u_cc = None if desired_speed is None else cc(speed, desired_speed)
+    return acc(speed, front_speed, distance, headway, lam, u_cc)
+
+
+def fleet_path_cacc(fleet, slots, front_slots, leader_slots, spacing=5.0,
+                    xi=1.0, omega_n=0.2, c1=0.5,
+                    use_controller_acceleration=True, desired_speed=None):
+    """
+    Evaluates the PATH CACC over a set of vehicles of a FleetState, with
+    perfect knowledge of leader and front vehicle states
+    :param fleet: FleetState
+    :param slots: slots of the vehicles
+    :param front_slots: slots of their front vehicles
+    :param leader_slots: slots of their platoon leaders, -1 for none, in
+    which case the front vehicle is used as leader
+    :param spacing: constant spacing in meters
+    :param xi: damping ratio
+    :param omega_n: bandwidth
+    :param c1: leader data weighting parameter
+    :param use_controller_acceleration: use the controller input of leader
+    and front vehicle instead of their actual acceleration
+    :param desired_speed: if given, the cruise control with this desired
+    speed limits the input (see limit())
+    :return: array of control inputs
+    """
+    distance, front_speed, fronts = _front(fleet, slots, front_slots)
+    leader_slots = np.asarray(leader_slots)
+    leaders = np.where(leader_slots >= 0, leader_slots, fronts)
+    accelerations = fleet.u if use_controller_acceleration else \
+        fleet.acceleration
+    speed = fleet.speed[slots]
+    u = path_cacc(speed, front_speed, accelerations[fronts], distance,
+                  fleet.speed[leaders], accelerations[leaders],
+                  spacing, xi, omega_n, c1)
+    if desired_speed is None:
+        return u
+    return limit(cc(speed, desired_speed), u, distance)
+
+
+def fleet_ploeg(fleet, slots, front_slots, dt, headway=0.5, kp=0.2, kd=0.7,
+                desired_speed=None):
+    """
+    Evaluates the PLOEG CACC over a set of vehicles of a FleetState
+    :param fleet: FleetState
+    :param slots: slots of the vehicles
+    :param front_slots: slots of their front vehicles
+    :param dt: time step in seconds
+    :param headway: time headway in seconds
+    :param kp: proportional gain
+    :param kd: derivative gain
+    :param desired_speed: if given, the cruise control with this desired
+    speed limits the input (see limit())
+    :return: array of control inputs
+    """
+    distance, front_speed, fronts = _front(fleet, slots, front_slots)
+    speed = fleet.speed[slots]
+    u = ploeg(speed, fleet.acceleration[slots], fleet.u[slots], front_speed,
+              fleet.u[fronts], distance, dt, headway, kp, kd)
+    if desired_speed is None:
+        return u
+    return limit(cc(speed, desired_speed), u, distance)
@@ -0,0 +1,171 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+import numpy as np
+import traci
+
+
+class FleetState(traci.StepListener):
+    """
+    Columnar store of the state of a set of automated vehicles. The state of
+    each vehicle is stored in NumPy arrays (speed, acceleration, u, pos_x,
+    pos_y, time, length, controller) at a slot which does not change while
+    the vehicle is tracked, so that analyses over the whole fleet can be
+    performed with array operations. The state is refreshed once per step,
+    so the object is added as a step listener after the Plexe instance
+    (see Plexe.split_registered), e.g.,
+        plexe = Plexe()
+        traci.addStepListener(plexe)
+        fleet = FleetState(plexe)
+        traci.addStepListener(fleet)
+    Tracked vehicles are registered for the Plexe per step snapshot, so that
+    refreshing the state does not require additional requests for vehicle
+    data. Vehicles leaving the simulation are removed automatically, and the
+    state of vehicles which did not enter it yet is left undefined (NaN)
+    """
+
+    def __init__(self, plexe, capacity=64):
+        """
+        Constructor
+        :param plexe: Plexe API instance
+        :param capacity: initial number of slots. Arrays are enlarged
+        automatically when required
+        """
+        self.plexe = plexe
+        # vehicle id to slot and slot to vehicle id (None for free slots)
+        self.slots = {}
+        self.vids = []
+        self._free = []
+        self.speed = np.full(capacity, np.nan)
+        self.acceleration = np.full(capacity, np.nan)
+        self.u = np.full(capacity, np.nan)
+        self.pos_x = np.full(capacity, np.nan)
+        self.pos_y = np.full(capacity, np.nan)
+        self.time = np.full(capacity, np.nan)
+        self.length = np.full(capacity, np.nan)
+        self.controller = np.full(capacity, -1, dtype=np.int32)
+        # whether a slot is currently assigned to a vehicle
+        self.active = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        capacity = 2 * len(self.active)
+        for name, fill in (("speed", np.nan), ("acceleration", np.nan),
+                           ("u", np.nan), ("pos_x", np.nan),
+                           ("pos_y", np.nan), ("time", np.nan),
+                           ("length", np.nan), ("controller", -1),
+                           ("active", False)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, vid, length=None):
+        """
+        Starts tracking a vehicle
+        :param vid: vehicle id
+        :param length: vehicle length in meters. If None, it is obtained
+        from SUMO
+        :return: the slot assigned to the vehicle
+        """
+        if vid in self.slots:
+            return self.slots[vid]
+        if length is None:
+            length = self.plexe.connection.vehicle.getLength(vid)
+        if len(self._free) > 0:
+            slot = self._free.pop()
+            self.vids[slot] = vid
+        else:
+            slot = len(self.vids)
+            if slot == len(self.active):
+                self._grow()
+            self.vids.append(vid)
+        self.slots[vid] = slot
+        self.length[slot] = length
+        self.active[slot] = True
+        self.plexe.register_vehicle(vid)
+        return slot
+
+    def remove(self, vid):
+        """
+        Stops tracking a vehicle, unregistering it from the Plexe snapshot,
+        and frees its slot
+        :param vid: vehicle id
+        """
+        slot = self.slots.pop(vid, None)
+        if slot is None:
+            return
+        self.vids[slot] = None
+        self._free.append(slot)
+        self.active[slot] = False
+        for array in (self.speed, self.acceleration, self.u, self.pos_x,
+                      self.pos_y, self.time, self.length):
+            array[slot] = np.nan
+        self.controller[slot] = -1
+        self.plexe.unregister_vehicle(vid)
+
+    def slot(self, vid):
+        """
+        Returns the slot of a tracked vehicle
+        :param vid: vehicle id
+        :return: slot index
+        """
+        return self.slots[vid]
+
+    def slots_of(self, vids):
+        """
+        Returns the slots of a list of tracked vehicles, to be used for
+        indexing the state arrays
+        :param vids: list of vehicle ids
+        :return: integer array of slot indexes
+        """
+        return np.fromiter((self.slots[vid] for vid in vids), dtype=np.intp,
+                           count=len(vids))
+
+    def refresh(self):
+        """
+        Updates the state of all tracked vehicles
+        """
+        vids, left = self.plexe.split_registered(self.slots)
+        for vid in left:
+            self.remove(vid)
+        if len(vids) == 0:
+            return
+        slots = self.slots_of(vids)
+        data = self.plexe.get_vehicles_data(vids)
+        controllers = self.plexe.get_active_controller_many(vids)
+        n = len(vids)
+        for name in ("speed", "acceleration", "u", "pos_x", "pos_y", "time"):
+            getattr(self, name)[slots] = np.fromiter(
+                (getattr(data[vid], name) for vid in vids), dtype=float,
+                count=n)
+        self.controller[slots] = np.fromiter(
+            (controllers[vid] for vid in vids), dtype=np.int32, count=n)
+
+    def step(self, t=0):
+        self.refresh()
+        return True
+
+    def distances(self, slots, front_slots):
+        """
+        Computes the distances between vehicles and their front vehicles,
+        removing the length of the front vehicle
+        :param slots: array of slots of the vehicles
+        :param front_slots: array of slots of the respective front vehicles
+        :return: array of distances in meters
+        """
+        return np.hypot(self.pos_x[front_slots] - self.pos_x[slots],
+                        self.pos_y[front_slots] - self.pos_y[slots]) - \
+            self.length[front_slots]
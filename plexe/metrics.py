@@ -0,0 +1,206 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Streaming performance metrics of a platoon. PlatoonMetrics is a step
+listener which updates, at every step, running statistics of each member
+(spacing error with respect to the CACC spacing, speed, acceleration, jerk,
+gap, and time spent with each controller). Statistics are computed with
+Welford's algorithm, so memory usage does not depend on the length of the
+run, e.g.,
+
+    metrics = PlatoonMetrics(plexe, ["v.0", "v.1", "v.2"])
+    traci.addStepListener(metrics)
+    ...
+    print(metrics.summary())
+    print(metrics.string_stability())
+"""
+import numpy as np
+import traci
+
+# number of controllers whose active time is accounted (DRIVER to
+# CONSENSUS, see plexe.constants)
+CONTROLLERS = 6
+
+
+class RunningStats:
+    """
+    Running count, mean, variance, minimum, and maximum of a set of
+    variables (e.g., one per vehicle), updated with Welford's algorithm
+    """
+
+    def __init__(self, n):
+        """
+        Constructor
+        :param n: number of variables
+        """
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+
+    def update(self, values, mask=None):
+        """
+        Adds a sample of each variable
+        :param values: array with one value per variable
+        :param mask: optional boolean array selecting the variables which
+        are updated. Non finite values are always ignored
+        """
+        valid = np.isfinite(values)
+        if mask is not None:
+            valid &= mask
+        values = np.where(valid, values, 0)
+        self.count += valid
+        delta = np.where(valid, values - self.mean, 0)
+        self.mean += delta / np.maximum(self.count, 1)
+        self.m2 += delta * np.where(valid, values - self.mean, 0)
+        self.min = np.where(valid, np.minimum(self.min, values), self.min)
+        self.max = np.where(valid, np.maximum(self.max, values), self.max)
+
+    @property
+    def variance(self):
+        """
+        Population variance, NaN for variables without samples
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, self.m2 / self.count, np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def rms(self):
+        """
+        Root mean square, NaN for variables without samples
+        """
+        return np.sqrt(self.mean * self.mean + self.variance)
+
+    def as_dict(self, i):
+        """
+        Returns the statistics of a variable
+        :param i: index of the variable
+        """
+        return {"count": int(self.count[i]),
+                "mean": float(self.mean[i]) if self.count[i] else np.nan,
+                "std": float(self.std[i]), "rms": float(self.rms[i]),
+                "min": float(self.min[i]), "max": float(self.max[i])}
+
+
+class PlatoonMetrics(traci.StepListener):
+    """
+    Step listener computing streaming metrics of the members of a platoon.
+    Members are registered for the Plexe per step snapshot, whose data the
+    listener reads after the Plexe instance updates it (see
+    Plexe.split_registered), and radar data, active controller, and CACC
+    spacing of all the members are obtained with a single TraCI message per
+    step. Members which are not in the simulation are skipped
+    """
+
+    def __init__(self, plexe, vids):
+        """
+        Constructor
+        :param plexe: Plexe API instance
+        :param vids: ids of the members, ordered from the leader to the last
+        vehicle. The vehicles must be in the simulation
+        """
+        self.plexe = plexe
+        self.vids = list(vids)
+        self.step_length = plexe.connection.simulation.getDeltaT()
+        n = len(self.vids)
+        self.spacing_error = RunningStats(n)
+        self.speed = RunningStats(n)
+        self.acceleration = RunningStats(n)
+        self.jerk = RunningStats(n)
+        self.gap = RunningStats(n)
+        # seconds spent by each member with each controller
+        self.controller_time = np.zeros((n, CONTROLLERS))
+        self._last_acceleration = np.full(n, np.nan)
+        for vid in self.vids:
+            plexe.register_vehicle(vid)
+
+    def step(self, t=0):
+        vids, _ = self.plexe.split_registered(self.vids)
+        if len(vids) == 0:
+            return True
+        present = set(vids)
+        idx = np.fromiter((i for i, vid in enumerate(self.vids)
+                           if vid in present), dtype=np.intp, count=len(vids))
+        n = len(self.vids)
+        with self.plexe.pipeline() as p:
+            radar = [p.get_radar_data(vid) for vid in vids]
+            controllers = [p.get_active_controller(vid) for vid in vids]
+            spacing = [p.get_cacc_spacing(vid) for vid in vids]
+        data = self.plexe.get_vehicles_data(vids)
+
+        speed = np.full(n, np.nan)
+        acceleration = np.full(n, np.nan)
+        gap = np.full(n, np.nan)
+        cacc_spacing = np.full(n, np.nan)
+        speed[idx] = [data[vid].speed for vid in vids]
+        acceleration[idx] = [data[vid].acceleration for vid in vids]
+        gap[idx] = [r.result().distance for r in radar]
+        cacc_spacing[idx] = [s.result() for s in spacing]
+        controller = np.fromiter((c.result() for c in controllers),
+                                 dtype=np.intp, count=len(idx))
+        # negative radar distances mean no vehicle in range
+        gap[gap < 0] = np.nan
+
+        self.speed.update(speed)
+        self.acceleration.update(acceleration)
+        self.jerk.update((acceleration - self._last_acceleration) /
+                         self.step_length)
+        self._last_acceleration = acceleration
+        self.gap.update(gap)
+        self.spacing_error.update(gap - cacc_spacing)
+        known = (controller >= 0) & (controller < CONTROLLERS)
+        self.controller_time[idx[known], controller[known]] += \
+            self.step_length
+        return True
+
+    def string_stability(self):
+        """
+        Returns the amplification ratios of the acceleration between
+        consecutive members, i.e., the ratio between the RMS (L2) and the
+        peak (L-infinity) acceleration of each member and the ones of its
+        predecessor. Ratios greater than 1 indicate that disturbances are
+        amplified along the platoon
+        :return: a dictionary mapping "rms" and "peak" to arrays with one
+        ratio per follower
+        """
+        rms = self.acceleration.rms
+        peak = np.maximum(np.abs(self.acceleration.min),
+                          np.abs(self.acceleration.max))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {"rms": rms[1:] / rms[:-1], "peak": peak[1:] / peak[:-1]}
+
+    def summary(self):
+        """
+        Returns the metrics of each member
+        :return: dictionary mapping vehicle ids to dictionaries with the
+        statistics of spacing_error, speed, acceleration, jerk, and gap, and
+        with controller_time, mapping controllers to seconds
+        """
+        ret = {}
+        for i, vid in enumerate(self.vids):
+            ret[vid] = {name: getattr(self, name).as_dict(i)
+                        for name in ("spacing_error", "speed",
+                                     "acceleration", "jerk", "gap")}
+            ret[vid]["controller_time"] = {
+                c: float(t) for c, t in enumerate(self.controller_time[i])
+                if t > 0}
+        return ret
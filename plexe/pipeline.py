@@ -0,0 +1,205 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Pipelined requests. Get requests issued through a Pipeline are not sent
+immediately: they are queued, together with the parameter writes, and the
+whole queue is sent with a single TraCI message when the pipeline is
+executed. Each get returns a PendingResult, whose value is available after
+the execution, e.g.,
+
+    with plexe.pipeline() as p:
+        data = {vid: p.get_vehicle_data(vid) for vid in vids}
+        plexe.set_cc_desired_speed("v.0", 30)
+    print(data["v.1"].result().speed)
+
+This hides the latency of the single request-response exchanges, which
+dominates when SUMO runs on a remote host.
+"""
+from operator import itemgetter
+from plexe.plexe_imp import ccparams as cc
+
+_first = itemgetter(0)
+
+
+def _crashed(ret):
+    return ret[0] == 1
+
+
+class PendingResult:
+    """
+    Value of a get request issued through a pipeline
+    """
+    __slots__ = ("done", "_value", "_error")
+
+    def __init__(self):
+        self.done = False
+        self._value = None
+        self._error = None
+
+    def _resolve(self, value):
+        self._value = value
+        self.done = True
+
+    def _fail(self, error):
+        self._error = error
+        self.done = True
+
+    def result(self):
+        """
+        Returns the value of the request
+        :return: the value, as returned by the respective Plexe getter
+        """
+        if not self.done:
+            raise RuntimeError("the pipeline has not been executed yet")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class Pipeline:
+    """
+    Queue of get requests to be sent with a single TraCI message. Requests
+    which can be answered locally, i.e., from the per step snapshot or from
+    the parameter mirror, are resolved immediately. Usually obtained
+    through Plexe.pipeline()
+    """
+
+    def __init__(self, plexe):
+        """
+        Constructor
+        :param plexe: Plexe API instance
+        """
+        self.plexe = plexe
+        # queued (vid, par, args, convert, pending result) tuples
+        self.requests = []
+
+    def __len__(self):
+        return len(self.requests)
+
+    def _get(self, vid, par, convert, *args):
+        pending = PendingResult()
+        ret = self.plexe.plexe._get_cached_par(vid, par, args)
+        if ret is not None:
+            pending._resolve(convert(ret))
+        else:
+            self.requests.append((vid, par, args, convert, pending))
+        return pending
+
+    def execute(self):
+        """
+        Sends the parameter writes deferred so far, followed by the queued
+        get requests, with a single TraCI message, and resolves the pending
+        results. Get requests thus observe the writes. If a request fails,
+        all the pending results of this execution raise the error, which is
+        raised by this method as well
+        """
+        requests = self.requests
+        self.requests = []
+        try:
+            values = self.plexe.plexe.execute_pipeline(
+                [(vid, par, args) for vid, par, args, _, _ in requests])
+        except Exception as e:
+            for request in requests:
+                request[4]._fail(e)
+            raise
+        for request, value in zip(requests, values):
+            request[4]._resolve(request[3](value))
+
+    def get_vehicle_data(self, vid):
+        """
+        See Plexe.get_vehicle_data
+        :return: a PendingResult
+        """
+        data = self.plexe.snapshot.get(vid)
+        if data is not None:
+            pending = PendingResult()
+            pending._resolve(data)
+            return pending
+        return self._get(vid, cc.PAR_SPEED_AND_ACCELERATION,
+                         self.plexe.plexe._vehicle_data)
+
+    def get_crashed(self, vid):
+        """
+        See Plexe.get_crashed
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_CRASHED, _crashed)
+
+    def get_radar_data(self, vid):
+        """
+        See Plexe.get_radar_data
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_RADAR_DATA, self.plexe.plexe._radar_data)
+
+    def get_lanes_count(self, vid):
+        """
+        See Plexe.get_lanes_count
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_LANES_COUNT, _first)
+
+    def get_distance_to_end(self, vid):
+        """
+        See Plexe.get_distance_to_end
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_DISTANCE_TO_END, _first)
+
+    def get_distance_from_begin(self, vid):
+        """
+        See Plexe.get_distance_from_begin
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_DISTANCE_FROM_BEGIN, _first)
+
+    def get_active_controller(self, vid):
+        """
+        See Plexe.get_active_controller
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_ACTIVE_CONTROLLER, _first)
+
+    def get_acc_acceleration(self, vid):
+        """
+        See Plexe.get_acc_acceleration
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_ACC_ACCELERATION, _first)
+
+    def get_cacc_spacing(self, vid):
+        """
+        See Plexe.get_cacc_spacing
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_CACC_SPACING, _first)
+
+    def get_stored_vehicle_data(self, vid, other_vid):
+        """
+        See Plexe.get_stored_vehicle_data
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.CC_PAR_VEHICLE_DATA,
+                         self.plexe.plexe._stored_vehicle_data, other_vid)
+
+    def get_engine_data(self, vid):
+        """
+        See Plexe.get_engine_data
+        :return: a PendingResult
+        """
+        return self._get(vid, cc.PAR_ENGINE_DATA,
+                         self.plexe.plexe._engine_data)
@@ -0,0 +1,239 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+
+
+class Platoon:
+    """
+    Topology of a platoon. Stores the ordered list of members together with
+    an index of their positions, and derives for each member the vehicle
+    it takes leader and front data from. Every operation only updates the
+    vehicles whose position, leader, or front vehicle actually change, and
+    records them so that the changes can be forwarded to SUMO and to a
+    BeaconExchange without walking the whole platoon (see apply())
+    """
+
+    def __init__(self, members=(), leader=None, front=None):
+        """
+        Constructor
+        :param members: ordered list of vehicle ids, starting from the leader
+        :param leader: id of a vehicle outside the platoon the leader takes
+        leader data from, e.g., when opening a gap inside another platoon
+        :param front: id of a vehicle outside the platoon the leader takes
+        front data from
+        """
+        self.members = []
+        self.index = {}
+        self.external_leader = leader
+        self.external_front = front
+        # leader and front vehicle of each member, in the format used by
+        # BeaconExchange
+        self.topology = {}
+        # changed vehicles, mapped to their new links and position. removed
+        # vehicles are mapped to (None, None)
+        self.changes = {}
+        # members added to a leader in SUMO by apply(), mapped to the leader
+        self.added = {}
+        for vid in members:
+            self.join(vid)
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, vid):
+        return vid in self.index
+
+    def __iter__(self):
+        return iter(self.members)
+
+    @property
+    def leader(self):
+        """
+        Returns the id of the platoon leader, or None if the platoon is empty
+        """
+        return self.members[0] if len(self.members) > 0 else None
+
+    def position(self, vid):
+        """
+        Returns the 0-based position of a member
+        :param vid: vehicle id
+        """
+        return self.index[vid]
+
+    def front_of(self, vid):
+        """
+        Returns the vehicle a member takes front data from
+        :param vid: vehicle id
+        :return: front vehicle id, or None
+        """
+        return self.topology[vid].get("front")
+
+    def _links(self, position):
+        links = {}
+        if position == 0:
+            if self.external_leader is not None:
+                links["leader"] = self.external_leader
+            if self.external_front is not None:
+                links["front"] = self.external_front
+        else:
+            links["leader"] = self.members[0]
+            links["front"] = self.members[position - 1]
+        return links
+
+    def _update(self, start, stop=None):
+        """
+        Recomputes position and links of the members in [start, stop)
+        """
+        stop = len(self.members) if stop is None else min(stop,
+                                                          len(self.members))
+        for position in range(start, stop):
+            vid = self.members[position]
+            links = self._links(position)
+            if self.index.get(vid) != position or \
+                    self.topology.get(vid) != links:
+                self.index[vid] = position
+                self.topology[vid] = links
+                self.changes[vid] = (links, position)
+
+    def join(self, vid, position=None):
+        """
+        Adds a vehicle to the platoon
+        :param vid: vehicle id
+        :param position: 0-based position of the new member. If None, the
+        vehicle joins at the tail
+        :raises ValueError: if the vehicle is already a member
+        """
+        if vid in self.index:
+            raise ValueError("%s is already a member of the platoon" % vid)
+        if position is None or position >= len(self.members):
+            position = len(self.members)
+        self.members.insert(position, vid)
+        if position == 0:
+            # new leader: every member takes leader data from it
+            self._update(0)
+        else:
+            self._update(position)
+
+    def leave(self, vid):
+        """
+        Removes a vehicle from the platoon
+        :param vid: vehicle id
+        """
+        position = self.index.pop(vid)
+        del self.members[position]
+        del self.topology[vid]
+        self.changes[vid] = (None, None)
+        self._update(position)
+
+    def split(self, vid):
+        """
+        Splits the platoon in two. The given vehicle and the ones behind it
+        form a new platoon, which keeps taking leader and front data from
+        the current leader and from the vehicle in front of the given one,
+        until changed with set_external()
+        :param vid: id of the leader of the new platoon
+        :return: the new platoon
+        """
+        position = self.index[vid]
+        tail = Platoon(leader=self.members[0] if position > 0 else None,
+                       front=self.members[position - 1] if position > 0
+                       else None)
+        moved = self.members[position:]
+        del self.members[position:]
+        for v in moved:
+            del self.index[v]
+            del self.topology[v]
+            self.changes.pop(v, None)
+            if v in self.added:
+                tail.added[v] = self.added.pop(v)
+        tail.members = moved
+        tail._update(0)
+        return tail
+
+    def merge(self, other):
+        """
+        Appends the members of another platoon to this one. The other
+        platoon is left empty
+        :param other: the platoon to merge
+        :raises ValueError: if the platoons share any vehicle
+        """
+        shared = [vid for vid in other.members if vid in self.index]
+        if len(shared) > 0:
+            raise ValueError("vehicles %s are already members of the platoon"
+                             % ", ".join(shared))
+        position = len(self.members)
+        for vid in other.members:
+            other.changes.pop(vid, None)
+        self.members.extend(other.members)
+        self.added.update(other.added)
+        other.added = {}
+        other.members = []
+        other.index = {}
+        other.topology = {}
+        self._update(position)
+
+    def set_external(self, leader=None, front=None):
+        """
+        Sets the vehicles outside the platoon the leader takes data from
+        :param leader: id of the vehicle providing leader data, or None
+        :param front: id of the vehicle providing front data, or None
+        """
+        self.external_leader = leader
+        self.external_front = front
+        self._update(0, 1)
+
+    def pop_changes(self):
+        """
+        Returns and clears the vehicles changed since the last call
+        :return: a dictionary mapping each changed vehicle id to a (links,
+        position) tuple, where links is a dictionary with the "leader" and
+        "front" keys (as in BeaconExchange) or None if the vehicle left
+        """
+        changes = self.changes
+        self.changes = {}
+        return changes
+
+    def apply(self, plexe=None, exchange=None):
+        """
+        Forwards the changes since the last call to SUMO, by setting the
+        position of the changed members and adding them to the leader (or
+        removing the vehicles which left from the leader they were added
+        to), and to a BeaconExchange
+        :param plexe: API instance. If None, SUMO is not updated
+        :param exchange: BeaconExchange to be updated. If None, no exchange
+        is updated
+        """
+        leader = self.leader
+        for vid, (links, position) in self.pop_changes().items():
+            if links is None:
+                if exchange is not None:
+                    exchange.remove(vid)
+                previous = self.added.pop(vid, None)
+                if plexe is not None and previous is not None:
+                    plexe.remove_member(previous, vid)
+                continue
+            if exchange is not None:
+                exchange.update(vid, links.get("leader"), links.get("front"))
+            if plexe is not None:
+                plexe.set_vehicle_position(vid, position)
+                # a member whose leader changed (e.g., after a split) or
+                # which became the leader is removed from its former leader
+                previous = self.added.pop(vid, None)
+                if previous is not None and previous != leader:
+                    plexe.remove_member(previous, vid)
+                if vid != leader:
+                    plexe.add_member(leader, vid, position)
+                    self.added[vid] = leader
@@ -14,40 +14,90 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see http://www.gnu.org/licenses/.
 #
-from os import environ, listdir
-from os.path import join, splitext, dirname
-from importlib import import_module
+from contextlib import contextmanager
+from functools import lru_cache
+import asyncio
 import sys
-if 'SUMO_HOME' in environ:
-    tools = join(environ['SUMO_HOME'], 'tools')
-    sys.path.append(tools)
-else:
-    sys.exit("please declare environment variable 'SUMO_HOME'")
-import traci
-
-# available controllers
-DRIVER = 0
-ACC = 1
-CACC = 2
-FAKED_CACC = 3
-PLOEG = 4
-CONSENSUS = 5
-
-U = "u"
-ACCELERATION = "acceleration"
-SPEED = "speed"
-POS_X = "posx"
-POS_Y = "posy"
-TIME = "time"
-INDEX = "index"
-LENGTH = "length"
-GEAR = "gear"
-RPM = "rpm"
-RADAR_DISTANCE = "rd"
-RADAR_REL_SPEED = "rs"
-
-ENGINE_MODEL_FOLM = 0x00
-ENGINE_MODEL_REALISTIC = 0x01
+try:
+    import traci
+except ImportError:
+    raise ImportError("traci not found, please declare environment variable "
+                      "'SUMO_HOME'")
+from plexe.constants import DRIVER, ACC, CACC, FAKED_CACC, PLOEG, \
+    CONSENSUS, U, ACCELERATION, SPEED, POS_X, POS_Y, TIME, INDEX, LENGTH, \
+    GEAR, RPM, RADAR_DISTANCE, RADAR_REL_SPEED, ENGINE_MODEL_FOLM, \
+    ENGINE_MODEL_REALISTIC, BACKEND_TRACI, BACKEND_LIBSUMO
+from plexe import plexe_imp
+
+
+# methods which are forwarded unchanged to the implementation. They are
+# bound directly on each instance, so that calls reach the implementation
+# without going through the facade
+_FORWARDED = (
+    "reset_parameter_cache",
+    "set_cc_desired_speed", "set_active_controller", "set_fixed_lane",
+    "set_fixed_acceleration",
+    "get_crashed", "get_crashed_many", "get_radar_data", "get_radar_data_many",
+    "get_lanes_count", "get_lanes_count_many", "get_distance_to_end",
+    "get_distance_to_end_many", "get_distance_from_begin",
+    "get_distance_from_begin_many", "get_active_controller",
+    "get_active_controller_many", "get_acc_acceleration",
+    "get_acc_acceleration_many", "get_cacc_spacing", "get_cacc_spacing_many",
+    "get_stored_vehicle_data", "get_engine_data", "get_engine_data_many",
+    "set_vehicle_data", "set_leader_vehicle_data", "set_front_vehicle_data",
+    "set_vehicle_position", "set_platoon_size", "set_path_cacc_parameters",
+    "set_ploeg_cacc_parameters", "set_engine_tau", "set_engine_model",
+    "set_vehicle_model", "set_vehicles_file", "set_leader_vehicle_fake_data",
+    "set_front_vehicle_fake_data", "set_acc_headway_time",
+    "use_controller_acceleration", "use_prediction", "add_member",
+    "remove_member", "enable_auto_lane_changing",
+    "perform_platoon_lane_change",
+)
+
+
+# SUMO versions whose traci does not support parameterized subscriptions,
+# which are used for the per step snapshot (see Plexe.register_vehicle)
+NO_PARAMETER_SUBSCRIPTIONS = ("SUMO d1422e4780a", "SUMO 619df188ac3",
+                              "SUMO 1.0.1", "SUMO 1.1.0", "SUMO v1_1_0")
+
+
+# parse versions once per process: workers of a process pool create many
+# short lived instances
+@lru_cache(maxsize=None)
+def _parse_version(version):
+    """
+    Returns the Plexe version supported by a SUMO version
+    :param version: version string, as returned by traci.getVersion()
+    :return: version as a [major, minor, patch] list
+    """
+    if version in Plexe.versions:
+        return Plexe.versions[version]
+    for k, v in Plexe.versions.items():
+        if version.startswith(k):
+            return v
+    return Plexe.latest
+
+
+def _select_backend(backend):
+    """
+    Returns the module used to communicate with SUMO
+    :param backend: BACKEND_TRACI, BACKEND_LIBSUMO, or None to use libsumo
+    if the simulation has been started through it, and traci otherwise
+    :return: the traci or the libsumo module
+    """
+    if backend == BACKEND_TRACI:
+        return traci
+    if backend == BACKEND_LIBSUMO:
+        import libsumo
+        return libsumo
+    if backend is not None:
+        raise ValueError("unknown backend %s" % backend)
+    # libsumo can only be used if the user already imported it to start
+    # the simulation, so avoid loading it otherwise
+    libsumo = sys.modules.get("libsumo")
+    if libsumo is not None and libsumo.simulation.isLoaded():
+        return libsumo
+    return traci
 
 
 class Plexe(traci.StepListener):
@@ -61,48 +111,352 @@ class Plexe(traci.StepListener):
         'SUMO v1_1_0': [1, 1, 0]
     }
 
-    def __init__(self):
+    def __init__(self, cache_parameters=False, defer_writes=False,
+                 connection=None, label=None, backend=None, profile=False):
         """
         Constructor. Instantiates methods' implementation depending on SUMO
         version. SUMO must be already started when instantiating the class
+        :param cache_parameters: if true, keep a local copy of the parameters
+        written through the API. Writes which do not change a parameter are
+        not sent to SUMO, and parameters which can only be changed through
+        the API (e.g., the active controller) are read from the local copy.
+        The copy of a vehicle is dropped when the vehicle leaves the
+        simulation or when the simulation is reloaded, which is detected in
+        step(). Use reset_parameter_cache() if the instance is not added as
+        a step listener
+        :param defer_writes: if true, parameter writes are queued instead of
+        being sent immediately. Multiple writes of the same parameter to the
+        same vehicle are coalesced, keeping the last value, and the queue is
+        sent with a single TraCI message by flush(). Call flush() before
+        traci.simulationStep() for the writes to be applied in that step.
+        Writes still queued when step() is invoked are sent there, and are
+        applied from the following step
+        :param connection: traci connection object (e.g., returned by
+        traci.getConnection()) all the requests are sent to. This allows to
+        drive multiple SUMO instances from the same process, one Plexe
+        instance per connection, without calling traci.switch(). If None,
+        the requests are sent through the module-level traci functions, i.e.,
+        to the currently active connection
+        :param label: label of the traci connection to be used, as given to
+        traci.start(). Ignored if connection is specified
+        :param backend: BACKEND_TRACI to communicate with SUMO through the
+        TraCI socket, or BACKEND_LIBSUMO to run SUMO in-process through
+        libsumo, using the same parameter protocol. If None, libsumo is
+        used if it has been imported and a simulation has been loaded
+        through it, traci otherwise. Ignored if connection or label are
+        specified. Notice that libsumo does not invoke step listeners, so
+        step() must be called after each libsumo.simulationStep()
+        :param profile: if true, record counts, bytes, and latencies of the
+        parameter requests, per parameter and per API method (see stats()
+        and plexe.profiler)
         """
         self.plexe = None
-        api, version = traci.getVersion()
-        if version in self.versions:
-            self.version = self.versions[version]
-        else:
-            self.version = self.latest
-            for k, v in self.versions.items():
-                if version.startswith(k):
-                    self.version = self.versions[k]
-                    break
-
-        files = listdir(join(dirname(__file__), "plexe_imp"))
-        default_impl = None
-        for f in files:
-            name, ext = splitext(f)
-            if ext == ".py":
-                mod = import_module(".{}".format(name), "plexe.plexe_imp")
-                try:
-                    instance = mod.PlexeImp()
-                except AttributeError:
-                    continue
-                versions = instance.register()
-                for v in versions:
-                    if version.startswith(v):
-                        self.plexe = instance
-                        break
-                if 'default' in versions:
-                    default_impl = instance
-        if self.plexe is None:
-            self.plexe = default_impl
-        if self.plexe is None:
-            print("No Plexe API implementation found for %s" % version)
-            raise Exception()
+        if connection is None:
+            if label is not None:
+                connection = traci.getConnection(label)
+            else:
+                connection = _select_backend(backend)
+        self.connection = connection
+        api, version = self.connection.getVersion()
+        self.version = _parse_version(version)
+        self.snapshot_supported = \
+            not version.startswith(NO_PARAMETER_SUBSCRIPTIONS)
+        self.plexe = plexe_imp.resolve(version)(self.connection)
+        self.plexe.cache_parameters = cache_parameters
+        self.plexe.defer_writes = defer_writes
+        self.profiler = None
+        if profile:
+            from plexe.profiler import Profiler
+            self.profiler = Profiler(self.plexe)
+        cls = type(self)
+        for name in _FORWARDED:
+            # methods overridden by subclasses are kept
+            if getattr(cls, name) is getattr(Plexe, name):
+                setattr(self, name, getattr(self.plexe, name))
+        # vehicles whose data is collected at every simulation step, mapped
+        # to the number of times they have been registered
+        self.registered = {}
+        # per step snapshot of registered vehicles' data and lanes
+        self.snapshot = {}
+        self.lanes = {}
+        # pipeline collecting the asynchronous requests of the current
+        # event loop iteration, with their futures
+        self._async_pipeline = None
 
     def step(self, step):
+        """
+        Invoked by traci after each simulation step. Fills the snapshot of
+        the registered vehicles with the data received through TraCI
+        subscriptions, so that getters for these vehicles do not require
+        further requests to SUMO until the next step
+        """
+        self.plexe.flush()
+        self.plexe.update_parameter_cache()
+        data = self.plexe.get_subscription_data(self.registered)
+        # vehicles that left the simulation are automatically unsubscribed
+        for vid in self.snapshot:
+            if vid not in data:
+                self.registered.pop(vid, None)
+        self.snapshot = {vid: d[0] for vid, d in data.items()}
+        self.lanes = {vid: d[1] for vid, d in data.items()}
         return True
 
+    def register_vehicle(self, vid):
+        """
+        Registers a vehicle for the per step snapshot. Its data is received
+        through a TraCI subscription at every simulation step, and
+        get_vehicle_data, get_vehicles_data, and get_lane_index read it from
+        the snapshot without querying SUMO. The data is available starting
+        from the next simulation step. Notice that the subscription replaces
+        any other vehicle subscription made on the same vehicle through traci.
+        Registrations are counted, so that several users (e.g., step
+        listeners) can register the same vehicle: the vehicle stays in the
+        snapshot until each of them unregisters it, or until it leaves the
+        simulation
+        :param vid: vehicle id
+        :raises NotImplementedError: if the SUMO version does not support
+        parameterized subscriptions (SUMO 1.1.0 and earlier)
+        """
+        if not self.snapshot_supported:
+            raise NotImplementedError("the per step snapshot is not "
+                                      "supported by SUMO %d.%d.%d" %
+                                      tuple(self.version))
+        count = self.registered.get(vid, 0)
+        if count == 0:
+            self.plexe.subscribe_vehicle(vid)
+        self.registered[vid] = count + 1
+
+    def unregister_vehicle(self, vid):
+        """
+        Drops a registration of a vehicle for the per step snapshot, removing
+        the vehicle from the snapshot when no registration is left
+        :param vid: vehicle id
+        """
+        count = self.registered.get(vid, 0)
+        if count > 1:
+            self.registered[vid] = count - 1
+            return
+        if count == 0:
+            return
+        del self.registered[vid]
+        self.snapshot.pop(vid, None)
+        self.lanes.pop(vid, None)
+        self.plexe.unsubscribe_vehicle(vid)
+
+    def split_registered(self, vids):
+        """
+        Splits a set of vehicles registered for the snapshot into the ones
+        whose data is available in the current step and the ones which left
+        the simulation, which step() unregisters automatically. Vehicles in
+        neither list did not enter the simulation yet. Step listeners
+        tracking registered vehicles use this to skip the former and forget
+        the latter, and must therefore be added after the Plexe instance, so
+        that they run after the snapshot has been updated
+        :param vids: iterable of vehicle ids passed to register_vehicle()
+        :return: a (present, left) tuple of lists of vehicle ids
+        """
+        present = []
+        left = []
+        for vid in vids:
+            if vid in self.snapshot:
+                present.append(vid)
+            elif vid not in self.registered:
+                left.append(vid)
+        return present, left
+
+    def flush(self):
+        """
+        Sends all the writes queued when deferring writes (see defer_writes
+        in the constructor) with a single TraCI message
+        """
+        self.plexe.flush()
+
+    def stats(self):
+        """
+        Returns the data recorded when profiling (see profile in the
+        constructor)
+        :return: a dictionary mapping "parameters" to the counters of each
+        parameter (e.g., "get ccrd"), and "methods" to the counters of each
+        API method, or None if profiling is disabled. See
+        plexe.profiler.Profiler.stats
+        """
+        if self.profiler is None:
+            return None
+        return self.profiler.stats()
+
+    def reset_stats(self):
+        """
+        Drops the data recorded when profiling
+        """
+        if self.profiler is not None:
+            self.profiler.reset()
+
+    @contextmanager
+    def batch_writes(self):
+        """
+        Context manager which queues all the writes performed inside the
+        block and sends them with a single TraCI message when leaving it.
+        Multiple writes of the same parameter are coalesced as when deferring
+        writes. If writes are already deferred, they stay in the queue
+        """
+        deferred = self.plexe.defer_writes
+        self.plexe.defer_writes = True
+        try:
+            yield
+        finally:
+            self.plexe.defer_writes = deferred
+            if not deferred:
+                self.plexe.flush()
+
+    @contextmanager
+    def pipeline(self):
+        """
+        Context manager which pipelines the requests performed inside the
+        block. The block gets a plexe.pipeline.Pipeline object, whose getters
+        return PendingResult objects instead of values. Writes performed
+        through this instance inside the block are queued. When leaving the
+        block, the writes and then the get requests are sent with a single
+        TraCI message, and the pending results are resolved, e.g.,
+            with plexe.pipeline() as p:
+                radar = p.get_radar_data("v.1")
+                plexe.set_fixed_acceleration("v.0", True, -6)
+            print(radar.result().distance)
+        If the block raises an exception, the queued get requests are not
+        sent, while the writes are sent as for batch_writes()
+        """
+        from plexe.pipeline import Pipeline
+        pipeline = Pipeline(self)
+        deferred = self.plexe.defer_writes
+        self.plexe.defer_writes = True
+        try:
+            yield pipeline
+        except BaseException:
+            self.plexe.defer_writes = deferred
+            if not deferred:
+                self.plexe.flush()
+            raise
+        self.plexe.defer_writes = deferred
+        pipeline.execute()
+
+    def _aget(self, getter, *args):
+        """
+        Queues a get request in the pipeline of the current event loop
+        iteration, which is executed once all the tasks ready to run have
+        issued their requests
+        :param getter: name of the Pipeline getter
+        :param args: arguments of the getter
+        :return: an asyncio future resolved with the value
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_pipeline is None:
+            from plexe.pipeline import Pipeline
+            self._async_pipeline = (Pipeline(self), [])
+            loop.call_soon(self._execute_async_pipeline)
+        pipeline, futures = self._async_pipeline
+        pending = getattr(pipeline, getter)(*args)
+        future = loop.create_future()
+        futures.append((pending, future))
+        return future
+
+    def _execute_async_pipeline(self):
+        pipeline, futures = self._async_pipeline
+        self._async_pipeline = None
+        if len(pipeline) > 0:
+            try:
+                pipeline.execute()
+            except Exception:
+                # the error is reported through the futures
+                pass
+        for pending, future in futures:
+            if future.cancelled():
+                continue
+            try:
+                future.set_result(pending.result())
+            except Exception as e:
+                future.set_exception(e)
+
+    async def aget_vehicle_data(self, vid):
+        """
+        Asynchronous version of get_vehicle_data. The requests issued by all
+        the tasks within the same event loop iteration, e.g., through
+        asyncio.gather(), are sent together with the deferred writes using a
+        single TraCI message. See pipeline()
+        :param vid: vehicle id
+        :return: a VehicleData object
+        """
+        return await self._aget("get_vehicle_data", vid)
+
+    async def aget_crashed(self, vid):
+        """
+        Asynchronous version of get_crashed. See aget_vehicle_data
+        """
+        return await self._aget("get_crashed", vid)
+
+    async def aget_radar_data(self, vid):
+        """
+        Asynchronous version of get_radar_data. See aget_vehicle_data
+        """
+        return await self._aget("get_radar_data", vid)
+
+    async def aget_lanes_count(self, vid):
+        """
+        Asynchronous version of get_lanes_count. See aget_vehicle_data
+        """
+        return await self._aget("get_lanes_count", vid)
+
+    async def aget_distance_to_end(self, vid):
+        """
+        Asynchronous version of get_distance_to_end. See aget_vehicle_data
+        """
+        return await self._aget("get_distance_to_end", vid)
+
+    async def aget_distance_from_begin(self, vid):
+        """
+        Asynchronous version of get_distance_from_begin. See
+        aget_vehicle_data
+        """
+        return await self._aget("get_distance_from_begin", vid)
+
+    async def aget_active_controller(self, vid):
+        """
+        Asynchronous version of get_active_controller. See aget_vehicle_data
+        """
+        return await self._aget("get_active_controller", vid)
+
+    async def aget_acc_acceleration(self, vid):
+        """
+        Asynchronous version of get_acc_acceleration. See aget_vehicle_data
+        """
+        return await self._aget("get_acc_acceleration", vid)
+
+    async def aget_cacc_spacing(self, vid):
+        """
+        Asynchronous version of get_cacc_spacing. See aget_vehicle_data
+        """
+        return await self._aget("get_cacc_spacing", vid)
+
+    async def aget_stored_vehicle_data(self, vid, other_vid):
+        """
+        Asynchronous version of get_stored_vehicle_data. See
+        aget_vehicle_data
+        """
+        return await self._aget("get_stored_vehicle_data", vid, other_vid)
+
+    async def aget_engine_data(self, vid):
+        """
+        Asynchronous version of get_engine_data. See aget_vehicle_data
+        """
+        return await self._aget("get_engine_data", vid)
+
+    def reset_parameter_cache(self, vid=None):
+        """
+        Drops the local copy of the parameters written through the API,
+        forcing the next writes to be sent to SUMO. See cache_parameters in
+        the constructor
+        :param vid: vehicle id. If None, the copy of all vehicles is dropped
+        """
+        self.plexe.reset_parameter_cache(vid)
+
     def set_cc_desired_speed(self, vid, speed):
         """
         Sets the cruise control desired speed
@@ -147,8 +501,36 @@ class Plexe(traci.StepListener):
         :param vid: vehicle id
         :return: a VehicleData object
         """
+        data = self.snapshot.get(vid)
+        if data is not None:
+            return data
         return self.plexe.get_vehicle_data(vid)
 
+    def get_vehicles_data(self, vids):
+        """
+        Returns vehicle dynamics data of a set of automated vehicles. All
+        values are fetched using a single request to SUMO
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to a VehicleData object
+        """
+        missing = [vid for vid in vids if vid not in self.snapshot]
+        if len(missing) == 0:
+            return {vid: self.snapshot[vid] for vid in vids}
+        data = self.plexe.get_vehicles_data(missing)
+        return {vid: self.snapshot[vid] if vid in self.snapshot else data[vid]
+                for vid in vids}
+
+    def get_lane_index(self, vid):
+        """
+        Returns the index of the lane the vehicle is traveling on
+        :param vid: vehicle id
+        :return: lane index (0-based)
+        """
+        lane = self.lanes.get(vid)
+        if lane is not None:
+            return lane
+        return self.plexe.get_lane_index(vid)
+
     def get_crashed(self, vid):
         """
         Returns whether an automated vehicle crashed or not
@@ -157,17 +539,35 @@ class Plexe(traci.StepListener):
         """
         return self.plexe.get_crashed(vid)
 
+    def get_crashed_many(self, vids):
+        """
+        Returns whether a set of automated vehicles crashed or not
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to True if crashed,
+        False otherwise
+        """
+        return self.plexe.get_crashed_many(vids)
+
     def get_radar_data(self, vid):
         """
         Returns data measured by radar, i.e., distance and relative speed to
         the front vehicle. If there is no front vehicle or it is too far (
         more than 250 meters) then the returned distance is set to -1
         :param vid: vehicle id
-        :return: a dictionary including plexe.RADAR_DISTANCE and
-        plexe.RADAR_REL_SPEED keys
+        :return: a RadarData object, whose fields can also be accessed with
+        the plexe.RADAR_DISTANCE and plexe.RADAR_REL_SPEED keys
         """
         return self.plexe.get_radar_data(vid)
 
+    def get_radar_data_many(self, vids):
+        """
+        Returns data measured by the radar of a set of vehicles. See
+        get_radar_data
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to a RadarData object
+        """
+        return self.plexe.get_radar_data_many(vids)
+
     def get_lanes_count(self, vid):
         """
         Returns the number of lanes of the road the vehicle is currently
@@ -177,6 +577,15 @@ class Plexe(traci.StepListener):
         """
         return self.plexe.get_lanes_count(vid)
 
+    def get_lanes_count_many(self, vids):
+        """
+        Returns the number of lanes of the roads a set of vehicles are
+        currently traveling on
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to the number of lanes
+        """
+        return self.plexe.get_lanes_count_many(vids)
+
     def get_distance_to_end(self, vid):
         """
         Returns the distance to the end of the route
@@ -185,6 +594,15 @@ class Plexe(traci.StepListener):
         """
         return self.plexe.get_distance_to_end(vid)
 
+    def get_distance_to_end_many(self, vids):
+        """
+        Returns the distance to the end of the route for a set of vehicles
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to the distance to
+        route end in meters
+        """
+        return self.plexe.get_distance_to_end_many(vids)
+
     def get_distance_from_begin(self, vid):
         """
         Returns the distance from the beginning of the route
@@ -193,6 +611,16 @@ class Plexe(traci.StepListener):
         """
         return self.plexe.get_distance_from_begin(vid)
 
+    def get_distance_from_begin_many(self, vids):
+        """
+        Returns the distance from the beginning of the route for a set of
+        vehicles
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to the distance from
+        route beginning in meters
+        """
+        return self.plexe.get_distance_from_begin_many(vids)
+
     def get_active_controller(self, vid):
         """
         Returns the active car controller
@@ -202,6 +630,14 @@ class Plexe(traci.StepListener):
         """
         return self.plexe.get_active_controller(vid)
 
+    def get_active_controller_many(self, vids):
+        """
+        Returns the active car controller of a set of vehicles
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to its active controller
+        """
+        return self.plexe.get_active_controller_many(vids)
+
     def get_acc_acceleration(self, vid):
         """
         Returns the acceleration computed by the ACC, which is computed even
@@ -211,6 +647,15 @@ class Plexe(traci.StepListener):
         """
         return self.plexe.get_acc_acceleration(vid)
 
+    def get_acc_acceleration_many(self, vids):
+        """
+        Returns the acceleration computed by the ACC of a set of vehicles
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to the computed ACC
+        acceleration in m/s^2
+        """
+        return self.plexe.get_acc_acceleration_many(vids)
+
     def get_cacc_spacing(self, vid):
         """
         Returns the fixed spacing for the PATH CACC controller
@@ -219,6 +664,14 @@ class Plexe(traci.StepListener):
         """
         return self.plexe.get_cacc_spacing(vid)
 
+    def get_cacc_spacing_many(self, vids):
+        """
+        Returns the fixed spacing for the PATH CACC of a set of vehicles
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to the spacing in meters
+        """
+        return self.plexe.get_cacc_spacing_many(vids)
+
     def get_stored_vehicle_data(self, vid, other_vid):
         """
         Returns the data stored by this vehicle about another vehicle
@@ -235,12 +688,20 @@ class Plexe(traci.StepListener):
         If the vehicle is using the realistic engine model, this method
         returns the current gear and the engine RPM
         :param vid: vehicle id
-        :return: a dictionary including the plexe.GEAR and plexe.RPM keys. If
-        the vehicle is not using the realistic engine model, the gear is set
-        to -1
+        :return: an EngineData object, whose fields can also be accessed with
+        the plexe.GEAR and plexe.RPM keys. If the vehicle is not using the
+        realistic engine model, the gear is set to -1
         """
         return self.plexe.get_engine_data(vid)
 
+    def get_engine_data_many(self, vids):
+        """
+        Returns gear and engine RPM of a set of vehicles. See get_engine_data
+        :param vids: list of vehicle ids
+        :return: a dictionary mapping each vehicle id to an EngineData object
+        """
+        return self.plexe.get_engine_data_many(vids)
+
     def set_vehicle_data(self, vid, vehicle_data):
         """
         Sets information about a vehicle in the platoon. This is currently
@@ -1 +1,131 @@
-from plexe.plexe_imp import ccparams, plexe_sumo_eclipse
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Registry of the Plexe API implementations. Each implementation is a class
+taking the traci connection as constructor argument, registered for a set
+of SUMO version prefixes, as returned by traci.getVersion(). Modules are
+only imported when their implementation is selected.
+
+Other packages can provide implementations through the
+"plexe.implementations" entry point group. The name of each entry point
+is the SUMO version prefix, and its value the implementation class, e.g.,
+
+    [project.entry-points."plexe.implementations"]
+    "SUMO 1.20" = "mypackage.imp:PlexeImp"
+
+Implementations registered later, and the ones provided through entry
+points, take precedence over the built-in ones.
+
+The simplest way to write an implementation is to subclass the built-in
+one (plexe.plexe_imp.plexe_sumo_eclipse.PlexeImp), which provides all the
+methods below, and to override the ones that differ. Otherwise, besides
+every public method of the Plexe facade forwarded to it (see _FORWARDED in
+plexe.plexe, including the *_many getters, which return a dictionary
+mapping vehicle ids to values), an implementation must provide:
+
+- traci: the connection it has been built with
+- cache_parameters, defer_writes: flags set by the facade after
+  construction
+- pending: the writes queued when deferring writes (the profiler only
+  checks whether it is empty)
+- flush(vids=None): sends the queued writes, only the ones to vids if
+  given. The facade flushes all of them at every step
+- update_parameter_cache(): invoked by the facade at every step, after
+  the flush and before the snapshot is filled
+- subscribe_vehicle(vid), unsubscribe_vehicle(vid),
+  get_subscription_data(vids): the subscriptions used by the per step
+  snapshot, the latter returning (vehicle data, lane index) tuples per
+  vehicle id, omitting the vehicles no longer in the simulation
+- get_vehicle_data(vid), get_vehicles_data(vids), get_lane_index(vid)
+- execute_pipeline(gets): sends the queued writes and a list of (vid,
+  par, args) get requests, returning the list of unpacked values
+- _get_cached_par(vid, par, args): the mirrored value of a parameter, or
+  None if it is not known
+- _set_par(vid, par, value), _get_par(vid, par, *args),
+  _get_par_many(vids, par, *args): the parameter requests, which are
+  wrapped by the profiler and by the tracer
+"""
+from functools import lru_cache
+from importlib import import_module
+
+ENTRY_POINT_GROUP = "plexe.implementations"
+# version used when no registered prefix matches the SUMO version
+DEFAULT = "default"
+
+# (version prefixes, "module:class" or class) tuples, by decreasing priority
+_registry = [
+    ((DEFAULT, "SUMO d1422e4780a", "SUMO 619df188ac3", "SUMO 1.0.1",
+      "SUMO 1.1.0", "SUMO v1_1_0"),
+     "plexe.plexe_imp.plexe_sumo_eclipse:PlexeImp"),
+]
+
+
+def register(versions, implementation):
+    """
+    Registers an implementation
+    :param versions: list of SUMO version prefixes the implementation
+    supports. Include DEFAULT to use it when no other prefix matches
+    :param implementation: implementation class, or "module:class" string
+    for the class to be imported only when selected
+    """
+    _registry.insert(0, (tuple(versions), implementation))
+    resolve.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _entry_points():
+    """
+    Returns the implementations provided through entry points
+    :return: a list of (version prefixes, entry point) tuples
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        group = eps.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = eps.get(ENTRY_POINT_GROUP, [])
+    return [((ep.name,), ep) for ep in group]
+
+
+def _load(implementation):
+    if isinstance(implementation, str):
+        module, name = implementation.split(":")
+        return getattr(import_module(module), name)
+    if hasattr(implementation, "load"):
+        return implementation.load()
+    return implementation
+
+
+@lru_cache(maxsize=None)
+def resolve(version):
+    """
+    Returns the implementation for a SUMO version
+    :param version: version string, as returned by traci.getVersion()
+    :return: the implementation class
+    """
+    candidates = _entry_points() + _registry
+    for versions, implementation in candidates:
+        for v in versions:
+            if version.startswith(v):
+                return _load(implementation)
+    for versions, implementation in candidates:
+        if DEFAULT in versions:
+            return _load(implementation)
+    raise LookupError("No Plexe API implementation found for %s" % version)
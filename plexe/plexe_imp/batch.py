@@ -0,0 +1,166 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Batched vehicle parameter requests. TraCI allows a client to put several
+commands inside a single message: the server answers each of them, in
+order, within a single response. The functions in this module use this to
+send many getParameter/setParameter commands with a single round trip.
+
+The standard traci client always sends one command per message, so the
+message is assembled here and sent on the socket of the traci connection
+the implementation has been built with. This relies on internals of the
+traci Connection class (_socket and _recvExact), which are only used for
+the client versions listed in RAW_TRACI_VERSIONS. If the connection has a
+lock (_lock), it is held while the message is sent and the response read.
+Backends without a socket (e.g., libsumo, or the stand-in simulation) and
+other client versions perform the requests one by one through the standard
+API.
+"""
+import contextlib
+import struct
+import traci
+from traci import constants as tc
+
+# versions of the traci client (traci.constants.TRACI_VERSION) whose
+# Connection internals are known to match the ones used here
+RAW_TRACI_VERSIONS = range(17, 23)
+
+
+def _active_connection(traci_module):
+    """
+    Returns the connection currently used by the module-level traci
+    functions, i.e., the one selected by traci.start() or traci.switch()
+    """
+    if hasattr(traci_module, "getLabel"):
+        return traci_module.getConnection(traci_module.getLabel())
+    # older clients store the active connection with an empty label
+    connection = getattr(traci_module, "_connections", {}).get("")
+    if connection is None:
+        raise traci.FatalTraCIError("Not connected.")
+    return connection
+
+
+def get_connection(traci_module):
+    """
+    Returns the socket connection object used by a traci module or
+    connection, if batched messages can be sent on it
+    :param traci_module: the traci module, a traci connection object, or
+    another backend (e.g., libsumo)
+    :return: the connection object, or None if requests must be performed
+    one by one
+    :raises traci.FatalTraCIError: if traci_module is the traci module and
+    no connection is active (traci.TraCIException for newer clients)
+    """
+    if getattr(traci_module, "__name__", None) == "traci":
+        connection = _active_connection(traci_module)
+    elif hasattr(traci_module, "_recvExact"):
+        connection = traci_module
+    else:
+        return None
+    if getattr(tc, "TRACI_VERSION", None) not in RAW_TRACI_VERSIONS or \
+            not hasattr(connection, "_socket") or \
+            not hasattr(connection, "_recvExact"):
+        return None
+    return connection
+
+
+def _pack_string(value):
+    value = value.encode("utf8")
+    return struct.pack("!Bi", tc.TYPE_STRING, len(value)) + value
+
+
+def _pack_command(cmd_id, var_id, vid, payload):
+    vid = vid.encode("utf8")
+    content = struct.pack("!BBi", cmd_id, var_id, len(vid)) + vid + payload
+    length = len(content) + 1
+    if length <= 255:
+        return struct.pack("!B", length) + content
+    return struct.pack("!Bi", 0, length + 4) + content
+
+
+def _skip_length(result):
+    """
+    Skips the length of a command in a response, which is a single byte or,
+    for long commands, a zero byte followed by a 4 bytes integer
+    """
+    if result.read("!B")[0] == 0:
+        result.read("!i")
+
+
+def execute(traci_module, requests):
+    """
+    Performs a set of vehicle parameter requests
+    :param traci_module: the traci module or the connection to be used
+    :param requests: list of (vid, key, value) tuples. If value is None the
+    request is a getParameter, otherwise it is a setParameter
+    :return: a list with one entry per request: the parameter value (string)
+    for get requests, None for set requests
+    """
+    if len(requests) == 0:
+        return []
+    connection = get_connection(traci_module)
+    if connection is None or len(requests) == 1:
+        return [traci_module.vehicle.getParameter(vid, key)
+                if value is None else
+                traci_module.vehicle.setParameter(vid, key, value)
+                for vid, key, value in requests]
+
+    message = []
+    for vid, key, value in requests:
+        if value is None:
+            message.append(_pack_command(tc.CMD_GET_VEHICLE_VARIABLE,
+                                         tc.VAR_PARAMETER, vid,
+                                         _pack_string(key)))
+        else:
+            message.append(_pack_command(tc.CMD_SET_VEHICLE_VARIABLE,
+                                         tc.VAR_PARAMETER, vid,
+                                         struct.pack("!Bi",
+                                                     tc.TYPE_COMPOUND, 2) +
+                                         _pack_string(key) +
+                                         _pack_string(str(value))))
+    message = b"".join(message)
+    lock = getattr(connection, "_lock", None)
+    with lock if lock is not None else contextlib.nullcontext():
+        connection._socket.send(struct.pack("!i", len(message) + 4) +
+                                message)
+        result = connection._recvExact()
+
+    # the server answers each command with a status response, followed by
+    # the value in case of a successful get. parse the whole response even
+    # after an error, so that the connection stays in a consistent state
+    values = []
+    error = None
+    for vid, key, value in requests:
+        _skip_length(result)
+        command, status = result.read("!BB")
+        description = result.readString()
+        if status != tc.RTYPE_OK or description:
+            if error is None:
+                error = traci.TraCIException(description, command, status)
+            values.append(None)
+            continue
+        if value is not None:
+            values.append(None)
+            continue
+        _skip_length(result)
+        result.read("!BB")
+        result.readString()
+        result.read("!B")
+        values.append(result.readString())
+    if error is not None:
+        raise error
+    return values
@@ -73,54 +73,135 @@ PAR_REMOVE_MEMBER = "ccrm"
 PAR_ENABLE_AUTO_LANE_CHANGE = "ccalc"
 PAR_PLATOON_FIXED_LANE = "ccpfl"
 
+# prefix of the parameters handled by the Plexe car following models
+PREFIX = "carFollowModel."
+
+# full parameter key of each parameter, e.g., "carFollowModel.ccsa"
+KEYS = {value: PREFIX + value for name, value in list(globals().items())
+        if name.startswith(("PAR_", "CC_PAR_"))}
+
+# types of the values returned by SUMO for each parameter that can be read.
+# used by unpack() to convert the values without guessing their type
+SCHEMAS = {
+    CC_PAR_VEHICLE_DATA: (int, float, float, float, float, float, float,
+                          float),
+    PAR_CACC_SPACING: (float,),
+    PAR_ACC_ACCELERATION: (float,),
+    PAR_CRASHED: (int,),
+    PAR_SPEED_AND_ACCELERATION: (float, float, float, float, float, float),
+    PAR_LANES_COUNT: (int,),
+    PAR_ACTIVE_CONTROLLER: (int,),
+    PAR_RADAR_DATA: (float, float),
+    PAR_DISTANCE_TO_END: (float,),
+    PAR_DISTANCE_FROM_BEGIN: (float,),
+    PAR_ENGINE_DATA: (int, float),
+}
+
+# parameters which are only changed through the API, so the value read from
+# SUMO is always the last one written
+OWNED = frozenset([PAR_ACTIVE_CONTROLLER, PAR_CACC_SPACING])
+
+# parameters which act as commands or whose value includes a key, so every
+# write must be delivered even if it repeats or is followed by another one
+COMMANDS = frozenset([CC_PAR_VEHICLE_DATA, PAR_ADD_MEMBER, PAR_REMOVE_MEMBER])
+
+# parameters mapped to the parameters they reset in SUMO when written, whose
+# mirrored values are therefore no longer valid
+RESETS = {
+    PAR_ENABLE_AUTO_LANE_CHANGE: (PAR_PLATOON_FIXED_LANE,),
+}
+
 
 SEP = ':'
 ESC = '\\'
 QUO = '"'
 
 
+def _escape(value):
+    if ESC in value:
+        value = value.replace(ESC, ESC + ESC)
+    if SEP in value:
+        value = value.replace(SEP, ESC + SEP)
+    if value == "" or (value[0] == QUO and value[-1] == QUO):
+        value = QUO + value + QUO
+    return value
+
+
 def pack(*args):
-    a = []
-    for arg in args:
-        esc = str(arg).replace(ESC, ESC + ESC)
-        esc = esc.replace(SEP, ESC + SEP)
-        if esc == "" or (esc[0] == QUO and esc[-1] == QUO):
-            esc = QUO + esc + QUO
-        a.append(esc)
-    return SEP.join(a)
-
-
-def _next(string):
-    sep = -1
-    while True:
-        sep = string.find(SEP, sep + 1)
-        if sep == -1 or sep == 0 or string[(sep-1):sep] != ESC:
-            break
-
-    if sep == -1:
-        next_string = string
-        string = ""
+    return SEP.join([_escape(str(arg)) for arg in args])
+
+
+def _split(string):
+    """
+    Splits a packed string into its (unescaped) fields in a single pass
+    :param string: packed string
+    :return: list of fields
+    """
+    if ESC not in string:
+        fields = string.split(SEP)
     else:
-        next_string = string[0:sep]
-        string = string[(sep+1):]
-    return next_string, string
-
-
-def unpack(string):
-    ret = list()
-    while True:
-        value, string = _next(string)
-        if value == "" and string == "":
-            break
-        value = value.replace(ESC + ESC, ESC)
-        value = value.replace(ESC + SEP, SEP)
-        if value[0] == QUO and value[-1] == QUO:
-            value = value[1:-1]
+        fields = []
+        field = []
+        start = 0
+        i = string.find(ESC)
+        while i != -1:
+            sep = string.find(SEP, start, i)
+            while sep != -1:
+                field.append(string[start:sep])
+                fields.append("".join(field))
+                field = []
+                start = sep + 1
+                sep = string.find(SEP, start, i)
+            # keep the escaped character and skip the escape
+            field.append(string[start:i])
+            field.append(string[i + 1:i + 2])
+            start = i + 2
+            i = string.find(ESC, start)
+        sep = string.find(SEP, start)
+        while sep != -1:
+            field.append(string[start:sep])
+            fields.append("".join(field))
+            field = []
+            start = sep + 1
+            sep = string.find(SEP, start)
+        field.append(string[start:])
+        fields.append("".join(field))
+    # a trailing separator does not start a new field
+    if fields[-1] == "":
+        fields.pop()
+    return fields
+
+
+def _convert(value):
+    try:
+        return int(value)
+    except ValueError:
         try:
-            ret.append(int(value))
+            return float(value)
         except ValueError:
+            return value
+
+
+def unpack(string, schema=None):
+    """
+    Unpacks a string returned by SUMO into the list of its values
+    :param string: packed string
+    :param schema: optional tuple of types, one for each value. The values
+    which are not covered by the schema are converted to int, float, or
+    string, whichever succeeds first
+    :return: list of values
+    """
+    if string == "":
+        return []
+    ret = _split(string)
+    for i, value in enumerate(ret):
+        if value[:1] == QUO and value[-1:] == QUO:
+            ret[i] = value = value[1:-1]
+        if schema is not None and i < len(schema):
             try:
-                ret.append(float(value))
+                ret[i] = schema[i](value)
+                continue
             except ValueError:
-                ret.append(value)
+                pass
+        ret[i] = _convert(value)
     return ret
@@ -14,11 +14,12 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see http://www.gnu.org/licenses/.
 #
+from itertools import count
 import traci
 from traci import constants as tc
-import plexe
 from plexe.plexe_imp import ccparams as cc
-from plexe.vehicle_data import VehicleData
+from plexe.plexe_imp import batch
+from plexe.vehicle_data import VehicleData, RadarData, EngineData
 
 # lane change modes
 DEFAULT_LC = 0b011001010101
@@ -26,38 +27,122 @@ DEFAULT_NOTRACI_LC = 0b1010101010
 FIX_LC = 0b1000000000
 FIX_LC_AGGRESSIVE = 0b0000000000
 
+# parameter subscribed to fill the per step vehicle data snapshot
+SUBSCRIBED_DATA = cc.KEYS[cc.PAR_SPEED_AND_ACCELERATION]
 
-class PlexeImp(plexe.Plexe):
+
+class PlexeImp:
     """
     Plexe post sumo integration
     """
 
-    def __init__(self):
-        self.__versions = [
-            'default',
-            'SUMO d1422e4780a',
-            'SUMO 619df188ac3',
-            'SUMO 1.0.1',
-            'SUMO 1.1.0',
-            'SUMO v1_1_0',
-        ]
+    def __init__(self, connection=None):
+        """
+        Constructor
+        :param connection: traci connection used to communicate with SUMO.
+        If None, the module-level traci functions are used
+        """
+        self.traci = traci if connection is None else connection
         self.lane_changes = {}
+        # mirror of the parameters written through the API, per vehicle
+        self.cache_parameters = False
+        self.parameters = {}
+        self.last_time = -1
+        # writes waiting to be sent when deferring writes
+        self.defer_writes = False
+        self.pending = {}
+        self.sequence = count()
+
+    def update_parameter_cache(self):
+        """
+        Drops the mirrored parameters of vehicles that left the simulation,
+        or of all vehicles if the simulation has been reloaded
+        """
+        if not self.cache_parameters:
+            return
+        time = self.traci.simulation.getTime()
+        if time < self.last_time:
+            self.parameters = {}
+        else:
+            for vid in self.traci.simulation.getArrivedIDList():
+                self.parameters.pop(vid, None)
+        self.last_time = time
 
-    def register(self):
-        return self.__versions
+    def reset_parameter_cache(self, vid=None):
+        """
+        Drops the mirrored parameters of a vehicle, or of all vehicles
+        :param vid: vehicle id. If None, the whole mirror is dropped
+        """
+        if vid is None:
+            self.parameters = {}
+        else:
+            self.parameters.pop(vid, None)
 
-    @staticmethod
-    def _set_par(vid, par, value):
+    def flush(self, vids=None):
+        """
+        Sends the deferred writes with a single TraCI message
+        :param vids: if specified, only the writes to these vehicles are sent
         """
-        Shorthand for the setParameter method
+        if len(self.pending) == 0:
+            return
+        if vids is None:
+            pending = self.pending
+            self.pending = {}
+        else:
+            pending = {k: v for k, v in self.pending.items() if k[0] in vids}
+            if len(pending) == 0:
+                return
+            for k in pending:
+                del self.pending[k]
+        batch.execute(self.traci, [(k[0], cc.KEYS[k[1]], value)
+                                   for k, value in pending.items()])
+
+    def _set_par(self, vid, par, value):
+        """
+        Shorthand for the setParameter method. When caching parameters,
+        the write is skipped if the value is the same as the last one
+        written, unless a parameter resetting it in SUMO (cc.RESETS) has been
+        written since. When deferring writes, the write is queued and
+        replaces any queued write of the same parameter to the same vehicle,
+        taking its position at the end of the queue
         :param vid: vehicle id
         :param par: parameter name
         :param value: numeric or string value for the parameter
         """
-        traci.vehicle.setParameter(vid, "carFollowModel.%s" % par, str(value))
-
-    @staticmethod
-    def _get_par(vid, par, *args):
+        value = str(value)
+        if self.cache_parameters and par not in cc.COMMANDS:
+            pars = self.parameters.setdefault(vid, {})
+            if pars.get(par) == value:
+                return
+            pars[par] = value
+            for reset in cc.RESETS.get(par, ()):
+                pars.pop(reset, None)
+        if self.defer_writes:
+            if par in cc.COMMANDS:
+                self.pending[(vid, par, next(self.sequence))] = value
+            else:
+                # the last write decides the order in which it is sent
+                self.pending.pop((vid, par), None)
+                self.pending[(vid, par)] = value
+            return
+        self.traci.vehicle.setParameter(vid, cc.KEYS[par], value)
+
+    def _get_cached_par(self, vid, par, args):
+        """
+        Returns the mirrored value of a parameter owned by the API, if known
+        :param vid: vehicle id
+        :param par: parameter name
+        :param args: arguments of the get request
+        :return: the unpacked value, or None if the value is not mirrored
+        """
+        if not self.cache_parameters or args or par not in cc.OWNED:
+            return None
+        value = self.parameters.get(vid, {}).get(par)
+        if value is None:
+            return None
+        return cc.unpack(value, cc.SCHEMAS.get(par))
+
+    def _get_par(self, vid, par, *args):
         """
         Shorthand for the getParameter method
         :param vid: vehicle id
@@ -65,12 +150,42 @@ class PlexeImp(plexe.Plexe):
         :param args: optional arguments
         :return: the required parameter value
         """
-        arguments = cc.pack(par, *args)
-        ret = traci.vehicle.getParameter(vid, "carFollowModel." + arguments)
-        return cc.unpack(ret)
-
-    @staticmethod
-    def _get_single_par(vid, par, *args):
+        ret = self._get_cached_par(vid, par, args)
+        if ret is not None:
+            return ret
+        if len(self.pending) > 0:
+            self.flush((vid,))
+        key = cc.PREFIX + cc.pack(par, *args) if args else cc.KEYS[par]
+        ret = self.traci.vehicle.getParameter(vid, key)
+        if self.cache_parameters and par in cc.OWNED and not args:
+            self.parameters.setdefault(vid, {})[par] = ret
+        return cc.unpack(ret, cc.SCHEMAS.get(par))
+
+    def execute_pipeline(self, gets):
+        """
+        Sends the deferred writes followed by a set of get requests with a
+        single TraCI message
+        :param gets: list of (vid, par, args) tuples, where args is the tuple
+        of optional arguments of the request
+        :return: a list with the unpacked value of each get request
+        """
+        pending = self.pending
+        self.pending = {}
+        requests = [(k[0], cc.KEYS[k[1]], value)
+                    for k, value in pending.items()]
+        writes = len(requests)
+        requests.extend((vid, cc.PREFIX + cc.pack(par, *args) if args
+                         else cc.KEYS[par], None)
+                        for vid, par, args in gets)
+        values = batch.execute(self.traci, requests)[writes:]
+        rets = []
+        for (vid, par, args), value in zip(gets, values):
+            if self.cache_parameters and par in cc.OWNED and not args:
+                self.parameters.setdefault(vid, {})[par] = value
+            rets.append(cc.unpack(value, cc.SCHEMAS.get(par)))
+        return rets
+
+    def _get_single_par(self, vid, par, *args):
         """
         Shorthand for getting the value of a parameter which has only a
         single return value
@@ -79,9 +194,69 @@ class PlexeImp(plexe.Plexe):
         :param args: optional arguments
         :return: the required parameter value
         """
-        ret = PlexeImp._get_par(vid, par, *args)
+        ret = self._get_par(vid, par, *args)
         return ret[0]
 
+    def _get_par_many(self, vids, par, *args):
+        """
+        Gets the same parameter from a set of vehicles with a single TraCI
+        message
+        :param vids: list of vehicle ids
+        :param par: parameter name
+        :param args: optional arguments
+        :return: a dictionary mapping each vehicle id to its parameter value
+        """
+        rets = {}
+        missing = []
+        for vid in vids:
+            ret = self._get_cached_par(vid, par, args)
+            if ret is None:
+                missing.append(vid)
+            else:
+                rets[vid] = ret
+        if len(missing) > 0:
+            if len(self.pending) > 0:
+                self.flush(set(missing))
+            key = cc.PREFIX + cc.pack(par, *args) if args else cc.KEYS[par]
+            values = batch.execute(self.traci, [(vid, key, None)
+                                                for vid in missing])
+            cache = self.cache_parameters and par in cc.OWNED and not args
+            schema = cc.SCHEMAS.get(par)
+            for vid, value in zip(missing, values):
+                if cache:
+                    self.parameters.setdefault(vid, {})[par] = value
+                rets[vid] = cc.unpack(value, schema)
+        return {vid: rets[vid] for vid in vids}
+
+    def _get_single_par_many(self, vids, par, *args):
+        """
+        Gets the same single valued parameter from a set of vehicles with a
+        single TraCI message
+        :param vids: list of vehicle ids
+        :param par: parameter name
+        :param args: optional arguments
+        :return: a dictionary mapping each vehicle id to its parameter value
+        """
+        rets = self._get_par_many(vids, par, *args)
+        return {vid: ret[0] for vid, ret in rets.items()}
+
+    @staticmethod
+    def _vehicle_data(ret):
+        return VehicleData(None, ret[2], ret[1], ret[0], ret[3], ret[4], ret[5])
+
+    @staticmethod
+    def _radar_data(ret):
+        return RadarData(ret[0], ret[1])
+
+    @staticmethod
+    def _engine_data(ret):
+        return EngineData(ret[0], ret[1])
+
+    @staticmethod
+    def _stored_vehicle_data(ret):
+        return VehicleData(ret[0], ret[7], ret[2], ret[1], ret[3], ret[4],
+                           ret[5], ret[6])
+
     def set_cc_desired_speed(self, vid, speed):
         self._set_par(vid, cc.PAR_CC_DESIRED_SPEED, speed)
 
@@ -90,9 +265,9 @@ class PlexeImp(plexe.Plexe):
 
     def set_fixed_lane(self, vid, lane, safe=True):
         if lane == -1:
-            traci.vehicle.setLaneChangeMode(vid, DEFAULT_LC)
+            self.traci.vehicle.setLaneChangeMode(vid, DEFAULT_LC)
         else:
-            traci.vehicle.setLaneChangeMode(vid, FIX_LC)
+            self.traci.vehicle.setLaneChangeMode(vid, FIX_LC)
             self.perform_platoon_lane_change(vid, lane)
 
     def set_fixed_acceleration(self, vid, activate, acceleration):
@@ -101,42 +276,99 @@ class PlexeImp(plexe.Plexe):
 
     def get_vehicle_data(self, vid):
         ret = self._get_par(vid, cc.PAR_SPEED_AND_ACCELERATION)
-        return VehicleData(None, ret[2], ret[1], ret[0], ret[3], ret[4], ret[5])
+        return self._vehicle_data(ret)
+
+    def get_vehicles_data(self, vids):
+        rets = self._get_par_many(vids, cc.PAR_SPEED_AND_ACCELERATION)
+        return {vid: self._vehicle_data(ret) for vid, ret in rets.items()}
+
+    def get_lane_index(self, vid):
+        return self.traci.vehicle.getLaneIndex(vid)
+
+    def subscribe_vehicle(self, vid):
+        self.traci.vehicle.subscribe(vid, (tc.VAR_PARAMETER,
+                                           tc.VAR_LANE_INDEX),
+                                     parameters={tc.VAR_PARAMETER:
+                                                 ("s", SUBSCRIBED_DATA)})
+
+    def unsubscribe_vehicle(self, vid):
+        self.traci.vehicle.unsubscribe(vid)
+
+    def get_subscription_data(self, vids):
+        results = self.traci.vehicle.getAllSubscriptionResults()
+        data = {}
+        for vid in vids:
+            res = results.get(vid)
+            if not res or tc.VAR_PARAMETER not in res:
+                continue
+            ret = cc.unpack(res[tc.VAR_PARAMETER],
+                            cc.SCHEMAS[cc.PAR_SPEED_AND_ACCELERATION])
+            data[vid] = (self._vehicle_data(ret), res.get(tc.VAR_LANE_INDEX))
+        return data
 
     def get_crashed(self, vid):
         ret = self._get_single_par(vid, cc.PAR_CRASHED)
         return True if ret == 1 else False
 
+    def get_crashed_many(self, vids):
+        rets = self._get_single_par_many(vids, cc.PAR_CRASHED)
+        return {vid: True if ret == 1 else False for vid, ret in rets.items()}
+
     def get_radar_data(self, vid):
         ret = self._get_par(vid, cc.PAR_RADAR_DATA)
-        return {plexe.RADAR_DISTANCE: ret[0], plexe.RADAR_REL_SPEED: ret[1]}
+        return self._radar_data(ret)
+
+    def get_radar_data_many(self, vids):
+        rets = self._get_par_many(vids, cc.PAR_RADAR_DATA)
+        return {vid: self._radar_data(ret) for vid, ret in rets.items()}
 
     def get_lanes_count(self, vid):
         return self._get_single_par(vid, cc.PAR_LANES_COUNT)
 
+    def get_lanes_count_many(self, vids):
+        return self._get_single_par_many(vids, cc.PAR_LANES_COUNT)
+
     def get_distance_to_end(self, vid):
         return self._get_single_par(vid, cc.PAR_DISTANCE_TO_END)
 
+    def get_distance_to_end_many(self, vids):
+        return self._get_single_par_many(vids, cc.PAR_DISTANCE_TO_END)
+
     def get_distance_from_begin(self, vid):
         return self._get_single_par(vid, cc.PAR_DISTANCE_FROM_BEGIN)
 
+    def get_distance_from_begin_many(self, vids):
+        return self._get_single_par_many(vids, cc.PAR_DISTANCE_FROM_BEGIN)
+
     def get_active_controller(self, vid):
         return self._get_single_par(vid, cc.PAR_ACTIVE_CONTROLLER)
 
+    def get_active_controller_many(self, vids):
+        return self._get_single_par_many(vids, cc.PAR_ACTIVE_CONTROLLER)
+
     def get_acc_acceleration(self, vid):
         return self._get_single_par(vid, cc.PAR_ACC_ACCELERATION)
 
+    def get_acc_acceleration_many(self, vids):
+        return self._get_single_par_many(vids, cc.PAR_ACC_ACCELERATION)
+
     def get_cacc_spacing(self, vid):
         return self._get_single_par(vid, cc.PAR_CACC_SPACING)
 
+    def get_cacc_spacing_many(self, vids):
+        return self._get_single_par_many(vids, cc.PAR_CACC_SPACING)
+
     def get_stored_vehicle_data(self, vid, other_vid):
         ret = self._get_par(vid, cc.CC_PAR_VEHICLE_DATA, other_vid)
-        return VehicleData(ret[0], ret[7], ret[2], ret[1], ret[3], ret[4],
-                           ret[5], ret[6])
+        return self._stored_vehicle_data(ret)
 
     def get_engine_data(self, vid):
         ret = self._get_par(vid, cc.PAR_ENGINE_DATA)
-        return {plexe.GEAR: ret[0], plexe.RPM: ret[1]}
+        return self._engine_data(ret)
+
+    def get_engine_data_many(self, vids):
+        rets = self._get_par_many(vids, cc.PAR_ENGINE_DATA)
+        return {vid: self._engine_data(ret) for vid, ret in rets.items()}
 
     def set_vehicle_data(self, vid, vehicle_data):
         self._set_par(vid, cc.CC_PAR_VEHICLE_DATA,
@@ -227,7 +459,7 @@ class PlexeImp(plexe.Plexe):
         self._set_par(vid, cc.PAR_ADD_MEMBER, cc.pack(member_id, position))
 
     def remove_member(self, vid, member_id):
-        self._set_par(vid, cc.PAR_ADD_MEMBER, member_id)
+        self._set_par(vid, cc.PAR_REMOVE_MEMBER, member_id)
 
     def enable_auto_lane_changing(self, vid, enable):
         self._set_par(vid, cc.PAR_ENABLE_AUTO_LANE_CHANGE, 1 if enable else 0)
@@ -0,0 +1,280 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Per parameter profiling of the requests performed by a Plexe API
+implementation. The profiler replaces the _set_par, _get_par, and
+_get_par_many methods of an implementation instance with wrappers
+recording, for each call, the parameter, the API method which performed the
+call, the latency, and the number of bytes exchanged with SUMO (parameter
+keys and values sent, values received). Requests sent as a single batched
+TraCI message (see plexe_imp.batch) are timed but their bytes are not
+counted. Instances which are not profiled are not affected.
+
+With deferred writes and pipelines, _set_par and the pipelined getters only
+queue the requests, and the round trip to SUMO happens in flush() and
+execute_pipeline(). These are profiled as well, and reported as the
+"flush" and "execute_pipeline" methods and as the "batch flush" and "batch
+execute_pipeline" parameters. The time and bytes of a profiled call nested
+in another one, e.g., a flush performed by a get to send the writes queued
+for the same vehicle, are only recorded for the nested call, and are
+subtracted from the outer one.
+
+Profiling is enabled with Plexe(profile=True), and the results are obtained
+through Plexe.stats(), e.g.,
+
+    plexe = Plexe(profile=True)
+    ...
+    print(plexe.profiler.report())
+    plexe.reset_stats()
+"""
+import sys
+from time import perf_counter_ns
+
+# number of latency histogram buckets. Bucket i counts the calls which took
+# less than 2^i microseconds (and at least 2^(i-1)), the last one all the
+# slower calls
+BUCKETS = 24
+
+
+def bucket_label(i):
+    """
+    Returns the label of a latency histogram bucket, e.g., "<16us"
+    """
+    if i == BUCKETS - 1:
+        return ">=%dus" % (1 << (i - 1))
+    return "<%dus" % (1 << i)
+
+
+class Stat:
+    """
+    Counters of a parameter or of an API method
+    """
+    __slots__ = ("calls", "bytes", "total_ns", "max_ns", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * BUCKETS
+
+    def add(self, ns, size):
+        self.calls += 1
+        self.bytes += size
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.histogram[min((ns // 1000).bit_length(), BUCKETS - 1)] += 1
+
+    def as_dict(self):
+        """
+        Returns the counters as a dictionary, with latencies in microseconds
+        and the non empty histogram buckets
+        """
+        return {
+            "calls": self.calls,
+            "bytes": self.bytes,
+            "total_us": self.total_ns / 1000,
+            "mean_us": self.total_ns / 1000 / self.calls if self.calls else 0,
+            "max_us": self.max_ns / 1000,
+            "histogram": {bucket_label(i): n
+                          for i, n in enumerate(self.histogram) if n > 0},
+        }
+
+
+class _VehicleDomain:
+    """
+    Proxy of the vehicle domain of a traci connection, counting the bytes
+    of parameter keys and values exchanged with SUMO
+    """
+
+    def __init__(self, domain, profiler):
+        self._domain = domain
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._domain, name)
+
+    def setParameter(self, vid, key, value):
+        self._profiler.bytes += len(key) + len(value)
+        self._domain.setParameter(vid, key, value)
+
+    def getParameter(self, vid, key):
+        value = self._domain.getParameter(vid, key)
+        self._profiler.bytes += len(key) + len(value)
+        return value
+
+
+class _Connection:
+    """
+    Proxy of a traci connection (or module) replacing its vehicle domain
+    """
+
+    def __init__(self, connection, profiler):
+        self._connection = connection
+        self.vehicle = _VehicleDomain(connection.vehicle, profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class Profiler:
+    """
+    Profiler of the _set_par, _get_par, _get_par_many, flush, and
+    execute_pipeline calls of an implementation instance
+    """
+
+    def __init__(self, imp):
+        """
+        Constructor. Installs the profiler on the implementation instance
+        :param imp: PlexeImp instance
+        """
+        self.imp = imp
+        # bytes exchanged by the call being profiled
+        self.bytes = 0
+        # time spent in the calls nested in the call being profiled
+        self._nested_ns = 0
+        self.parameters = {}
+        self.methods = {}
+        self._set_par = imp._set_par
+        self._get_par = imp._get_par
+        self._get_par_many = imp._get_par_many
+        self._flush = imp.flush
+        self._execute_pipeline = imp.execute_pipeline
+        self._traci = imp.traci
+        imp.traci = _Connection(imp.traci, self)
+        imp._set_par = self._profile(self._set_par, "set")
+        imp._get_par = self._profile(self._get_par, "get")
+        imp._get_par_many = self._profile(self._get_par_many, "get")
+        imp.flush = self._profile_batch(self._flush, "flush")
+        imp.execute_pipeline = self._profile_batch(self._execute_pipeline,
+                                                   "execute_pipeline")
+
+    def uninstall(self):
+        """
+        Restores the original methods of the implementation instance
+        """
+        del self.imp._set_par
+        del self.imp._get_par
+        del self.imp._get_par_many
+        del self.imp.flush
+        del self.imp.execute_pipeline
+        self.imp.traci = self._traci
+
+    def _profile(self, function, kind):
+        cls = type(self.imp)
+
+        def wrapper(vids, par, *args):
+            # the API method is the first caller which is a public method of
+            # the implementation, skipping helpers (e.g., _get_single_par)
+            # and wrappers
+            frame = sys._getframe(1)
+            caller = frame
+            while caller is not None and \
+                    (caller.f_code.co_name.startswith("_") or
+                     not hasattr(cls, caller.f_code.co_name)):
+                caller = caller.f_back
+            if caller is not None:
+                frame = caller
+            return self._measure(function, (vids, par) + args, kind, par,
+                                 frame.f_code.co_name)
+        return wrapper
+
+    def _measure(self, function, args, kind, par, method):
+        """
+        Calls a profiled function and records its time and bytes, excluding
+        the ones of the profiled calls nested in it
+        """
+        outer_bytes = self.bytes
+        outer_nested_ns = self._nested_ns
+        self.bytes = 0
+        self._nested_ns = 0
+        start = perf_counter_ns()
+        try:
+            return function(*args)
+        finally:
+            ns = perf_counter_ns() - start
+            self._record(kind, par, method, ns - self._nested_ns)
+            self.bytes = outer_bytes
+            self._nested_ns = outer_nested_ns + ns
+
+    def _record(self, kind, par, method, ns):
+        stat = self.parameters.get((kind, par))
+        if stat is None:
+            stat = self.parameters[(kind, par)] = Stat()
+        stat.add(ns, self.bytes)
+        stat = self.methods.get(method)
+        if stat is None:
+            stat = self.methods[method] = Stat()
+        stat.add(ns, self.bytes)
+
+    def _profile_batch(self, function, name):
+        imp = self.imp
+
+        def wrapper(*args):
+            # flush() is invoked at every step: skip the calls with nothing
+            # to send
+            if name == "flush" and len(imp.pending) == 0:
+                return function(*args)
+            return self._measure(function, args, "batch", name, name)
+        return wrapper
+
+    def reset(self):
+        """
+        Drops all the recorded data
+        """
+        self.parameters.clear()
+        self.methods.clear()
+
+    def stats(self):
+        """
+        Returns the recorded data
+        :return: a dictionary with two entries. "parameters" maps "get
+        <parameter>" and "set <parameter>" (e.g., "get ccrd") to the
+        counters of the parameter, and "batch flush" and "batch
+        execute_pipeline" to the counters of the batched round trips.
+        "methods" maps API method names (including flush and
+        execute_pipeline) to the counters of the calls they performed.
+        Counters are dictionaries with calls, bytes, total_us, mean_us,
+        max_us, and histogram, mapping latency buckets to the number of
+        calls
+        """
+        return {
+            "parameters": {"%s %s" % k: s.as_dict()
+                           for k, s in self.parameters.items()},
+            "methods": {k: s.as_dict() for k, s in self.methods.items()},
+        }
+
+    def report(self):
+        """
+        Returns a textual report, sorting parameters and methods by total
+        time
+        """
+        lines = []
+        for title, stats in (("parameter", {"%s %s" % k: s for k, s in
+                                             self.parameters.items()}),
+                             ("method", self.methods)):
+            lines.append("%-32s %10s %12s %12s %10s %10s" %
+                         (title, "calls", "bytes", "total ms", "mean us",
+                          "max us"))
+            for name, s in sorted(stats.items(),
+                                  key=lambda i: -i[1].total_ns):
+                lines.append("%-32s %10d %12d %12.3f %10.1f %10.1f" %
+                             (name, s.calls, s.bytes, s.total_ns / 1e6,
+                              s.total_ns / 1e3 / s.calls, s.max_ns / 1e3))
+            lines.append("")
+        return "\n".join(lines)
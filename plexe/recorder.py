@@ -0,0 +1,324 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Streaming telemetry recorder. The recorder is a step listener which samples
+the state of a set of vehicles (vehicle data, radar, engine, and active
+controller) every few steps, and writes it to disk in chunks from a
+background thread. Memory usage is bounded by the chunk size and by the
+number of chunks waiting to be written: when the writer falls behind, the
+simulation waits for it. Samples are stored in long format, one row per
+vehicle per sample, with the columns listed in DTYPE.
+
+Data is buffered and written by column: each chunk is written as one NumPy
+.npy file per column, which can be memory mapped when reading it back (see
+chunks() and load()), or appended as a row group to a single Parquet file
+if pyarrow is installed and FORMAT_PARQUET is used:
+
+    recorder = Recorder(plexe, "run-1", decimation=10)
+    traci.addStepListener(recorder)
+    recorder.add("v.0")
+    ...
+    recorder.close()
+    data = load("run-1")
+    leader = data[data["vehicle"] == vehicles("run-1")["v.0"]]
+"""
+import glob
+import json
+import os
+import queue
+import threading
+from importlib import import_module
+import numpy as np
+import traci
+
+FORMAT_NPY = "npy"
+FORMAT_PARQUET = "parquet"
+
+# columns of the recorded samples. vehicle is the number assigned to the
+# vehicle id, see vehicles()
+DTYPE = np.dtype([
+    ("time", np.float64),
+    ("vehicle", np.int32),
+    ("u", np.float64),
+    ("acceleration", np.float64),
+    ("speed", np.float64),
+    ("pos_x", np.float64),
+    ("pos_y", np.float64),
+    ("radar_distance", np.float64),
+    ("radar_rel_speed", np.float64),
+    ("gear", np.int32),
+    ("rpm", np.float64),
+    ("controller", np.int32),
+])
+
+METADATA = "vehicles.json"
+PARQUET_FILE = "telemetry.parquet"
+# file of a column of a chunk, e.g., chunk_000003.speed.npy
+_CHUNK_PATTERN = "chunk_%06d.%s.npy"
+
+
+def _columns(n):
+    """
+    Allocates the buffer of n rows of each column
+    """
+    return {name: np.empty(n, dtype=DTYPE[name]) for name in DTYPE.names}
+
+
+class Recorder(traci.StepListener):
+    """
+    Step listener recording the state of a set of vehicles, to be added
+    after the Plexe instance (see Plexe.split_registered). Recorded vehicles
+    are registered for the Plexe per step snapshot, and the other data of
+    all the vehicles is obtained with a single TraCI message per sample.
+    Vehicles are recorded from their first step in the simulation, and stop
+    being recorded automatically when leaving it
+    """
+
+    def __init__(self, plexe, path, decimation=1, chunk_size=65536,
+                 max_pending=4, fmt=FORMAT_NPY, engine=True):
+        """
+        Constructor
+        :param plexe: Plexe API instance
+        :param path: directory where the data is written. It is created if
+        it does not exist
+        :param decimation: record one sample every decimation steps
+        :param chunk_size: number of rows of each chunk
+        :param max_pending: maximum number of chunks waiting to be written
+        :param fmt: FORMAT_NPY or FORMAT_PARQUET (requires pyarrow)
+        :param engine: if true, record gear and rpm (see get_engine_data),
+        otherwise these columns are set to -1
+        """
+        if fmt not in (FORMAT_NPY, FORMAT_PARQUET):
+            raise ValueError("unknown format %s" % fmt)
+        if fmt == FORMAT_PARQUET:
+            # fail now rather than in the writer thread
+            import_module("pyarrow.parquet")
+        self.plexe = plexe
+        self.path = path
+        self.decimation = decimation
+        self.chunk_size = chunk_size
+        self.fmt = fmt
+        self.engine = engine
+        os.makedirs(path, exist_ok=True)
+        # vehicle id to vehicle number
+        self.vehicles = {}
+        self.recording = []
+        self.steps = 0
+        self.buffer = _columns(chunk_size)
+        self.rows = 0
+        self.chunks = 0
+        self.closed = False
+        self.error = None
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def add(self, vid):
+        """
+        Starts recording a vehicle, registering it for the Plexe snapshot
+        :param vid: vehicle id
+        :return: the number identifying the vehicle in the recorded data
+        """
+        if vid not in self.vehicles:
+            self.vehicles[vid] = len(self.vehicles)
+        if vid not in self.recording:
+            self.recording.append(vid)
+            self.plexe.register_vehicle(vid)
+        return self.vehicles[vid]
+
+    def remove(self, vid):
+        """
+        Stops recording a vehicle, unregistering it from the Plexe snapshot
+        :param vid: vehicle id
+        """
+        if vid in self.recording:
+            self.recording.remove(vid)
+            self.plexe.unregister_vehicle(vid)
+
+    def step(self, t=0):
+        if self.closed:
+            return False
+        if self.error is not None:
+            raise self.error
+        self.steps += 1
+        if (self.steps - 1) % self.decimation == 0:
+            self.sample()
+        return True
+
+    def sample(self):
+        """
+        Records a sample of all the recorded vehicles
+        """
+        vids, left = self.plexe.split_registered(self.recording)
+        for vid in left:
+            self.remove(vid)
+        n = len(vids)
+        if n == 0:
+            return
+        with self.plexe.pipeline() as p:
+            radar = [p.get_radar_data(vid) for vid in vids]
+            controllers = [p.get_active_controller(vid) for vid in vids]
+            if self.engine:
+                engine = [p.get_engine_data(vid) for vid in vids]
+        data = self.plexe.get_vehicles_data(vids)
+
+        if self.rows + n > len(self.buffer["time"]):
+            self._submit()
+            if n > len(self.buffer["time"]):
+                self.buffer = _columns(n)
+        rows = slice(self.rows, self.rows + n)
+        buffer = self.buffer
+        for name in ("time", "u", "acceleration", "speed", "pos_x",
+                     "pos_y"):
+            buffer[name][rows] = np.fromiter((getattr(data[vid], name)
+                                              for vid in vids), dtype=float,
+                                             count=n)
+        buffer["vehicle"][rows] = np.fromiter(
+            (self.vehicles[vid] for vid in vids), dtype=np.int32, count=n)
+        buffer["radar_distance"][rows] = np.fromiter(
+            (r.result().distance for r in radar), dtype=float, count=n)
+        buffer["radar_rel_speed"][rows] = np.fromiter(
+            (r.result().relative_speed for r in radar), dtype=float,
+            count=n)
+        buffer["controller"][rows] = np.fromiter(
+            (c.result() for c in controllers), dtype=np.int32, count=n)
+        if self.engine:
+            engine = [e.result() for e in engine]
+            buffer["gear"][rows] = np.fromiter((e.gear for e in engine),
+                                               dtype=np.int32, count=n)
+            buffer["rpm"][rows] = np.fromiter((e.rpm for e in engine),
+                                              dtype=float, count=n)
+        else:
+            buffer["gear"][rows] = -1
+            buffer["rpm"][rows] = -1
+        self.rows += n
+
+    def _submit(self):
+        """
+        Hands the buffered rows over to the writer thread, waiting if too
+        many chunks are pending
+        """
+        if self.rows == 0:
+            return
+        self._queue.put({name: column[:self.rows]
+                         for name, column in self.buffer.items()})
+        self.buffer = _columns(self.chunk_size)
+        self.rows = 0
+
+    def _write(self):
+        writer = None
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            # after an error, keep draining the queue so that the simulation
+            # does not block
+            if self.error is not None:
+                continue
+            try:
+                if self.fmt == FORMAT_NPY:
+                    for name in DTYPE.names:
+                        np.save(os.path.join(self.path, _CHUNK_PATTERN %
+                                             (self.chunks, name)),
+                                chunk[name])
+                else:
+                    import pyarrow
+                    import pyarrow.parquet
+                    table = pyarrow.Table.from_arrays(
+                        [chunk[name] for name in DTYPE.names],
+                        names=list(DTYPE.names))
+                    if writer is None:
+                        writer = pyarrow.parquet.ParquetWriter(
+                            os.path.join(self.path, PARQUET_FILE),
+                            table.schema)
+                    writer.write_table(table)
+                self.chunks += 1
+            except Exception as e:
+                self.error = e
+        if writer is not None:
+            writer.close()
+
+    def close(self):
+        """
+        Writes the buffered rows and the vehicle ids, and waits for the
+        writer thread to complete. The recorder stops recording, and is
+        removed from the step listeners at the next step
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._submit()
+        self._queue.put(None)
+        self._thread.join()
+        with open(os.path.join(self.path, METADATA), "w") as f:
+            json.dump({"format": self.fmt, "columns": list(DTYPE.names),
+                       "vehicles": self.vehicles}, f)
+        if self.error is not None:
+            raise self.error
+
+
+def vehicles(path):
+    """
+    Returns the vehicles of a recording
+    :param path: directory of the recording
+    :return: dictionary mapping vehicle ids to the numbers used in the
+    vehicle column
+    """
+    with open(os.path.join(path, METADATA)) as f:
+        return json.load(f)["vehicles"]
+
+
+def chunks(path, mmap=True):
+    """
+    Returns the chunks of a recording in the NumPy format
+    :param path: directory of the recording
+    :param mmap: if true, columns are memory mapped instead of being read
+    :return: list of dictionaries, one per chunk, mapping the column names
+    of DTYPE to arrays
+    """
+    mode = "r" if mmap else None
+    # chunks are numbered from 0
+    n = len(glob.glob(os.path.join(path, "chunk_*.time.npy")))
+    return [{name: np.load(os.path.join(path, _CHUNK_PATTERN % (i, name)),
+                           mmap_mode=mode)
+             for name in DTYPE.names}
+            for i in range(n)]
+
+
+def load(path):
+    """
+    Reads a whole recording, in either format
+    :param path: directory of the recording
+    :return: structured array with DTYPE, one record per row
+    """
+    parquet = os.path.join(path, PARQUET_FILE)
+    if os.path.exists(parquet):
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(parquet)
+        data = np.empty(table.num_rows, dtype=DTYPE)
+        for name in DTYPE.names:
+            data[name] = table.column(name).to_numpy()
+        return data
+    parts = chunks(path)
+    data = np.empty(sum(len(p["time"]) for p in parts), dtype=DTYPE)
+    start = 0
+    for part in parts:
+        stop = start + len(part["time"])
+        for name in DTYPE.names:
+            data[name][start:stop] = part[name]
+        start = stop
+    return data
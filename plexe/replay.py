@@ -0,0 +1,165 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Replay of recorded traces. A TraceReplay is a step listener which plays
+back the trace of one vehicle of a recording made with plexe.recorder
+(NumPy format), and feeds it to live vehicles as leader or front vehicle
+data, either through the data setters (e.g., for CACC) or through the
+FAKED_CACC setters. The recording is memory mapped and read one sample at a
+time, and the vehicle being replayed does not need to exist in the
+simulation, so no request is made to obtain its data, e.g.,
+
+    replay = TraceReplay(plexe, "field-run", "leader")
+    traci.addStepListener(replay)
+    replay.feed("v.1", FAKE_LEADER)
+    replay.feed("v.1", FAKE_FRONT)
+
+Samples are held until the next one (e.g., for decimated recordings), with
+the position extrapolated from the recorded speed, and the replay stops at
+the end of the trace.
+"""
+import numpy as np
+import traci
+from plexe.recorder import chunks, vehicles
+from plexe.vehicle_data import VehicleData
+
+# roles of the replayed vehicle for the fed vehicles
+LEADER = "leader"
+FRONT = "front"
+FAKE_LEADER = "fake_leader"
+FAKE_FRONT = "fake_front"
+
+
+class TraceReplay(traci.StepListener):
+    """
+    Step listener feeding the trace of a recorded vehicle to live vehicles.
+    The writes of each step are sent with a single TraCI message. FAKE_FRONT
+    distances use the positions in the Plexe snapshot of the current step,
+    so the replay is added after the Plexe instance
+    """
+
+    def __init__(self, plexe, path, vehicle, offset=0.0):
+        """
+        Constructor. The first sample of the trace is fed at the first step
+        after the creation of the replay
+        :param plexe: Plexe API instance
+        :param path: directory of the recording
+        :param vehicle: id of the recorded vehicle to be replayed
+        :param offset: longitudinal offset in meters added to the recorded
+        x positions, to place the replayed vehicle on the simulated road
+        """
+        self.plexe = plexe
+        self.number = vehicles(path)[vehicle]
+        self.chunks = chunks(path)
+        self.offset = offset
+        # fed vehicles: (vehicle id, role, length of the replayed vehicle)
+        self.targets = []
+        simulation = plexe.connection.simulation
+        self.start = simulation.getTime()
+        self.step_length = simulation.getDeltaT()
+        self.steps = 0
+        self._samples = self._iterate()
+        # next (time, sample) of the trace, and time and values of the
+        # sample being held
+        self._next = next(self._samples, None)
+        self.t0 = None if self._next is None else self._next[0]
+        self.time = None
+        self.sample = None
+        # time elapsed since the sample being held
+        self.elapsed = 0.0
+        self.finished = self._next is None
+
+    def feed(self, vid, role, length=4.0):
+        """
+        Starts feeding a vehicle with the replayed trace
+        :param vid: vehicle id
+        :param role: LEADER, FRONT, FAKE_LEADER, or FAKE_FRONT. For
+        FAKE_FRONT the distance is computed from the position of the vehicle
+        in the Plexe snapshot, so the vehicle is registered for it
+        :param length: length in meters of the replayed vehicle
+        """
+        if role not in (LEADER, FRONT, FAKE_LEADER, FAKE_FRONT):
+            raise ValueError("unknown role %s" % role)
+        if role == FAKE_FRONT:
+            self.plexe.register_vehicle(vid)
+        self.targets.append((vid, role, length))
+
+    def stop(self, vid):
+        """
+        Stops feeding a vehicle
+        :param vid: vehicle id
+        """
+        self.targets = [t for t in self.targets if t[0] != vid]
+
+    def _iterate(self):
+        """
+        Yields the (time, sample) samples of the replayed vehicle, where
+        sample maps the recorded columns to their values. Chunks are scanned
+        one at a time, reading only the vehicle and time columns of the
+        memory mapped chunks, and the other columns of the replayed rows
+        """
+        for chunk in self.chunks:
+            rows = np.flatnonzero(chunk["vehicle"] == self.number)
+            for row, time in zip(rows, chunk["time"][rows]):
+                yield time, {name: column[row]
+                             for name, column in chunk.items()}
+
+    def current(self):
+        """
+        Returns the sample of the trace for the current step
+        :return: a dictionary mapping the columns of the trace (see
+        plexe.recorder.DTYPE) to their values, or None at the end of the
+        trace
+        """
+        if self.finished:
+            return None
+        target = self.t0 + self.steps * self.step_length + 1e-9
+        while self._next is not None and self._next[0] <= target:
+            self.time, self.sample = self._next
+            self._next = next(self._samples, None)
+        # the last sample is held for a single step
+        if self._next is None and target >= self.time + self.step_length:
+            self.finished = True
+            self.sample = None
+        self.elapsed = max(target - 1e-9 - self.time, 0.0)
+        return self.sample
+
+    def step(self, t=0):
+        sample = self.current()
+        self.steps += 1
+        if sample is None:
+            return False
+        time = self.start + self.steps * self.step_length
+        data = VehicleData(None, sample["u"], sample["acceleration"],
+                           sample["speed"], sample["pos_x"] + self.offset +
+                           sample["speed"] * self.elapsed, sample["pos_y"],
+                           time)
+        with self.plexe.batch_writes():
+            for vid, role, length in self.targets:
+                if role == LEADER:
+                    self.plexe.set_leader_vehicle_data(vid, data)
+                elif role == FRONT:
+                    self.plexe.set_front_vehicle_data(vid, data)
+                elif role == FAKE_LEADER:
+                    self.plexe.set_leader_vehicle_fake_data(vid, data)
+                else:
+                    own = self.plexe.snapshot.get(vid)
+                    if own is None:
+                        continue
+                    self.plexe.set_front_vehicle_fake_data(
+                        vid, data, data.pos_x - length - own.pos_x)
+        return True
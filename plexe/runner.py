@@ -0,0 +1,233 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Runs independent simulations in parallel. Each simulation runs in a worker
+process of a process pool, with its own headless SUMO instance and its own
+Plexe instance bound to it. A scenario is a function taking the Plexe
+instance as first argument, followed by the parameters of the run as
+keyword arguments, and returning the results of the run, e.g.,
+
+    def brake_test(plexe, n_vehicles, distance):
+        ...
+        while step < 1500:
+            plexe.connection.simulationStep()
+            ...
+        return min_dist
+
+    results = run_scenarios(brake_test, "cfg/freeway.sumo.cfg",
+                            [{"n_vehicles": 8, "distance": d}
+                             for d in range(2, 10)])
+
+The scenario must be defined at module level, so that it can be sent to
+the worker processes. SUMO is closed by the runner when the scenario
+returns, and killed if the run exceeds its timeout.
+
+Scenarios differ from the main(demo_mode, real_engine) functions of the
+examples: those start SUMO themselves with traci.start() and the GUI, and
+run until the window is closed. To run an example with the runner, its
+simulation loop is moved into a scenario function which uses the given
+Plexe instance and its connection, and which takes options such as
+real_engine as keyword parameters (see brake_test in
+examples/cacc-sweep.py).
+"""
+import os
+import random
+import signal
+import subprocess
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import traci
+from plexe.plexe import Plexe
+
+
+class ScenarioTimeout(Exception):
+    """
+    Raised inside a scenario which exceeded the given timeout
+    """
+    pass
+
+
+class ScenarioResult:
+    """
+    Outcome of a single run of a scenario
+    """
+
+    def __init__(self, index, params, seed, value=None, error=None,
+                 elapsed=None):
+        """
+        Constructor
+        :param index: index of the parameter set in the list given to the
+        runner
+        :param params: dictionary of parameters of the run
+        :param seed: random seed used for SUMO and for the random module
+        :param value: value returned by the scenario
+        :param error: if the run failed or timed out, the formatted exception
+        :param elapsed: wall clock duration of the run in seconds
+        """
+        self.index = index
+        self.params = params
+        self.seed = seed
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        """
+        Returns whether the run completed successfully
+        """
+        return self.error is None
+
+
+def _on_timeout(signum, frame):
+    raise ScenarioTimeout()
+
+
+def _kill(process, connection):
+    """
+    Terminates a SUMO instance without the closing handshake, which could
+    block forever if SUMO is not responding
+    :param process: the SUMO process
+    :param connection: its traci connection, or None if the run was
+    interrupted before it was established
+    """
+    process.kill()
+    process.wait()
+    if connection is not None:
+        connection._socket.close()
+
+
+def _forget(label):
+    """
+    Removes a connection from the registry of the traci module, so that the
+    worker process does not keep the connections of the past runs
+    """
+    connections = getattr(getattr(traci, "main", traci), "_connections", None)
+    if connections is not None:
+        connections.pop(label, None)
+
+
+def _run(scenario, config_file, index, params, seed, timeout, sumo_args,
+         plexe_args):
+    """
+    Runs a scenario inside a worker process
+    """
+    import sumolib
+    from sumolib.miscutils import getFreeSocketPort
+    label = "plexe-runner-%d-%d" % (os.getpid(), index)
+    start = time.time()
+    result = ScenarioResult(index, params, seed)
+    process = None
+    connection = None
+    timed_out = False
+    if timeout is not None:
+        signal.signal(signal.SIGALRM, _on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        random.seed(seed)
+        sumo_cmd = [sumolib.checkBinary("sumo"), "-c", config_file,
+                    "--seed", str(seed)]
+        sumo_cmd.extend(sumo_args)
+        # SUMO is started here rather than by traci.start(), so that it can
+        # be killed even if the timeout expires before the connection is
+        # established
+        port = getFreeSocketPort()
+        process = subprocess.Popen(sumo_cmd + ["--remote-port", str(port)])
+        traci.init(port, label=label)
+        connection = traci.getConnection(label)
+        plexe = Plexe(connection=connection, **plexe_args)
+        connection.addStepListener(plexe)
+        result.value = scenario(plexe, **params)
+    except ScenarioTimeout:
+        timed_out = True
+        result.error = traceback.format_exc()
+    except Exception:
+        result.error = traceback.format_exc()
+    finally:
+        if timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if connection is None:
+            # the timeout might have expired after the connection was
+            # established
+            try:
+                connection = traci.getConnection(label)
+            except Exception:
+                pass
+        if process is not None:
+            try:
+                if timed_out or connection is None:
+                    _kill(process, connection)
+                else:
+                    connection.close()
+                    process.wait()
+            except Exception:
+                # e.g., SUMO crashed and the closing handshake failed
+                process.kill()
+                process.wait()
+        _forget(label)
+    result.elapsed = time.time() - start
+    return result
+
+
+def iter_scenarios(scenario, config_file, param_sets, workers=None,
+                   timeout=None, seed=1, sumo_args=(), plexe_args=None):
+    """
+    Runs a scenario once for each parameter set, in parallel, yielding the
+    results as soon as the runs complete
+    :param scenario: scenario function. See the module documentation
+    :param config_file: SUMO configuration file
+    :param param_sets: list of dictionaries of keyword arguments, one per run
+    :param workers: number of worker processes. If None, one per CPU
+    :param timeout: maximum duration of a run in seconds. Runs exceeding it
+    are interrupted and reported as failed. Requires a platform supporting
+    SIGALRM
+    :param seed: seed of the first run. Run i uses seed + i, unless its
+    parameter set is a (params, seed) tuple
+    :param sumo_args: additional command line arguments for SUMO
+    :param plexe_args: additional keyword arguments for the Plexe
+    constructor (e.g., cache_parameters)
+    :return: a generator of ScenarioResult objects, in completion order
+    """
+    plexe_args = {} if plexe_args is None else plexe_args
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for i, params in enumerate(param_sets):
+            if isinstance(params, tuple):
+                params, run_seed = params
+            else:
+                run_seed = seed + i
+            futures.append(pool.submit(_run, scenario, config_file, i,
+                                       params, run_seed, timeout,
+                                       list(sumo_args), plexe_args))
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_scenarios(scenario, config_file, param_sets, workers=None,
+                  timeout=None, seed=1, sumo_args=(), plexe_args=None):
+    """
+    Runs a scenario once for each parameter set, in parallel. See
+    iter_scenarios for the parameters
+    :return: the list of ScenarioResult objects, in the same order as
+    param_sets
+    """
+    results = list(iter_scenarios(scenario, config_file, param_sets,
+                                  workers, timeout, seed, sumo_args,
+                                  plexe_args))
+    results.sort(key=lambda r: r.index)
+    return results
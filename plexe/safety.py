@@ -0,0 +1,238 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Online safety monitoring. The SafetyMonitor is a step listener which, at
+every step, obtains radar data and crash status of all the monitored
+vehicles with a single TraCI message, computes the time to collision, and
+keeps per vehicle running minima of distance and time to collision.
+Callbacks are invoked when a vehicle starts violating a threshold, e.g.,
+
+    monitor = SafetyMonitor(plexe, gap_threshold=2, ttc_threshold=1.5)
+    traci.addStepListener(monitor)
+    monitor.add_callback(lambda event: print(event))
+    for vid in vids:
+        monitor.add(vid)
+    ...
+    print(monitor.min_distances())
+"""
+import numpy as np
+import traci
+
+# kinds of safety events
+GAP = "gap"
+TTC = "ttc"
+CRASH = "crash"
+
+
+class SafetyEvent:
+    """
+    Threshold violation of a vehicle
+    """
+    __slots__ = ("time", "vid", "kind", "value")
+
+    def __init__(self, time, vid, kind, value):
+        """
+        :param time: simulation time in seconds
+        :param vid: vehicle id
+        :param kind: GAP, TTC, or CRASH
+        :param value: distance in meters for GAP, time to collision in
+        seconds for TTC, and True for CRASH
+        """
+        self.time = time
+        self.vid = vid
+        self.kind = kind
+        self.value = value
+
+    def __repr__(self):
+        return "SafetyEvent(%s, %s, %s, %s)" % (self.time, self.vid,
+                                                self.kind, self.value)
+
+
+class SafetyMonitor(traci.StepListener):
+    """
+    Step listener monitoring the distance, time to collision, and crash
+    status of a set of vehicles. Monitored vehicles are registered for the
+    Plexe per step snapshot, so the monitor runs after the Plexe instance
+    (see Plexe.split_registered). Vehicles are checked from their first
+    step in the simulation, and stop being monitored automatically when
+    leaving it, keeping their minima. Vehicles without a vehicle in front
+    within the radar range, or not in the simulation yet, have infinite
+    distance and time to collision
+    """
+
+    def __init__(self, plexe, gap_threshold=None, ttc_threshold=None):
+        """
+        Constructor
+        :param plexe: Plexe API instance
+        :param gap_threshold: distance threshold in meters. If None,
+        distance violations are not reported
+        :param ttc_threshold: time to collision threshold in seconds. If
+        None, time to collision violations are not reported
+        """
+        self.plexe = plexe
+        self.gap_threshold = gap_threshold
+        self.ttc_threshold = ttc_threshold
+        self.callbacks = []
+        # monitored vehicles, and per vehicle values aligned with them
+        self.vids = []
+        self.distance = np.empty(0)
+        self.relative_speed = np.empty(0)
+        self.ttc = np.empty(0)
+        self.crashed = np.empty(0, dtype=bool)
+        # running minima and crash status of the monitored vehicles
+        self.min_distance = np.empty(0)
+        self.min_ttc = np.empty(0)
+        self.ever_crashed = np.empty(0, dtype=bool)
+        # (min distance, min ttc, crashed) of vehicles no longer monitored
+        self.past = {}
+        # vehicles currently violating each threshold
+        self.violating = {GAP: set(), TTC: set(), CRASH: set()}
+
+    def add_callback(self, callback):
+        """
+        Adds a function invoked with a SafetyEvent when a vehicle starts
+        violating a threshold or crashes
+        :param callback: the function
+        """
+        self.callbacks.append(callback)
+
+    def add(self, vid):
+        """
+        Starts monitoring a vehicle
+        :param vid: vehicle id
+        """
+        if vid in self.vids:
+            return
+        self.plexe.register_vehicle(vid)
+        self.vids.append(vid)
+        minima = self.past.pop(vid, (np.inf, np.inf, False))
+        self.min_distance = np.append(self.min_distance, minima[0])
+        self.min_ttc = np.append(self.min_ttc, minima[1])
+        self.ever_crashed = np.append(self.ever_crashed, minima[2])
+        self._resize()
+
+    def remove(self, vid):
+        """
+        Stops monitoring a vehicle, unregistering it from the Plexe snapshot.
+        Its minima are kept
+        :param vid: vehicle id
+        """
+        if vid not in self.vids:
+            return
+        self.plexe.unregister_vehicle(vid)
+        i = self.vids.index(vid)
+        self.past[vid] = (self.min_distance[i].item(),
+                          self.min_ttc[i].item(),
+                          self.ever_crashed[i].item())
+        del self.vids[i]
+        self.min_distance = np.delete(self.min_distance, i)
+        self.min_ttc = np.delete(self.min_ttc, i)
+        self.ever_crashed = np.delete(self.ever_crashed, i)
+        for violating in self.violating.values():
+            violating.discard(vid)
+        self._resize()
+
+    def _resize(self):
+        n = len(self.vids)
+        self.distance = np.full(n, np.inf)
+        self.relative_speed = np.zeros(n)
+        self.ttc = np.full(n, np.inf)
+        self.crashed = np.zeros(n, dtype=bool)
+
+    def step(self, t=0):
+        vids, left = self.plexe.split_registered(self.vids)
+        for vid in left:
+            self.remove(vid)
+        self._resize()
+        n = len(vids)
+        if n == 0:
+            return True
+        present = set(vids)
+        idx = np.fromiter((i for i, vid in enumerate(self.vids)
+                           if vid in present), dtype=np.intp, count=n)
+        with self.plexe.pipeline() as p:
+            radar = [p.get_radar_data(vid) for vid in vids]
+            crashed = [p.get_crashed(vid) for vid in vids]
+        distance = np.fromiter((r.result().distance for r in radar),
+                               dtype=float, count=n)
+        relative_speed = np.fromiter(
+            (r.result().relative_speed for r in radar), dtype=float, count=n)
+        # the radar reports a negative distance when nothing is in range
+        visible = distance >= 0
+        self.distance[idx] = np.where(visible, distance, np.inf)
+        self.relative_speed[idx] = relative_speed
+        self.crashed[idx] = np.fromiter((c.result() for c in crashed),
+                                        dtype=bool, count=n)
+        closing = visible & (relative_speed < 0)
+        self.ttc[idx[closing]] = distance[closing] / -relative_speed[closing]
+
+        np.minimum(self.min_distance, self.distance, out=self.min_distance)
+        np.minimum(self.min_ttc, self.ttc, out=self.min_ttc)
+        self.ever_crashed |= self.crashed
+
+        if self.gap_threshold is not None:
+            self._check(GAP, self.distance < self.gap_threshold,
+                        self.distance)
+        if self.ttc_threshold is not None:
+            self._check(TTC, self.ttc < self.ttc_threshold, self.ttc)
+        self._check(CRASH, self.crashed, self.crashed)
+        return True
+
+    def _check(self, kind, violations, values):
+        """
+        Updates the set of vehicles violating a threshold, invoking the
+        callbacks for the ones which just started violating it
+        """
+        violating = self.violating[kind]
+        current = set()
+        for i in np.flatnonzero(violations):
+            vid = self.vids[i]
+            current.add(vid)
+            if vid in violating:
+                continue
+            data = self.plexe.snapshot.get(vid)
+            event = SafetyEvent(None if data is None else data.time, vid,
+                                kind, values[i].item())
+            for callback in self.callbacks:
+                callback(event)
+        self.violating[kind] = current
+
+    def min_distances(self):
+        """
+        Returns the minimum distance of each vehicle ever monitored
+        :return: dictionary mapping vehicle ids to distances in meters
+        """
+        ret = {vid: m[0] for vid, m in self.past.items()}
+        ret.update(zip(self.vids, self.min_distance.tolist()))
+        return ret
+
+    def min_ttcs(self):
+        """
+        Returns the minimum time to collision of each vehicle ever monitored
+        :return: dictionary mapping vehicle ids to times in seconds
+        """
+        ret = {vid: m[1] for vid, m in self.past.items()}
+        ret.update(zip(self.vids, self.min_ttc.tolist()))
+        return ret
+
+    def crashes(self):
+        """
+        Returns the vehicles which crashed while being monitored
+        :return: list of vehicle ids
+        """
+        return [vid for vid, m in self.past.items() if m[2]] + \
+            [self.vids[i] for i in np.flatnonzero(self.ever_crashed)]
@@ -0,0 +1,652 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Stand-in for SUMO. Simulation is a traci-like connection object which
+speaks the same carFollowModel.* parameter protocol as the Plexe car
+following model, with the longitudinal dynamics of all the vehicles
+computed with NumPy. It only requires the traci Python package (e.g., pip
+install traci), not a SUMO installation, and runs much faster than SUMO,
+e.g., for regression suites and parameter sweeps:
+
+    sim = Simulation()
+    plexe = Plexe(connection=sim)
+    sim.addStepListener(plexe)
+    sim.vehicle.add("v.0", departPos="100", departSpeed="30")
+    plexe.set_active_controller("v.0", ACC)
+    sim.simulationStep()
+
+The model is a single straight road with parallel lanes, where vehicles
+drive along the x axis. It includes:
+- the first order lag engine model (see Plexe.set_engine_tau). The
+  realistic engine model is not available, and requests to use it are
+  ignored
+- the cruise control, ACC, PATH CACC, PLOEG, and FAKED_CACC controllers,
+  including auto feeding, prediction of the leader speed, and fixed
+  accelerations. The speed of the front vehicle is taken from the radar.
+  The DRIVER and CONSENSUS controllers are replaced by the ACC
+- a radar, measuring the distance and the relative speed to the closest
+  vehicle ahead in the same lane, up to 250 meters
+- collisions, which mark the following vehicle as crashed without
+  removing it
+Lane changes are instantaneous and only performed on request (see
+Plexe.perform_platoon_lane_change). Vehicles arrive when reaching the end
+of the road.
+"""
+import numpy as np
+import traci
+from traci import constants as tc
+from plexe import controllers as ctl
+from plexe.constants import ACC, CACC, FAKED_CACC, PLOEG
+from plexe.plexe_imp import ccparams as cc
+
+# maximum distance measured by the radar
+RADAR_RANGE = 250.0
+
+# per vehicle state: name, dtype, initial value
+FIELDS = (
+    ("lane", np.int32, 0),
+    ("pos", float, 0.0),
+    ("speed", float, 0.0),
+    ("acceleration", float, 0.0),
+    ("u", float, 0.0),
+    ("length", float, 4.0),
+    ("accel", float, 2.5),
+    ("decel", float, 9.0),
+    ("tau", float, 0.5),
+    ("controller", np.int32, 0),
+    ("desired_speed", float, 0.0),
+    ("acc_headway", float, 1.5),
+    ("acc_lambda", float, 0.1),
+    ("acc_acceleration", float, 0.0),
+    ("cacc_spacing", float, 5.0),
+    ("xi", float, 1.0),
+    ("omega_n", float, 0.2),
+    ("c1", float, 0.5),
+    ("ploeg_h", float, 0.5),
+    ("ploeg_kp", float, 0.2),
+    ("ploeg_kd", float, 0.7),
+    ("use_controller_acceleration", bool, True),
+    ("fixed", bool, False),
+    ("fixed_acceleration", float, 0.0),
+    # data received through set_leader_vehicle_data/set_front_vehicle_data
+    ("leader_valid", bool, False),
+    ("leader_speed", float, 0.0),
+    ("leader_acceleration", float, 0.0),
+    ("leader_u", float, 0.0),
+    ("leader_time", float, 0.0),
+    ("front_valid", bool, False),
+    ("front_speed", float, 0.0),
+    ("front_acceleration", float, 0.0),
+    ("front_u", float, 0.0),
+    ("use_prediction", bool, False),
+    # data for the FAKED_CACC
+    ("fake_leader_speed", float, 0.0),
+    ("fake_leader_acceleration", float, 0.0),
+    ("fake_leader_u", float, 0.0),
+    ("fake_front_speed", float, 0.0),
+    ("fake_front_acceleration", float, 0.0),
+    ("fake_front_distance", float, 0.0),
+    ("fake_front_u", float, 0.0),
+    ("radar_distance", float, -1.0),
+    ("radar_rel_speed", float, 0.0),
+    ("crashed", bool, False),
+    ("platoon_position", np.int32, 0),
+    ("platoon_size", np.int32, 1),
+    ("active", bool, False),
+)
+
+# parameters which simply set a state field
+_FIELD_PARAMETERS = {
+    cc.PAR_CC_DESIRED_SPEED: ("desired_speed", float),
+    cc.PAR_ACTIVE_CONTROLLER: ("controller", int),
+    cc.PAR_CACC_SPACING: ("cacc_spacing", float),
+    cc.CC_PAR_CACC_XI: ("xi", float),
+    cc.CC_PAR_CACC_OMEGA_N: ("omega_n", float),
+    cc.CC_PAR_CACC_C1: ("c1", float),
+    cc.CC_PAR_ENGINE_TAU: ("tau", float),
+    cc.CC_PAR_PLOEG_H: ("ploeg_h", float),
+    cc.CC_PAR_PLOEG_KP: ("ploeg_kp", float),
+    cc.CC_PAR_PLOEG_KD: ("ploeg_kd", float),
+    cc.PAR_ACC_HEADWAY_TIME: ("acc_headway", float),
+    cc.PAR_USE_CONTROLLER_ACCELERATION: ("use_controller_acceleration",
+                                         int),
+    cc.PAR_USE_PREDICTION: ("use_prediction", int),
+    cc.CC_PAR_VEHICLE_POSITION: ("platoon_position", int),
+    cc.CC_PAR_PLATOON_SIZE: ("platoon_size", int),
+}
+
+# parameters which are accepted but have no effect on the model
+_IGNORED_PARAMETERS = frozenset([
+    cc.CC_PAR_VEHICLE_ENGINE_MODEL, cc.CC_PAR_VEHICLE_MODEL,
+    cc.CC_PAR_VEHICLES_FILE, cc.PAR_ADD_MEMBER,
+    cc.PAR_REMOVE_MEMBER, cc.PAR_ENABLE_AUTO_LANE_CHANGE,
+])
+
+
+class VehicleDomain:
+    """
+    Subset of traci.vehicle supported by the stand-in
+    """
+
+    def __init__(self, sim):
+        self._sim = sim
+        self._subscriptions = {}
+
+    def _slot(self, vid):
+        try:
+            return self._sim.slots[vid]
+        except KeyError:
+            raise traci.TraCIException("Vehicle '%s' is not known" % vid)
+
+    def add(self, vehID, routeID="", typeID="DEFAULT_VEHTYPE", depart=None,
+            departLane="first", departPos="base", departSpeed="0", **kwargs):
+        """
+        Inserts a vehicle at the current time. Routes and types are ignored
+        """
+        lane = 0 if departLane in ("first", "free", "best", "random") \
+            else int(departLane)
+        pos = 0.0 if departPos in ("base", "free", "random") \
+            else float(departPos)
+        speed = 0.0 if departSpeed in ("max", "desired", "random") \
+            else float(departSpeed)
+        self._sim.insert(vehID, lane, pos, speed)
+
+    def remove(self, vehID, reason=tc.REMOVE_VAPORIZED):
+        self._slot(vehID)
+        self._sim.release(vehID)
+
+    def getIDList(self):
+        return list(self._sim.slots.keys())
+
+    def getIDCount(self):
+        return len(self._sim.slots)
+
+    def setParameter(self, vehID, param, value):
+        self._sim.set_parameter(self._slot(vehID), vehID, param, value)
+
+    def getParameter(self, vehID, param):
+        return self._sim.get_parameter(self._slot(vehID), vehID, param)
+
+    def getLaneIndex(self, vehID):
+        return int(self._sim.lane[self._slot(vehID)])
+
+    def getLength(self, vehID):
+        return float(self._sim.length[self._slot(vehID)])
+
+    def setLength(self, vehID, length):
+        self._sim.length[self._slot(vehID)] = length
+
+    def setAccel(self, vehID, accel):
+        self._sim.accel[self._slot(vehID)] = accel
+
+    def setDecel(self, vehID, decel):
+        self._sim.decel[self._slot(vehID)] = decel
+
+    def getSpeed(self, vehID):
+        return float(self._sim.speed[self._slot(vehID)])
+
+    def getAcceleration(self, vehID):
+        return float(self._sim.acceleration[self._slot(vehID)])
+
+    def getLanePosition(self, vehID):
+        return float(self._sim.pos[self._slot(vehID)])
+
+    def getPosition(self, vehID):
+        slot = self._slot(vehID)
+        return float(self._sim.pos[slot]), self._sim.lane_y(slot)
+
+    def setSpeedMode(self, vehID, sm):
+        self._slot(vehID)
+
+    def setLaneChangeMode(self, vehID, lcm):
+        self._slot(vehID)
+
+    def setColor(self, vehID, color):
+        self._slot(vehID)
+
+    def subscribe(self, objectID, varIDs=(tc.VAR_ROAD_ID, tc.VAR_LANEPOSITION),
+                  begin=None, end=None, parameters=None):
+        self._slot(objectID)
+        self._subscriptions[objectID] = (tuple(varIDs), parameters or {})
+
+    def unsubscribe(self, objectID):
+        self._subscriptions.pop(objectID, None)
+
+    def _results(self, vid):
+        slot = self._sim.slots[vid]
+        varIDs, parameters = self._subscriptions[vid]
+        results = {}
+        for var in varIDs:
+            if var == tc.VAR_PARAMETER:
+                key = parameters[tc.VAR_PARAMETER][1]
+                results[var] = self._sim.get_parameter(slot, vid, key)
+            elif var == tc.VAR_LANE_INDEX:
+                results[var] = int(self._sim.lane[slot])
+            elif var == tc.VAR_SPEED:
+                results[var] = float(self._sim.speed[slot])
+            elif var == tc.VAR_ACCELERATION:
+                results[var] = float(self._sim.acceleration[slot])
+            elif var == tc.VAR_LANEPOSITION:
+                results[var] = float(self._sim.pos[slot])
+            elif var == tc.VAR_POSITION:
+                results[var] = (float(self._sim.pos[slot]),
+                                self._sim.lane_y(slot))
+        return results
+
+    def getSubscriptionResults(self, vehID):
+        if vehID not in self._subscriptions or vehID not in self._sim.slots:
+            return {}
+        return self._results(vehID)
+
+    def getAllSubscriptionResults(self):
+        return {vid: self._results(vid) for vid in self._subscriptions
+                if vid in self._sim.slots}
+
+
+class SimulationDomain:
+    """
+    Subset of traci.simulation supported by the stand-in
+    """
+
+    def __init__(self, sim):
+        self._sim = sim
+
+    def getTime(self):
+        return self._sim.time
+
+    def getDeltaT(self):
+        return self._sim.step_length
+
+    def getArrivedIDList(self):
+        return list(self._sim.arrived)
+
+    def getDepartedIDList(self):
+        return list(self._sim.departed)
+
+    def getMinExpectedNumber(self):
+        return len(self._sim.slots)
+
+    def isLoaded(self):
+        return True
+
+
+class Simulation:
+    """
+    traci-like connection to a simulation computed in Python. See the module
+    documentation
+    """
+
+    def __init__(self, step_length=0.1, lanes=3, road_length=100000.0,
+                 lane_width=3.2, capacity=64):
+        """
+        Constructor
+        :param step_length: duration of a simulation step in seconds
+        :param lanes: number of lanes of the road
+        :param road_length: length of the road in meters. Vehicles arrive
+        at the end of the road
+        :param lane_width: width of the lanes in meters, used for the y
+        coordinate of the vehicles
+        :param capacity: initial number of vehicle slots. Arrays are enlarged
+        automatically when required
+        """
+        self.step_length = step_length
+        self.lanes = lanes
+        self.road_length = road_length
+        self.lane_width = lane_width
+        self.time = 0.0
+        self.vehicle = VehicleDomain(self)
+        self.simulation = SimulationDomain(self)
+        # vehicle id to slot and slot to vehicle id (None for free slots)
+        self.slots = {}
+        self.vids = []
+        self._free = []
+        for name, dtype, value in FIELDS:
+            setattr(self, name, np.full(capacity, value, dtype=dtype))
+        # auto feeding vehicles, mapped to their leader and front vehicles
+        self.feeds = {}
+        # data stored through set_vehicle_data, per vehicle and index
+        self.stored = {}
+        # vehicles arrived and departed during the last call to
+        # simulationStep(), and the ones arriving and departing before the
+        # next call
+        self.arrived = []
+        self.departed = []
+        self._arriving = []
+        self._departing = []
+        self._listeners = {}
+        self._next_listener = 0
+
+    def getVersion(self):
+        return tc.TRACI_VERSION, "Plexe stand-in"
+
+    def addStepListener(self, listener):
+        """
+        Adds a step listener, invoked after each simulation step
+        :param listener: a traci.StepListener
+        :return: the listener id
+        """
+        listener_id = self._next_listener
+        self._next_listener += 1
+        self._listeners[listener_id] = listener
+        return listener_id
+
+    def removeStepListener(self, listenerID):
+        return self._listeners.pop(listenerID, None) is not None
+
+    def close(self, wait=True):
+        self._listeners = {}
+
+    def lane_y(self, slot):
+        return (int(self.lane[slot]) + 0.5) * self.lane_width
+
+    def _grow(self):
+        capacity = 2 * len(self.active)
+        for name, dtype, value in FIELDS:
+            old = getattr(self, name)
+            new = np.full(capacity, value, dtype=dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def insert(self, vid, lane, pos, speed):
+        """
+        Inserts a vehicle. Its desired speed is set to the departure speed
+        :param vid: vehicle id
+        :param lane: lane index
+        :param pos: position along the road in meters
+        :param speed: initial speed in m/s
+        """
+        if vid in self.slots:
+            raise traci.TraCIException("The vehicle '%s' to add already "
+                                       "exists." % vid)
+        if len(self._free) > 0:
+            slot = self._free.pop()
+            self.vids[slot] = vid
+        else:
+            slot = len(self.vids)
+            if slot == len(self.active):
+                self._grow()
+            self.vids.append(vid)
+        for name, dtype, value in FIELDS:
+            getattr(self, name)[slot] = value
+        self.slots[vid] = slot
+        self.lane[slot] = min(max(lane, 0), self.lanes - 1)
+        self.pos[slot] = pos
+        self.speed[slot] = speed
+        self.desired_speed[slot] = speed
+        self.active[slot] = True
+        self._departing.append(vid)
+
+    def release(self, vid):
+        """
+        Removes a vehicle from the simulation
+        :param vid: vehicle id
+        """
+        slot = self.slots.pop(vid)
+        self.vids[slot] = None
+        self._free.append(slot)
+        self.active[slot] = False
+        self.feeds.pop(vid, None)
+        self.stored.pop(vid, None)
+        self.vehicle.unsubscribe(vid)
+        self._arriving.append(vid)
+
+    def set_parameter(self, slot, vid, param, value):
+        """
+        Handles a carFollowModel.* parameter write
+        """
+        if not param.startswith(cc.PREFIX):
+            raise traci.TraCIException("Invalid parameter '%s'" % param)
+        par = param[len(cc.PREFIX):]
+        field = _FIELD_PARAMETERS.get(par)
+        if field is not None:
+            getattr(self, field[0])[slot] = field[1](value)
+            return
+        if par in _IGNORED_PARAMETERS:
+            return
+        values = cc.unpack(value)
+        if par == cc.PAR_FIXED_ACCELERATION:
+            self.fixed[slot] = values[0] == 1
+            self.fixed_acceleration[slot] = values[1]
+        elif par == cc.PAR_LEADER_SPEED_AND_ACCELERATION:
+            self.leader_valid[slot] = True
+            self.leader_speed[slot] = values[0]
+            self.leader_acceleration[slot] = values[1]
+            self.leader_time[slot] = values[4]
+            self.leader_u[slot] = values[5]
+        elif par == cc.PAR_PRECEDING_SPEED_AND_ACCELERATION:
+            self.front_valid[slot] = True
+            self.front_speed[slot] = values[0]
+            self.front_acceleration[slot] = values[1]
+            self.front_u[slot] = values[5]
+        elif par == cc.PAR_LEADER_FAKE_DATA:
+            self.fake_leader_speed[slot] = values[0]
+            self.fake_leader_acceleration[slot] = values[1]
+            self.fake_leader_u[slot] = values[2]
+        elif par == cc.PAR_FRONT_FAKE_DATA:
+            self.fake_front_speed[slot] = values[0]
+            self.fake_front_acceleration[slot] = values[1]
+            self.fake_front_distance[slot] = values[2]
+            self.fake_front_u[slot] = values[3]
+        elif par == cc.PAR_USE_AUTO_FEEDING:
+            if values[0] == 1:
+                self.feeds[vid] = (str(values[1]), str(values[2]))
+            else:
+                self.feeds.pop(vid, None)
+        elif par == cc.CC_PAR_VEHICLE_DATA:
+            self.stored.setdefault(vid, {})[values[0]] = values
+        elif par == cc.PAR_PLATOON_FIXED_LANE:
+            self.lane[slot] = min(max(int(values[0]), 0), self.lanes - 1)
+        else:
+            raise traci.TraCIException("Invalid parameter '%s'" % param)
+
+    def get_parameter(self, slot, vid, param):
+        """
+        Handles a carFollowModel.* parameter read
+        """
+        if not param.startswith(cc.PREFIX):
+            raise traci.TraCIException("Invalid parameter '%s'" % param)
+        fields = cc.unpack(param[len(cc.PREFIX):])
+        par = fields[0]
+        if par == cc.PAR_SPEED_AND_ACCELERATION:
+            return cc.pack(self.speed[slot], self.acceleration[slot],
+                           self.u[slot], self.pos[slot], self.lane_y(slot),
+                           self.time)
+        if par == cc.PAR_RADAR_DATA:
+            return cc.pack(self.radar_distance[slot],
+                           self.radar_rel_speed[slot])
+        if par == cc.PAR_CRASHED:
+            return cc.pack(1 if self.crashed[slot] else 0)
+        if par == cc.PAR_LANES_COUNT:
+            return cc.pack(self.lanes)
+        if par == cc.PAR_ACTIVE_CONTROLLER:
+            return cc.pack(self.controller[slot])
+        if par == cc.PAR_CACC_SPACING:
+            return cc.pack(self.cacc_spacing[slot])
+        if par == cc.PAR_ACC_ACCELERATION:
+            return cc.pack(self.acc_acceleration[slot])
+        if par == cc.PAR_DISTANCE_TO_END:
+            return cc.pack(self.road_length - self.pos[slot])
+        if par == cc.PAR_DISTANCE_FROM_BEGIN:
+            return cc.pack(self.pos[slot])
+        if par == cc.PAR_ENGINE_DATA:
+            # gear is -1 for the first order lag model
+            return cc.pack(-1, 0)
+        if par == cc.CC_PAR_VEHICLE_DATA:
+            values = self.stored.get(vid, {}).get(fields[1])
+            if values is None:
+                return cc.pack(-1, 0, 0, 0, 0, 0, 0, 0)
+            return cc.pack(*values)
+        raise traci.TraCIException("Invalid parameter '%s'" % param)
+
+    def _radar(self, idx):
+        """
+        Finds the closest vehicle ahead of each vehicle in the same lane
+        :param idx: slots of the vehicles in the simulation
+        :return: array with the slot of the front vehicle of each slot in
+        idx, or -1, and array of distances (bumper to bumper)
+        """
+        order = idx[np.lexsort((self.pos[idx], self.lane[idx]))]
+        front = np.full(len(self.active), -1, dtype=np.intp)
+        same = self.lane[order[:-1]] == self.lane[order[1:]]
+        front[order[:-1][same]] = order[1:][same]
+        front = front[idx]
+        has_front = front >= 0
+        distance = np.full(len(idx), np.inf)
+        distance[has_front] = self.pos[front[has_front]] - \
+            self.length[front[has_front]] - self.pos[idx[has_front]]
+        return front, distance
+
+    def _feed(self, idx):
+        """
+        Copies the state of the leader and front vehicles of the auto
+        feeding vehicles into the received data
+        """
+        for vid, (leader, front) in self.feeds.items():
+            slot = self.slots[vid]
+            ls = self.slots.get(leader)
+            if ls is not None:
+                self.leader_valid[slot] = True
+                self.leader_speed[slot] = self.speed[ls]
+                self.leader_acceleration[slot] = self.acceleration[ls]
+                self.leader_u[slot] = self.u[ls]
+                self.leader_time[slot] = self.time
+            fs = self.slots.get(front)
+            if fs is not None:
+                self.front_valid[slot] = True
+                self.front_speed[slot] = self.speed[fs]
+                self.front_acceleration[slot] = self.acceleration[fs]
+                self.front_u[slot] = self.u[fs]
+
+    def _control(self, idx, front, distance):
+        """
+        Computes the control input of the vehicles
+        :param idx: slots of the vehicles
+        :param front: slots of the front vehicles (-1 if none)
+        :param distance: distances to the front vehicles
+        :return: array of desired accelerations
+        """
+        speed = self.speed[idx]
+        visible = (front >= 0) & (distance <= RADAR_RANGE)
+        radar_speed = np.where(visible, self.speed[np.maximum(front, 0)],
+                               speed)
+        distance = np.where(visible, distance, np.inf)
+
+        u_cc = ctl.cc(speed, self.desired_speed[idx])
+        u_acc = ctl.acc(speed, radar_speed, distance, self.acc_headway[idx],
+                        self.acc_lambda[idx], u_cc)
+        self.acc_acceleration[idx] = u_acc
+        u = u_acc.copy()
+
+        controller = self.controller[idx]
+        use_u = self.use_controller_acceleration[idx]
+        gains = (self.cacc_spacing[idx], self.xi[idx], self.omega_n[idx],
+                 self.c1[idx])
+
+        # data received from leader and front vehicle. as the distance, the
+        # speed of the front vehicle is measured by the radar. when using
+        # prediction, the leader speed is extrapolated to the current time
+        front_acc = np.where(use_u, self.front_u[idx],
+                             self.front_acceleration[idx])
+        leader_acc = np.where(use_u, self.leader_u[idx],
+                              self.leader_acceleration[idx])
+        leader_speed = self.leader_speed[idx] + np.where(
+            self.use_prediction[idx],
+            leader_acc * (self.time - self.leader_time[idx]), 0)
+
+        # PATH CACC, with data received from leader and front vehicle
+        cacc = (controller == CACC) & visible & self.leader_valid[idx] & \
+            self.front_valid[idx]
+        if cacc.any():
+            u_cacc = ctl.path_cacc(speed, radar_speed, front_acc, distance,
+                                   leader_speed, leader_acc, *gains)
+            u[cacc] = ctl.limit(u_cc, u_cacc, distance)[cacc]
+
+        # PATH CACC, with data and distance given by the user
+        faked = controller == FAKED_CACC
+        if faked.any():
+            fake_distance = self.fake_front_distance[idx]
+            u_faked = ctl.path_cacc(
+                speed, self.fake_front_speed[idx],
+                np.where(use_u, self.fake_front_u[idx],
+                         self.fake_front_acceleration[idx]),
+                fake_distance, self.fake_leader_speed[idx],
+                np.where(use_u, self.fake_leader_u[idx],
+                         self.fake_leader_acceleration[idx]), *gains)
+            u[faked] = ctl.limit(u_cc, u_faked, fake_distance)[faked]
+
+        # PLOEG, integrating the derivative of the control input
+        ploeg = (controller == PLOEG) & visible & self.front_valid[idx]
+        if ploeg.any():
+            u_ploeg = ctl.ploeg(speed, self.acceleration[idx], self.u[idx],
+                                radar_speed, self.front_u[idx], distance,
+                                self.step_length, self.ploeg_h[idx],
+                                self.ploeg_kp[idx], self.ploeg_kd[idx])
+            u[ploeg] = ctl.limit(u_cc, u_ploeg, distance)[ploeg]
+
+        fixed = self.fixed[idx]
+        u[fixed] = self.fixed_acceleration[idx][fixed]
+        return np.clip(u, -self.decel[idx], self.accel[idx])
+
+    def simulationStep(self, step=0.0):
+        """
+        Advances the simulation by one step or, if step is greater than the
+        current time, until that time. Step listeners are invoked once, at
+        the end of the call, as done by traci. Vehicles added or removed
+        since the previous call are reported as departed or arrived, together
+        with the ones departed or arrived during the call
+        :param step: target time in seconds
+        """
+        while True:
+            self._step()
+            if step <= self.time + 1e-9:
+                break
+        self.arrived, self._arriving = self._arriving, []
+        self.departed, self._departing = self._departing, []
+        for listener_id, listener in list(self._listeners.items()):
+            if not listener.step(step):
+                self._listeners.pop(listener_id, None)
+
+    def _step(self):
+        idx = np.flatnonzero(self.active)
+        if len(idx) == 0:
+            self.time = round(self.time + self.step_length, 9)
+            return
+        self._feed(idx)
+        front, distance = self._radar(idx)
+        u = self._control(idx, front, distance)
+
+        # first order lag engine model
+        dt = self.step_length
+        alpha = dt / (self.tau[idx] + dt)
+        acceleration = alpha * u + (1 - alpha) * self.acceleration[idx]
+        speed = self.speed[idx]
+        new_speed = np.maximum(speed + acceleration * dt, 0)
+        self.acceleration[idx] = (new_speed - speed) / dt
+        self.u[idx] = u
+        self.speed[idx] = new_speed
+        self.pos[idx] += new_speed * dt
+        self.time = round(self.time + dt, 9)
+
+        front, distance = self._radar(idx)
+        visible = (front >= 0) & (distance <= RADAR_RANGE)
+        self.crashed[idx[visible & (distance < 0)]] = True
+        self.radar_distance[idx] = np.where(visible, distance, -1)
+        self.radar_rel_speed[idx] = np.where(
+            visible, self.speed[np.maximum(front, 0)] - self.speed[idx], 0)
+
+        for slot in idx[self.pos[idx] >= self.road_length]:
+            self.release(self.vids[slot])
@@ -0,0 +1,158 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Parameter sweeps. A scenario (see plexe.runner) is run for every point of
+a parameter grid, in parallel, and the metrics it returns (a dictionary)
+are appended to a CSV table as soon as each run completes. Points already
+evaluated successfully are not evaluated again, so an interrupted sweep can
+be resumed by running it again with the same output file, e.g.,
+
+    points = grid(distance=[3, 5, 7], xi=[1, 2], omega_n=[0.5, 1],
+                  c1=[0.5])
+    table = sweep(brake_test, "cfg/freeway.sumo.cfg", points,
+                  "sweep.csv")
+"""
+import csv
+import itertools
+import os
+from plexe.runner import iter_scenarios
+
+# columns added to the table besides parameters and metrics
+SEED = "seed"
+ERROR = "error"
+ELAPSED = "elapsed"
+
+
+def grid(**axes):
+    """
+    Builds the cartesian product of a set of parameter values
+    :param axes: for each parameter, the list of values to be evaluated
+    :return: a list of dictionaries, one per grid point
+    """
+    names = list(axes.keys())
+    return [dict(zip(names, values))
+            for values in itertools.product(*[axes[n] for n in names])]
+
+
+def _key(point, names):
+    return tuple(str(point.get(n, "")) for n in names)
+
+
+def read_table(output):
+    """
+    Reads a table written by sweep()
+    :param output: CSV file name
+    :return: a list of dictionaries, one per row. Values are strings
+    """
+    if not os.path.exists(output):
+        return []
+    with open(output, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _write_table(output, fieldnames, rows):
+    """
+    Replaces the content of a table
+    :param output: CSV file name
+    :param fieldnames: columns of the table
+    :param rows: list of dictionaries, one per row
+    """
+    with open(output + ".tmp", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(output + ".tmp", output)
+
+
+def sweep(scenario, config_file, points, output, workers=None, timeout=None,
+          seed=1, sumo_args=(), plexe_args=None, callback=None):
+    """
+    Evaluates a scenario over a set of parameter points
+    :param scenario: scenario function (see plexe.runner), returning a
+    dictionary of metrics
+    :param config_file: SUMO configuration file
+    :param points: list of parameter dictionaries, e.g., built with grid().
+    Parameters missing from a point are left empty in the table
+    :param output: CSV file where results are appended. Points with a
+    successful result already in the file are skipped, while the failed
+    ones are evaluated again and their errors replaced by the new results.
+    The file is rewritten when a result has metrics without a column
+    :param workers: number of worker processes. If None, one per CPU
+    :param timeout: maximum duration of a run in seconds
+    :param seed: random seed used for all the points
+    :param sumo_args: additional command line arguments for SUMO
+    :param plexe_args: additional keyword arguments for the Plexe
+    constructor
+    :param callback: optional function invoked with each ScenarioResult
+    :return: the whole table, as returned by read_table()
+    :raises ValueError: if output already exists and lacks the columns of
+    some of the parameters
+    """
+    if len(points) == 0:
+        return read_table(output)
+    # points may have different parameters, e.g., when sweeping multiple
+    # controllers: use the union of all of them
+    names = []
+    for point in points:
+        names.extend(n for n in point if n not in names)
+    done = set(_key(row, names) for row in read_table(output)
+               if not row.get(ERROR))
+    todo = [(p, seed) for p in points if _key(p, names) not in done]
+
+    rows = read_table(output)
+    if os.path.exists(output) and os.path.getsize(output) > 0:
+        with open(output, newline="") as f:
+            fieldnames = next(csv.reader(f))
+        missing = [n for n in names if n not in fieldnames]
+        if len(missing) > 0:
+            raise ValueError("%s has no column for parameters %s: use a new "
+                             "output file" % (output, ", ".join(missing)))
+    else:
+        # metric columns are added before SEED as soon as they are known
+        fieldnames = names + [SEED, ERROR, ELAPSED]
+    # errors of the points evaluated again are replaced by the new results
+    retried = set(_key(p, names) for p, _ in todo)
+    kept = [row for row in rows
+            if not row.get(ERROR) or _key(row, names) not in retried]
+    if len(kept) < len(rows) or len(rows) == 0:
+        _write_table(output, fieldnames, kept)
+
+    f = open(output, "a", newline="")
+    try:
+        for result in iter_scenarios(scenario, config_file, todo, workers,
+                                     timeout, seed, sumo_args, plexe_args):
+            if callback is not None:
+                callback(result)
+            metrics = result.value if isinstance(result.value, dict) else {}
+            added = [m for m in metrics if m not in fieldnames]
+            if len(added) > 0:
+                f.close()
+                i = fieldnames.index(SEED)
+                fieldnames = fieldnames[:i] + added + fieldnames[i:]
+                _write_table(output, fieldnames, read_table(output))
+                f = open(output, "a", newline="")
+            row = dict(result.params)
+            row.update(metrics)
+            row[SEED] = result.seed
+            row[ERROR] = "" if result.ok else \
+                result.error.strip().splitlines()[-1]
+            row[ELAPSED] = "%.3f" % result.elapsed
+            csv.DictWriter(f, fieldnames, extrasaction="ignore").writerow(row)
+            f.flush()
+    finally:
+        f.close()
+    return read_table(output)
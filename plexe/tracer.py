@@ -0,0 +1,240 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Timeline tracing of a simulation. The tracer records a span for each
+simulation step, for the work done by Plexe as a step listener, for each
+Plexe API call, for the parameter requests sent to SUMO within each call,
+and for any user code wrapped with span() or wrap(). Spans are kept in a
+bounded buffer, dropping the oldest ones, and can be exported in the Chrome
+trace event format, which can be opened with Perfetto
+(https://ui.perfetto.dev) or chrome://tracing:
+
+    tracer = Tracer()
+    tracer.install(plexe)
+    communicate = tracer.wrap(communicate)
+    for step in range(steps):
+        traci.simulationStep()
+        communicate()
+    tracer.export("trace.json")
+
+Nesting shows where each step goes: SUMO computation is the time spent in
+simulationStep outside of the step listeners, socket waits are the spans
+of the parameter requests.
+"""
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+import inspect
+import json
+import os
+import threading
+from time import perf_counter_ns
+
+# categories of the recorded spans
+CAT_SIMULATION = "simulation"
+CAT_LISTENER = "listener"
+CAT_API = "api"
+CAT_TRACI = "traci"
+CAT_USER = "user"
+
+# facade methods which are not traced as API calls. Context managers and
+# coroutines return before their work is done
+_NOT_TRACED = ("step", "pipeline", "batch_writes")
+# implementation methods sending requests to SUMO
+_REQUESTS = ("_set_par", "_get_par", "_get_par_many", "flush",
+             "execute_pipeline", "get_subscription_data")
+# the ones taking vehicle id(s) and parameter as first arguments
+_PAR_REQUESTS = ("_set_par", "_get_par", "_get_par_many")
+
+
+class Tracer:
+    """
+    Records spans in a bounded buffer and exports them as Chrome trace
+    events
+    """
+
+    def __init__(self, capacity=1000000):
+        """
+        Constructor
+        :param capacity: maximum number of spans kept in memory. When full,
+        the oldest spans are dropped
+        """
+        self.spans = deque(maxlen=capacity)
+        # number of spans recorded since the creation or the last clear()
+        self.recorded = 0
+        self.enabled = True
+        # (object, attribute name, previous value or None) of the installed
+        # wrappers
+        self._installed = []
+
+    @property
+    def dropped(self):
+        """
+        Number of spans dropped because the buffer was full
+        """
+        return self.recorded - len(self.spans)
+
+    def record(self, name, cat, start, end, args=None):
+        """
+        Records a span
+        :param name: name of the span
+        :param cat: category (e.g., CAT_USER)
+        :param start: start time as returned by time.perf_counter_ns()
+        :param end: end time as returned by time.perf_counter_ns()
+        :param args: optional dictionary of values shown with the span
+        """
+        if not self.enabled:
+            return
+        self.spans.append((name, cat, start, end - start,
+                           threading.get_ident(), args))
+        self.recorded += 1
+
+    @contextmanager
+    def span(self, name, cat=CAT_USER, args=None):
+        """
+        Context manager recording a span for the code within the block
+        :param name: name of the span
+        :param cat: category
+        :param args: optional dictionary of values shown with the span
+        """
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, cat, start, perf_counter_ns(), args)
+
+    def wrap(self, function, name=None, cat=CAT_USER):
+        """
+        Returns a version of a function which records a span for each call,
+        e.g., for step callbacks. Can also be used as a decorator
+        :param function: function to be traced
+        :param name: name of the spans. Defaults to the function name
+        :param cat: category
+        :return: the traced function
+        """
+        if name is None:
+            name = getattr(function, "__qualname__", repr(function))
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, cat, start, perf_counter_ns())
+        return wrapper
+
+    def _request(self, function, name):
+        """
+        Wraps a method sending requests to SUMO. Spans of single parameter
+        requests are named after the parameter, e.g., "_get_par ccrd"
+        """
+        if name not in _PAR_REQUESTS:
+            return self.wrap(function, name, CAT_TRACI)
+
+        def wrapper(vid, par, *args):
+            start = perf_counter_ns()
+            try:
+                return function(vid, par, *args)
+            finally:
+                self.record(name + " " + par, CAT_TRACI, start,
+                            perf_counter_ns(),
+                            {"vid": vid} if isinstance(vid, str) else None)
+        return wrapper
+
+    def _patch(self, obj, attribute, value):
+        self._installed.append((obj, attribute,
+                                obj.__dict__.get(attribute)
+                                if hasattr(obj, "__dict__") else None))
+        setattr(obj, attribute, value)
+
+    def install(self, plexe, connection=None):
+        """
+        Traces a Plexe instance: simulation steps, its step listener work,
+        its API calls, and the parameter requests of its implementation.
+        Wrappers are installed on the instances, so other instances are not
+        affected. Notice that when the connection is the traci module, the
+        module-level traci.simulationStep function is replaced
+        :param plexe: Plexe instance
+        :param connection: traci connection (or module) whose simulation
+        steps are traced. Defaults to the connection of the Plexe instance
+        """
+        from plexe.plexe import Plexe
+        if connection is None:
+            connection = plexe.connection
+        self._patch(connection, "simulationStep",
+                    self.wrap(connection.simulationStep, "simulationStep",
+                              CAT_SIMULATION))
+        self._patch(plexe, "step",
+                    self.wrap(plexe.step, "Plexe.step", CAT_LISTENER))
+        for name in dir(Plexe):
+            method = getattr(Plexe, name)
+            if name.startswith("_") or name in _NOT_TRACED or \
+                    not inspect.isfunction(method) or \
+                    inspect.iscoroutinefunction(method):
+                continue
+            self._patch(plexe, name,
+                        self.wrap(getattr(plexe, name), name, CAT_API))
+        for name in _REQUESTS:
+            self._patch(plexe.plexe, name,
+                        self._request(getattr(plexe.plexe, name), name))
+
+    def uninstall(self):
+        """
+        Removes all the wrappers installed by install()
+        """
+        while self._installed:
+            obj, attribute, previous = self._installed.pop()
+            if previous is None:
+                delattr(obj, attribute)
+            else:
+                setattr(obj, attribute, previous)
+
+    def clear(self):
+        """
+        Drops all the recorded spans
+        """
+        self.spans.clear()
+        self.recorded = 0
+
+    def events(self):
+        """
+        Returns the recorded spans as Chrome trace events
+        :return: list of complete ("X") events, with times in microseconds
+        """
+        pid = os.getpid()
+        events = []
+        for name, cat, start, duration, tid, args in self.spans:
+            event = {"name": name, "cat": cat, "ph": "X", "ts": start / 1000,
+                     "dur": duration / 1000, "pid": pid, "tid": tid}
+            if args is not None:
+                event["args"] = args
+            events.append(event)
+        return events
+
+    def export(self, f):
+        """
+        Writes the recorded spans in the Chrome trace event JSON format
+        :param f: file name or file object
+        """
+        trace = {"traceEvents": self.events(), "displayTimeUnit": "ms",
+                 "otherData": {"dropped": self.dropped}}
+        if isinstance(f, (str, os.PathLike)):
+            with open(f, "w") as out:
+                json.dump(trace, out)
+        else:
+            json.dump(trace, f)
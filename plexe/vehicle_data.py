@@ -14,7 +14,10 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see http://www.gnu.org/licenses/.
 #
-from plexe import INDEX, U, ACCELERATION, SPEED, POS_X, POS_Y, TIME, LENGTH
+from collections.abc import Mapping
+from operator import attrgetter
+from plexe import INDEX, U, ACCELERATION, SPEED, POS_X, POS_Y, TIME, LENGTH,\
+    GEAR, RPM, RADAR_DISTANCE, RADAR_REL_SPEED
 
 
 class VehicleData:
@@ -23,6 +26,20 @@ class VehicleData:
     (e.g., data.acceleration) or using a dictionary-like access (e.g.,
     data[ACCELERATION]) depending on convenience
     """
+    __slots__ = ("index", "u", "acceleration", "speed", "pos_x", "pos_y",
+                 "time", "length")
+
+    _getters = {
+        INDEX: attrgetter("index"),
+        U: attrgetter("u"),
+        ACCELERATION: attrgetter("acceleration"),
+        SPEED: attrgetter("speed"),
+        POS_X: attrgetter("pos_x"),
+        POS_Y: attrgetter("pos_y"),
+        TIME: attrgetter("time"),
+        LENGTH: attrgetter("length"),
+    }
+
     def __init__(self, index=None, u=None, acceleration=None, speed=None,
                  pos_x=None, pos_y=None, time=None, length=None):
         self.index = index
@@ -35,19 +52,56 @@ class VehicleData:
         self.length = length
 
     def __getitem__(self, item):
-        if item == INDEX:
-            return self.index
-        elif item == U:
-            return self.u
-        elif item == ACCELERATION:
-            return self.acceleration
-        elif item == SPEED:
-            return self.speed
-        elif item == POS_X:
-            return self.pos_x
-        elif item == POS_Y:
-            return self.pos_y
-        elif item == TIME:
-            return self.time
-        elif item == LENGTH:
-            return self.length
+        getter = self._getters.get(item)
+        if getter is None:
+            return None
+        return getter(self)
+
+
+class _SlotsMapping(Mapping):
+    """
+    Base class for read-only records whose fields can be accessed both as
+    attributes and with dictionary keys. Subclasses map each key to the
+    corresponding attribute in _keys
+    """
+    __slots__ = ()
+    _keys = {}
+
+    def __getitem__(self, item):
+        return getattr(self, self._keys[item])
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class RadarData(_SlotsMapping):
+    """
+    Data measured by the radar. Fields can be accessed either directly
+    (e.g., data.distance) or with the plexe.RADAR_DISTANCE and
+    plexe.RADAR_REL_SPEED keys
+    """
+    __slots__ = ("distance", "relative_speed")
+    _keys = {RADAR_DISTANCE: "distance", RADAR_REL_SPEED: "relative_speed"}
+
+    def __init__(self, distance, relative_speed):
+        self.distance = distance
+        self.relative_speed = relative_speed
+
+
+class EngineData(_SlotsMapping):
+    """
+    Data about the engine of a vehicle. Fields can be accessed either
+    directly (e.g., data.rpm) or with the plexe.GEAR and plexe.RPM keys
+    """
+    __slots__ = ("gear", "rpm")
+    _keys = {GEAR: "gear", RPM: "rpm"}
+
+    def __init__(self, gear, rpm):
+        self.gear = gear
+        self.rpm = rpm
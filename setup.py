@@ -8,4 +8,5 @@ setup(name='PlexeAPI',
       author_email='michele.segata@gmail.com',
       license='GPL',
       packages=['plexe', 'plexe.plexe_imp'],
+      extras_require={'numpy': ['numpy'], 'parquet': ['numpy', 'pyarrow']},
       zip_safe=False)
@@ -0,0 +1,64 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the selection of the module used to communicate with SUMO, with a
+stand-in simulation in place of libsumo
+"""
+import sys
+import unittest
+from unittest import mock
+import traci
+from plexe import Plexe, BACKEND_TRACI, BACKEND_LIBSUMO
+from plexe.plexe import _select_backend
+from plexe.standin import Simulation
+
+
+class BackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.libsumo = Simulation()
+        self.libsumo.vehicle.add("v.0", departPos="100", departSpeed="20")
+
+    def test_explicit(self):
+        self.assertIs(_select_backend(BACKEND_TRACI), traci)
+        with mock.patch.dict(sys.modules, {"libsumo": self.libsumo}):
+            self.assertIs(_select_backend(BACKEND_LIBSUMO), self.libsumo)
+            self.assertIs(_select_backend(BACKEND_TRACI), traci)
+        with self.assertRaises(ValueError):
+            _select_backend("sumo")
+
+    def test_automatic(self):
+        with mock.patch.dict(sys.modules):
+            sys.modules.pop("libsumo", None)
+            self.assertIs(_select_backend(None), traci)
+            # libsumo is only used once a simulation has been loaded
+            sys.modules["libsumo"] = self.libsumo
+            self.assertIs(_select_backend(None), self.libsumo)
+            with mock.patch.object(self.libsumo.simulation, "isLoaded",
+                                   return_value=False):
+                self.assertIs(_select_backend(None), traci)
+
+    def test_plexe_on_libsumo(self):
+        with mock.patch.dict(sys.modules, {"libsumo": self.libsumo}):
+            plexe = Plexe()
+        self.assertIs(plexe.connection, self.libsumo)
+        plexe.set_path_cacc_parameters("v.0", 7)
+        self.assertEqual(plexe.get_cacc_spacing("v.0"), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the batched TraCI messages, packed and parsed against the Storage
+class of the traci client
+"""
+import struct
+import threading
+import unittest
+from traci import constants as tc
+from traci.storage import Storage
+from plexe.plexe_imp import batch
+
+
+def status(command, description=""):
+    """
+    Packs the status response to a command
+    """
+    description = description.encode("utf8")
+    content = struct.pack("!BBi", command, tc.RTYPE_OK if not description
+                          else tc.RTYPE_ERR, len(description)) + description
+    return struct.pack("!B", len(content) + 1) + content
+
+
+def parameter(vid, value):
+    """
+    Packs the response to a getParameter command
+    """
+    content = struct.pack("!BB", tc.RESPONSE_GET_VEHICLE_VARIABLE,
+                          tc.VAR_PARAMETER)
+    content += batch._pack_string(vid)[1:] + batch._pack_string(value)
+    return struct.pack("!B", len(content) + 1) + content
+
+
+class Socket:
+
+    def __init__(self, lock):
+        self.lock = lock
+        self.sent = []
+
+    def send(self, message):
+        assert self.lock.locked()
+        self.sent.append(message)
+
+
+class Connection:
+    """
+    Socket connection answering with a prepared response
+    """
+
+    def __init__(self, response):
+        self._lock = threading.Lock()
+        self._socket = Socket(self._lock)
+        self.response = response
+
+    def _recvExact(self):
+        assert self._lock.locked()
+        return Storage(self.response)
+
+
+class PackTest(unittest.TestCase):
+
+    def test_command(self):
+        payload = batch._pack_string("key")
+        data = Storage(batch._pack_command(tc.CMD_GET_VEHICLE_VARIABLE,
+                                           tc.VAR_PARAMETER, "v.è",
+                                           payload))
+        length = data.read("!B")[0]
+        self.assertEqual(length, len(data._content))
+        self.assertEqual(data.read("!BB"), (tc.CMD_GET_VEHICLE_VARIABLE,
+                                            tc.VAR_PARAMETER))
+        self.assertEqual(data.readString(), "v.è")
+        self.assertEqual(data.read("!B")[0], tc.TYPE_STRING)
+        self.assertEqual(data.readString(), "key")
+
+    def test_long_command(self):
+        payload = batch._pack_string("x" * 300)
+        data = Storage(batch._pack_command(tc.CMD_GET_VEHICLE_VARIABLE,
+                                           tc.VAR_PARAMETER, "v.0",
+                                           payload))
+        self.assertEqual(data.read("!B")[0], 0)
+        self.assertEqual(data.read("!i")[0], len(data._content))
+        data.read("!BB")
+        data.readString()
+        data.read("!B")
+        self.assertEqual(data.readString(), "x" * 300)
+
+
+@unittest.skipUnless(getattr(tc, "TRACI_VERSION", None) in
+                     batch.RAW_TRACI_VERSIONS,
+                     "batched messages not supported by this traci client")
+class ExecuteTest(unittest.TestCase):
+
+    def test_get_and_set(self):
+        response = status(tc.CMD_GET_VEHICLE_VARIABLE) + \
+            parameter("v.0", "1.5") + status(tc.CMD_SET_VEHICLE_VARIABLE) + \
+            status(tc.CMD_GET_VEHICLE_VARIABLE) + parameter("v.1", "è")
+        connection = Connection(response)
+        values = batch.execute(connection, [("v.0", "a", None),
+                                            ("v.0", "b", "2"),
+                                            ("v.1", "c", None)])
+        self.assertEqual(values, ["1.5", None, "è"])
+        message = Storage(connection._socket.sent[0])
+        self.assertEqual(message.read("!i")[0], len(message._content))
+
+    def test_error(self):
+        response = status(tc.CMD_SET_VEHICLE_VARIABLE, "unknown vehicle") + \
+            status(tc.CMD_GET_VEHICLE_VARIABLE) + parameter("v.0", "1")
+        connection = Connection(response)
+        with self.assertRaises(batch.traci.TraCIException):
+            batch.execute(connection, [("v.9", "a", "1"), ("v.0", "b", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
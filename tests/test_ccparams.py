@@ -0,0 +1,88 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the packing and unpacking of the parameters exchanged with the
+Plexe car following models
+"""
+import unittest
+from plexe.plexe_imp import ccparams as cc
+
+
+class PackTest(unittest.TestCase):
+
+    def assertRoundTrip(self, *args):
+        self.assertEqual(cc.unpack(cc.pack(*args)), list(args))
+
+    def test_plain_values(self):
+        self.assertEqual(cc.pack(1, 2.5, "abc"), "1:2.5:abc")
+        self.assertRoundTrip(1, 2.5, "abc")
+        self.assertRoundTrip(-3, 1e-05, "v.0")
+        self.assertEqual(cc.unpack(""), [])
+
+    def test_escaped_separators(self):
+        self.assertEqual(cc.pack("a:b", "c"), "a\\:b:c")
+        self.assertRoundTrip("a:b", "c")
+        self.assertRoundTrip(":", ":x:")
+        self.assertRoundTrip("a\\:b")
+
+    def test_trailing_backslashes(self):
+        self.assertEqual(cc.pack("a\\"), "a\\\\")
+        self.assertRoundTrip("a\\")
+        self.assertRoundTrip("a\\", "b")
+        self.assertRoundTrip("\\")
+        self.assertRoundTrip("x", "a\\\\")
+
+    def test_empty_and_quoted_values(self):
+        self.assertRoundTrip("", "")
+        self.assertRoundTrip("x", "")
+        self.assertRoundTrip('"q"')
+
+    def test_trailing_separator(self):
+        self.assertEqual(cc.unpack("1:2:"), [1, 2])
+
+
+class SchemaTest(unittest.TestCase):
+
+    def test_schema_types(self):
+        # without a schema, integral values are read as int
+        self.assertEqual(cc.unpack("1:2"), [1, 2])
+        radar = cc.unpack("1:2", cc.SCHEMAS[cc.PAR_RADAR_DATA])
+        self.assertEqual(radar, [1.0, 2.0])
+        self.assertTrue(all(type(v) is float for v in radar))
+        engine = cc.unpack("3:2000", cc.SCHEMAS[cc.PAR_ENGINE_DATA])
+        self.assertEqual([type(v) for v in engine], [int, float])
+
+    def test_vehicle_data(self):
+        values = [0, 0.5, 1.0, 30.0, 100.0, 2.0, 10.0, 0.1]
+        data = cc.unpack(cc.pack(*values),
+                         cc.SCHEMAS[cc.CC_PAR_VEHICLE_DATA])
+        self.assertEqual(data, values)
+        self.assertEqual([type(v) for v in data],
+                         list(cc.SCHEMAS[cc.CC_PAR_VEHICLE_DATA]))
+
+    def test_values_beyond_schema(self):
+        self.assertEqual(cc.unpack("1.5:x", (float,)), [1.5, "x"])
+        # values not matching the schema fall back to the conversion
+        self.assertEqual(cc.unpack("x", (float,)), ["x"])
+
+    def test_schema_keys(self):
+        for key in cc.SCHEMAS:
+            self.assertEqual(cc.KEYS[key], cc.PREFIX + key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the binding of Plexe instances to the simulation they drive, with
+stand-in simulations in place of the SUMO instances
+"""
+import unittest
+from unittest import mock
+import traci
+from plexe import Plexe
+from plexe.standin import Simulation
+
+
+class ConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sims = {"a": Simulation(), "b": Simulation()}
+        for sim in self.sims.values():
+            sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+
+    def check_independent(self, plexe_a, plexe_b):
+        plexe_a.set_path_cacc_parameters("v.0", 7)
+        plexe_b.set_path_cacc_parameters("v.0", 9)
+        self.assertEqual(plexe_a.get_cacc_spacing("v.0"), 7)
+        self.assertEqual(plexe_b.get_cacc_spacing("v.0"), 9)
+
+    def test_connection(self):
+        plexe_a = Plexe(connection=self.sims["a"])
+        plexe_b = Plexe(connection=self.sims["b"])
+        self.assertIs(plexe_a.connection, self.sims["a"])
+        self.check_independent(plexe_a, plexe_b)
+
+    def test_label(self):
+        with mock.patch.object(traci, "getConnection", self.sims.get):
+            plexe_a = Plexe(label="a")
+            plexe_b = Plexe(label="b")
+            # the connection takes precedence over the label
+            plexe = Plexe(connection=self.sims["b"], label="a")
+        self.assertIs(plexe_a.connection, self.sims["a"])
+        self.assertIs(plexe.connection, self.sims["b"])
+        self.check_independent(plexe_a, plexe_b)
+
+    def test_snapshots(self):
+        plexes = {}
+        for label, sim in self.sims.items():
+            plexes[label] = Plexe(connection=sim)
+            sim.addStepListener(plexes[label])
+            plexes[label].register_vehicle("v.0")
+        self.sims["a"].simulationStep()
+        self.assertIn("v.0", plexes["a"].snapshot)
+        # the other simulation has not been advanced
+        self.assertNotIn("v.0", plexes["b"].snapshot)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the vectorized controllers evaluated over a FleetState, driven by
+the stand-in simulation
+"""
+import unittest
+import numpy as np
+from plexe import Plexe
+from plexe import controllers as ctl
+from plexe.fleet_state import FleetState
+from plexe.standin import Simulation
+
+
+class FleetControllersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = Simulation()
+        plexe = Plexe(connection=self.sim)
+        self.sim.addStepListener(plexe)
+        self.fleet = FleetState(plexe)
+        self.sim.addStepListener(self.fleet)
+        self.vids = ["v.%d" % i for i in range(3)]
+        for i, vid in enumerate(self.vids):
+            self.sim.vehicle.add(vid, departPos=str(100 - 10 * i),
+                                 departSpeed=str(20 + i))
+            self.fleet.add(vid, length=4)
+        self.sim.simulationStep()
+
+    def test_path_cacc_without_leader(self):
+        slots = self.fleet.slots_of(self.vids)
+        # a vehicle without leader uses its front vehicle as leader
+        u = ctl.fleet_path_cacc(self.fleet, slots[1:], slots[:-1],
+                                [-1, slots[1]])
+        expected = ctl.fleet_path_cacc(self.fleet, slots[1:], slots[:-1],
+                                       slots[:-1])
+        self.assertTrue(np.allclose(u, expected))
+        # while the last slot is an unrelated vehicle
+        other = ctl.fleet_path_cacc(self.fleet, slots[1:], slots[:-1],
+                                    [slots[-1], slots[1]])
+        self.assertFalse(np.isclose(u[0], other[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the step listeners tracking vehicles registered for the Plexe
+snapshot, driven by the stand-in simulation
+"""
+import math
+import tempfile
+import unittest
+from plexe import Plexe
+from plexe.fleet_state import FleetState
+from plexe.metrics import PlatoonMetrics
+from plexe.recorder import DTYPE, Recorder, chunks, load, vehicles
+from plexe.safety import GAP, SafetyMonitor
+from plexe.standin import Simulation
+
+
+class ListenerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = Simulation()
+        self.plexe = Plexe(connection=self.sim)
+        self.sim.addStepListener(self.plexe)
+
+    def add_vehicle(self, vid, pos=100, speed=20):
+        self.sim.vehicle.add(vid, departPos=str(pos), departSpeed=str(speed))
+
+    def test_split_registered(self):
+        self.add_vehicle("v.0")
+        self.plexe.register_vehicle("v.0")
+        self.assertEqual(self.plexe.split_registered(["v.0"]), ([], []))
+        self.sim.simulationStep()
+        self.assertEqual(self.plexe.split_registered(["v.0"]),
+                         (["v.0"], []))
+        self.sim.vehicle.remove("v.0")
+        self.sim.simulationStep()
+        self.assertEqual(self.plexe.split_registered(["v.0"]),
+                         ([], ["v.0"]))
+
+    def test_fleet_state(self):
+        fleet = FleetState(self.plexe)
+        self.sim.addStepListener(fleet)
+        self.add_vehicle("v.0")
+        fleet.add("v.0", length=4)
+        # no data until the vehicle is in the snapshot
+        fleet.refresh()
+        self.assertTrue(math.isnan(fleet.speed[fleet.slot("v.0")]))
+        self.sim.simulationStep()
+        self.assertAlmostEqual(fleet.speed[fleet.slot("v.0")], 20, delta=0.5)
+        self.sim.vehicle.remove("v.0")
+        self.sim.simulationStep()
+        self.assertNotIn("v.0", fleet.slots)
+
+    def test_recorder(self):
+        with tempfile.TemporaryDirectory() as path:
+            recorder = Recorder(self.plexe, path, chunk_size=4)
+            self.sim.addStepListener(recorder)
+            self.add_vehicle("v.0")
+            recorder.add("v.0")
+            for _ in range(5):
+                self.sim.simulationStep()
+            self.sim.vehicle.remove("v.0")
+            self.sim.simulationStep()
+            self.assertEqual(recorder.recording, [])
+            recorder.close()
+            parts = chunks(path)
+            # columns are stored separately
+            self.assertEqual([len(p["time"]) for p in parts], [4, 1])
+            self.assertEqual(sorted(parts[0]), sorted(DTYPE.names))
+            data = load(path)
+            self.assertEqual(len(data), 5)
+            self.assertEqual(data["time"].tolist(),
+                             parts[0]["time"].tolist() +
+                             parts[1]["time"].tolist())
+            self.assertTrue((data["vehicle"] == vehicles(path)["v.0"]).all())
+            self.assertTrue((data["speed"] > 19).all())
+
+    def test_safety_monitor(self):
+        monitor = SafetyMonitor(self.plexe, gap_threshold=10)
+        self.sim.addStepListener(monitor)
+        events = []
+        monitor.add_callback(events.append)
+        self.add_vehicle("v.0", pos=100)
+        self.add_vehicle("v.1", pos=92)
+        monitor.add("v.0")
+        monitor.add("v.1")
+        # vehicles not in the snapshot yet are not checked
+        monitor.step()
+        self.assertEqual(monitor.min_distances(),
+                         {"v.0": math.inf, "v.1": math.inf})
+        self.sim.simulationStep()
+        self.assertEqual([(e.vid, e.kind) for e in events], [("v.1", GAP)])
+        self.assertAlmostEqual(monitor.min_distances()["v.1"], 4, delta=0.5)
+        self.sim.vehicle.remove("v.1")
+        self.sim.simulationStep()
+        self.assertEqual(monitor.vids, ["v.0"])
+        self.assertIn("v.1", monitor.min_distances())
+
+    def test_platoon_metrics(self):
+        self.add_vehicle("v.0", pos=100)
+        self.add_vehicle("v.1", pos=91)
+        metrics = PlatoonMetrics(self.plexe, ["v.0", "v.1"])
+        self.sim.addStepListener(metrics)
+        # members not in the snapshot yet are skipped
+        metrics.step()
+        self.assertEqual(metrics.speed.count.tolist(), [0, 0])
+        for _ in range(10):
+            self.sim.simulationStep()
+        self.assertEqual(metrics.speed.count.tolist(), [10, 10])
+        self.assertEqual(metrics.gap.count.tolist(), [0, 10])
+        self.sim.vehicle.remove("v.1")
+        self.sim.simulationStep()
+        self.assertEqual(metrics.speed.count.tolist(), [11, 10])
+
+    def test_shared_registrations(self):
+        fleet = FleetState(self.plexe)
+        monitor = SafetyMonitor(self.plexe)
+        self.sim.addStepListener(fleet)
+        self.sim.addStepListener(monitor)
+        self.add_vehicle("v.0", pos=100)
+        self.add_vehicle("v.1", pos=80)
+        for vid in ("v.0", "v.1"):
+            fleet.add(vid, length=4)
+            monitor.add(vid)
+        self.sim.simulationStep()
+        # removing a vehicle from a listener does not affect the others
+        fleet.remove("v.1")
+        self.sim.simulationStep()
+        self.assertEqual(monitor.vids, ["v.0", "v.1"])
+        self.assertIn("v.1", self.plexe.snapshot)
+        monitor.remove("v.1")
+        self.assertNotIn("v.1", self.plexe.registered)
+        self.assertEqual(self.plexe.registered, {"v.0": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the pipelined and asynchronous getters, driven by the stand-in
+simulation
+"""
+import asyncio
+import unittest
+from plexe import Plexe
+from plexe.plexe_imp import ccparams as cc
+from plexe.standin import Simulation
+
+
+class PipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = Simulation()
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.sim.vehicle.add("v.1", departPos="80", departSpeed="20")
+        self.plexe = Plexe(connection=self.sim)
+        self.sim.addStepListener(self.plexe)
+        self.sim.simulationStep()
+        # parameter requests received by the simulation, in order
+        self.requests = []
+        vehicle = self.sim.vehicle
+        get_parameter = vehicle.getParameter
+        set_parameter = vehicle.setParameter
+
+        def get(vid, key):
+            self.requests.append(("get", vid, key[len(cc.PREFIX):]))
+            return get_parameter(vid, key)
+
+        def set(vid, key, value):
+            self.requests.append(("set", vid, key[len(cc.PREFIX):]))
+            set_parameter(vid, key, value)
+        vehicle.getParameter = get
+        vehicle.setParameter = set
+        # requests sent as a single message
+        self.executions = 0
+        execute_pipeline = self.plexe.plexe.execute_pipeline
+
+        def execute(gets):
+            self.executions += 1
+            return execute_pipeline(gets)
+        self.plexe.plexe.execute_pipeline = execute
+
+    def test_pipeline(self):
+        with self.plexe.pipeline() as p:
+            spacing = p.get_cacc_spacing("v.0")
+            radar = p.get_radar_data("v.1")
+            self.plexe.set_path_cacc_parameters("v.0", 7)
+            self.assertFalse(spacing.done)
+            with self.assertRaises(RuntimeError):
+                spacing.result()
+            self.assertEqual(self.requests, [])
+        self.assertEqual(self.executions, 1)
+        # the gets observe the writes of the block
+        self.assertEqual(self.requests,
+                         [("set", "v.0", cc.PAR_CACC_SPACING),
+                          ("get", "v.0", cc.PAR_CACC_SPACING),
+                          ("get", "v.1", cc.PAR_RADAR_DATA)])
+        self.assertEqual(spacing.result(), 7)
+        self.assertEqual(radar.result(), self.plexe.get_radar_data("v.1"))
+
+    def test_local_results(self):
+        self.plexe.register_vehicle("v.0")
+        self.sim.simulationStep()
+        with self.plexe.pipeline() as p:
+            data = p.get_vehicle_data("v.0")
+            # resolved from the snapshot
+            self.assertTrue(data.done)
+        self.assertEqual(self.requests, [])
+        self.assertEqual(data.result(), self.plexe.snapshot["v.0"])
+
+    def test_error(self):
+        with self.assertRaises(Exception) as error:
+            with self.plexe.pipeline() as p:
+                crashed = p.get_crashed("v.0")
+                missing = p.get_crashed("v.9")
+        self.assertIs(type(missing._error), type(error.exception))
+        with self.assertRaises(type(error.exception)):
+            crashed.result()
+
+    def test_exception_in_block(self):
+        with self.assertRaises(KeyError):
+            with self.plexe.pipeline() as p:
+                spacing = p.get_cacc_spacing("v.0")
+                self.plexe.set_path_cacc_parameters("v.0", 7)
+                raise KeyError()
+        # writes are sent, while gets are dropped
+        self.assertEqual(self.requests,
+                         [("set", "v.0", cc.PAR_CACC_SPACING)])
+        self.assertFalse(spacing.done)
+
+    def test_async(self):
+        async def vehicle(vid):
+            radar = await self.plexe.aget_radar_data(vid)
+            crashed = await self.plexe.aget_crashed(vid)
+            return radar, crashed
+
+        async def main():
+            return await asyncio.gather(vehicle("v.0"), vehicle("v.1"))
+        results = asyncio.run(main())
+        # the requests of both tasks are sent together, twice
+        self.assertEqual(self.executions, 2)
+        self.assertLess(results[0][0].distance, 0)
+        self.assertEqual(results[1][0], self.plexe.get_radar_data("v.1"))
+        self.assertEqual([r[1] for r in results], [False, False])
+
+    def test_async_error(self):
+        async def main():
+            return await asyncio.gather(self.plexe.aget_crashed("v.0"),
+                                        self.plexe.aget_crashed("v.9"),
+                                        return_exceptions=True)
+        results = asyncio.run(main())
+        self.assertIsInstance(results[0], Exception)
+        self.assertIsInstance(results[1], Exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
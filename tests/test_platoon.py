@@ -0,0 +1,94 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the platoon topology and of the requests it sends to SUMO
+"""
+import unittest
+from plexe.platoon import Platoon
+
+
+class Calls:
+    """
+    Records the member management requests of Platoon.apply()
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def set_vehicle_position(self, vid, position):
+        pass
+
+    def add_member(self, leader, vid, position):
+        self.calls.append(("add", leader, vid))
+
+    def remove_member(self, leader, vid):
+        self.calls.append(("remove", leader, vid))
+
+
+class PlatoonTest(unittest.TestCase):
+
+    def test_topology(self):
+        platoon = Platoon(["v.0", "v.1", "v.2"])
+        self.assertEqual(platoon.leader, "v.0")
+        self.assertEqual(platoon.front_of("v.2"), "v.1")
+        platoon.join("v.3", 1)
+        self.assertEqual(platoon.members, ["v.0", "v.3", "v.1", "v.2"])
+        self.assertEqual(platoon.front_of("v.1"), "v.3")
+        tail = platoon.split("v.1")
+        self.assertEqual(tail.members, ["v.1", "v.2"])
+        self.assertEqual(tail.front_of("v.1"), "v.3")
+        platoon.merge(tail)
+        self.assertEqual(platoon.members, ["v.0", "v.3", "v.1", "v.2"])
+        self.assertEqual(len(tail), 0)
+
+    def test_remove_member_from_old_leader(self):
+        plexe = Calls()
+        platoon = Platoon(["v.0", "v.1", "v.2"])
+        platoon.apply(plexe)
+        plexe.calls = []
+        platoon.leave("v.0")
+        platoon.leave("v.2")
+        platoon.apply(plexe)
+        self.assertIn(("remove", "v.0", "v.2"), plexe.calls)
+        self.assertNotIn(("remove", "v.1", "v.2"), plexe.calls)
+
+    def test_leader_changes(self):
+        plexe = Calls()
+        platoon = Platoon(["v.0", "v.1", "v.2"])
+        platoon.apply(plexe)
+        plexe.calls = []
+        tail = platoon.split("v.1")
+        tail.apply(plexe)
+        # the new leader and its follower leave the former leader
+        self.assertEqual(sorted(plexe.calls), [("add", "v.1", "v.2"),
+                                               ("remove", "v.0", "v.1"),
+                                               ("remove", "v.0", "v.2")])
+        self.assertEqual(tail.added, {"v.2": "v.1"})
+
+    def test_duplicates(self):
+        platoon = Platoon(["v.0", "v.1"])
+        with self.assertRaises(ValueError):
+            platoon.join("v.1")
+        with self.assertRaises(ValueError):
+            Platoon(["v.0", "v.0"])
+        with self.assertRaises(ValueError):
+            platoon.merge(Platoon(["v.2", "v.0"]))
+        self.assertEqual(platoon.members, ["v.0", "v.1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
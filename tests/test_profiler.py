@@ -0,0 +1,82 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the per parameter profiling, driven by the stand-in simulation
+"""
+import time
+import unittest
+from plexe import Plexe
+from plexe.plexe_imp import ccparams as cc
+from plexe.standin import Simulation
+
+# duration of a parameter write in the simulation, in seconds
+WRITE_TIME = 0.02
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = Simulation()
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.plexe = Plexe(connection=self.sim, profile=True,
+                           defer_writes=True)
+        self.sim.addStepListener(self.plexe)
+
+    def test_counts(self):
+        self.plexe.set_cc_desired_speed("v.0", 20)
+        self.plexe.set_cc_desired_speed("v.0", 25)
+        self.sim.simulationStep()
+        self.plexe.get_radar_data("v.0")
+        self.plexe.get_radar_data("v.0")
+        stats = self.plexe.stats()
+        parameters = stats["parameters"]
+        self.assertEqual(parameters["set " + cc.PAR_CC_DESIRED_SPEED]["calls"],
+                         2)
+        self.assertEqual(parameters["get " + cc.PAR_RADAR_DATA]["calls"], 2)
+        # the two writes are coalesced and sent by a single flush
+        self.assertEqual(parameters["batch flush"]["calls"], 1)
+        self.assertEqual(stats["methods"]["set_cc_desired_speed"]["calls"], 2)
+        self.assertEqual(stats["methods"]["get_radar_data"]["calls"], 2)
+        self.assertEqual(stats["methods"]["flush"]["calls"], 1)
+        self.plexe.reset_stats()
+        self.assertEqual(self.plexe.stats(), {"parameters": {},
+                                              "methods": {}})
+
+    def test_nested_flush(self):
+        set_parameter = self.sim.vehicle.setParameter
+
+        def slow(vid, key, value):
+            time.sleep(WRITE_TIME)
+            set_parameter(vid, key, value)
+        self.sim.vehicle.setParameter = slow
+        self.plexe.set_cc_desired_speed("v.0", 25)
+        # the get flushes the write to the same vehicle first
+        self.plexe.get_radar_data("v.0")
+        parameters = self.plexe.stats()["parameters"]
+        flush = parameters["batch flush"]
+        get = parameters["get " + cc.PAR_RADAR_DATA]
+        self.assertGreaterEqual(flush["total_us"], WRITE_TIME * 1e6)
+        self.assertLess(get["total_us"], WRITE_TIME * 1e6)
+        self.assertEqual(flush["bytes"], len(cc.KEYS[cc.PAR_CC_DESIRED_SPEED] +
+                                             "25"))
+        self.assertEqual(get["bytes"], len(cc.KEYS[cc.PAR_RADAR_DATA]) +
+                         len(self.sim.vehicle.getParameter(
+                             "v.0", cc.KEYS[cc.PAR_RADAR_DATA])))
+
+
+if __name__ == "__main__":
+    unittest.main()
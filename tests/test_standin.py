@@ -0,0 +1,178 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the Plexe API driven by the stand-in simulation (plexe.standin),
+which only require the traci Python package
+"""
+import unittest
+import traci
+from plexe import Plexe, ACC, CACC, PLOEG
+from plexe.communication import BeaconExchange
+from plexe.standin import Simulation
+
+# vehicle length
+LENGTH = 4
+# cruising speed
+SPEED = 100 / 3.6
+
+
+class Counter(traci.StepListener):
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.calls = 0
+        self.departed = []
+        self.arrived = []
+
+    def step(self, t=0):
+        self.calls += 1
+        self.departed.extend(self.sim.simulation.getDepartedIDList())
+        self.arrived.extend(self.sim.simulation.getArrivedIDList())
+        return True
+
+
+class StandinTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = Simulation()
+        self.plexe = Plexe(connection=self.sim, cache_parameters=True)
+        self.sim.addStepListener(self.plexe)
+
+    def add_platoon(self, controller, n=4, distance=5):
+        """
+        Adds a platoon with the given controller for the followers, fed
+        through a BeaconExchange
+        """
+        exchange = BeaconExchange(self.plexe, length=LENGTH)
+        vids = ["v.%d" % i for i in range(n)]
+        for i, vid in enumerate(vids):
+            self.sim.vehicle.add(vid, departPos=str((n - i) *
+                                                    (distance + LENGTH)),
+                                 departSpeed=str(SPEED), departLane="0")
+            self.plexe.set_cc_desired_speed(vid, SPEED)
+            self.plexe.set_path_cacc_parameters(vid, distance, 2, 1, 0.5)
+            self.plexe.set_ploeg_cacc_parameters(vid, 0.2, 0.7, 0.5)
+            if i == 0:
+                self.plexe.set_active_controller(vid, ACC)
+                continue
+            self.plexe.set_active_controller(vid, controller)
+            exchange.update(vid, vids[0], vids[i - 1])
+        return vids, exchange
+
+    def run_platoon(self, vids, exchange, steps, brake_at=None):
+        """
+        Runs the simulation, exchanging beacons every 100 ms
+        :return: minimum and maximum gap measured by the followers
+        """
+        gaps = []
+        for step in range(steps):
+            self.sim.simulationStep()
+            if step % 10 == 1:
+                exchange.communicate()
+            if step == brake_at:
+                self.plexe.set_fixed_acceleration(vids[0], True, -6)
+            radar = self.plexe.get_radar_data_many(vids[1:])
+            gaps.extend(r.distance for r in radar.values() if r.distance >= 0)
+        return min(gaps), max(gaps)
+
+    def test_cacc_keeps_spacing(self):
+        vids, exchange = self.add_platoon(CACC, distance=5)
+        self.run_platoon(vids, exchange, 300)
+        min_gap, max_gap = self.run_platoon(vids, exchange, 100)
+        self.assertAlmostEqual(min_gap, 5, delta=0.1)
+        self.assertAlmostEqual(max_gap, 5, delta=0.1)
+
+    def test_ploeg_keeps_headway(self):
+        vids, exchange = self.add_platoon(PLOEG, distance=10)
+        self.run_platoon(vids, exchange, 600)
+        min_gap, max_gap = self.run_platoon(vids, exchange, 100)
+        # standstill distance plus 0.5 s of headway
+        self.assertAlmostEqual(min_gap, 2 + 0.5 * SPEED, delta=0.2)
+        self.assertAlmostEqual(max_gap, 2 + 0.5 * SPEED, delta=0.2)
+
+    def test_emergency_braking(self):
+        vids, exchange = self.add_platoon(CACC)
+        min_gap, _ = self.run_platoon(vids, exchange, 600, brake_at=100)
+        self.assertGreater(min_gap, 0)
+        crashed = self.plexe.get_crashed_many(vids)
+        self.assertFalse(any(crashed.values()))
+        data = self.plexe.get_vehicles_data(vids)
+        for vid in vids:
+            self.assertAlmostEqual(data[vid].speed, 0)
+
+    def test_radar(self):
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.sim.vehicle.add("v.1", departPos="80", departSpeed="25")
+        self.sim.vehicle.add("v.2", departPos="90", departSpeed="20",
+                             departLane="1")
+        self.sim.simulationStep()
+        radar = self.plexe.get_radar_data_many(["v.0", "v.1", "v.2"])
+        self.assertLess(radar["v.0"].distance, 0)
+        self.assertLess(radar["v.2"].distance, 0)
+        self.assertAlmostEqual(radar["v.1"].distance, 20 - LENGTH - 0.5,
+                               delta=0.2)
+        self.assertAlmostEqual(radar["v.1"].relative_speed, -5, delta=0.5)
+
+    def test_listeners_once_per_call(self):
+        counter = Counter(self.sim)
+        self.sim.addStepListener(counter)
+        self.sim.simulationStep()
+        self.sim.simulationStep(self.sim.simulation.getTime() + 1)
+        self.assertEqual(counter.calls, 2)
+
+    def test_departed_and_arrived_between_steps(self):
+        counter = Counter(self.sim)
+        self.sim.addStepListener(counter)
+        self.sim.simulationStep()
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.assertEqual(counter.departed, [])
+        self.sim.simulationStep()
+        self.assertEqual(counter.departed, ["v.0"])
+        self.assertEqual(self.sim.simulation.getDepartedIDList(), ["v.0"])
+        self.sim.vehicle.remove("v.0")
+        self.sim.simulationStep()
+        self.assertEqual(counter.arrived, ["v.0"])
+        self.sim.simulationStep()
+        self.assertEqual(self.sim.simulation.getArrivedIDList(), [])
+        self.assertEqual(counter.departed, ["v.0"])
+
+    def test_parameter_mirror_invalidation(self):
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.plexe.set_path_cacc_parameters("v.0", 7, 2, 1, 0.5)
+        self.sim.simulationStep()
+        self.assertEqual(self.plexe.get_cacc_spacing("v.0"), 7)
+        # a new vehicle with the same id must not see the old parameters
+        self.sim.vehicle.remove("v.0")
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.sim.simulationStep()
+        self.assertEqual(self.plexe.get_cacc_spacing("v.0"), 5)
+
+    def test_snapshot(self):
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.plexe.register_vehicle("v.0")
+        self.sim.simulationStep()
+        data = self.plexe.snapshot["v.0"]
+        self.assertAlmostEqual(data.speed, 20, delta=0.5)
+        self.assertEqual(self.plexe.get_vehicle_data("v.0"), data)
+        self.sim.vehicle.remove("v.0")
+        self.sim.simulationStep()
+        self.assertNotIn("v.0", self.plexe.registered)
+        self.assertNotIn("v.0", self.plexe.snapshot)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the table written by parameter sweeps, with the scenario runs
+replaced by precomputed results
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+from plexe import sweep
+from plexe.runner import ScenarioResult
+
+
+def runs(outcomes):
+    """
+    Returns a replacement for iter_scenarios() yielding, for each point, the
+    result of calling outcomes with its parameters: a dictionary of metrics,
+    or a string with the error
+    """
+    def iter_scenarios(scenario, config_file, param_sets, *args):
+        for i, (params, seed) in enumerate(param_sets):
+            value = outcomes(**params)
+            if isinstance(value, str):
+                yield ScenarioResult(i, params, seed, error=value, elapsed=1)
+            else:
+                yield ScenarioResult(i, params, seed, value, elapsed=1)
+    return iter_scenarios
+
+
+class SweepTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.dir.name, "sweep.csv")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def run_sweep(self, points, outcomes):
+        with mock.patch.object(sweep, "iter_scenarios", runs(outcomes)):
+            return sweep.sweep(None, "config", points, self.output)
+
+    def test_failures_before_success(self):
+        points = sweep.grid(x=[1, 2])
+        table = self.run_sweep(points, lambda x: "failed")
+        self.assertEqual([(r["x"], r[sweep.ERROR]) for r in table],
+                         [("1", "failed"), ("2", "failed")])
+        # metric columns are added when the first success arrives
+        table = self.run_sweep(points + sweep.grid(x=[3]),
+                               lambda x: {"m": x * 10} if x > 1 else "again")
+        self.assertEqual([(r["x"], r["m"], r[sweep.ERROR]) for r in table],
+                         [("1", "", "again"), ("2", "20", ""),
+                          ("3", "30", "")])
+        with open(self.output) as f:
+            self.assertEqual(f.readline().strip(), "x,m,seed,error,elapsed")
+
+    def test_resume(self):
+        points = sweep.grid(x=[1, 2])
+        self.run_sweep(points, lambda x: {"m": x})
+        calls = []
+        table = self.run_sweep(points, lambda x: calls.append(x) or {"m": x})
+        self.assertEqual(calls, [])
+        self.assertEqual(len(table), 2)
+
+    def test_missing_parameter_columns(self):
+        self.run_sweep(sweep.grid(x=[1]), lambda x: {"m": x})
+        with self.assertRaises(ValueError):
+            self.run_sweep(sweep.grid(x=[1], y=[2]), lambda x, y: {"m": x})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the timeline tracer, driven by the stand-in simulation
+"""
+import io
+import json
+import unittest
+from plexe import Plexe
+from plexe.plexe_imp import ccparams as cc
+from plexe.standin import Simulation
+from plexe.tracer import Tracer, CAT_API, CAT_LISTENER, CAT_SIMULATION, \
+    CAT_TRACI, CAT_USER
+
+
+class TracerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = Simulation()
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.plexe = Plexe(connection=self.sim)
+        self.sim.addStepListener(self.plexe)
+        self.tracer = Tracer()
+        self.tracer.install(self.plexe)
+
+    def spans(self, cat=None):
+        """
+        Returns the (name, start, end) tuples of the recorded spans
+        """
+        return [(name, start, start + duration)
+                for name, c, start, duration, _, _ in self.tracer.spans
+                if cat is None or c == cat]
+
+    def assertInside(self, inner, outer):
+        self.assertGreaterEqual(inner[1], outer[1])
+        self.assertLessEqual(inner[2], outer[2])
+
+    def test_nesting(self):
+        self.sim.simulationStep()
+        self.plexe.get_radar_data("v.0")
+        step, = self.spans(CAT_SIMULATION)
+        listener, = self.spans(CAT_LISTENER)
+        api, = self.spans(CAT_API)
+        request, = [s for s in self.spans(CAT_TRACI)
+                    if s[0] == "_get_par " + cc.PAR_RADAR_DATA]
+        self.assertEqual(step[0], "simulationStep")
+        self.assertEqual(listener[0], "Plexe.step")
+        self.assertEqual(api[0], "get_radar_data")
+        self.assertInside(listener, step)
+        self.assertInside(request, api)
+
+    def test_user_spans(self):
+        @self.tracer.wrap
+        def communicate():
+            pass
+        communicate()
+        with self.tracer.span("beacons", args={"n": 2}):
+            pass
+        self.tracer.enabled = False
+        communicate()
+        self.assertEqual([s[0] for s in self.spans(CAT_USER)],
+                         [communicate.__qualname__, "beacons"])
+
+    def test_capacity(self):
+        tracer = Tracer(capacity=2)
+        for i in range(5):
+            tracer.record(str(i), CAT_USER, i, i + 1)
+        self.assertEqual([s[0] for s in tracer.spans], ["3", "4"])
+        self.assertEqual(tracer.dropped, 3)
+        tracer.clear()
+        self.assertEqual(tracer.dropped, 0)
+
+    def test_export(self):
+        self.plexe.set_cc_desired_speed("v.0", 30)
+        out = io.StringIO()
+        self.tracer.export(out)
+        trace = json.loads(out.getvalue())
+        names = [e["name"] for e in trace["traceEvents"]]
+        self.assertEqual(names, ["_set_par " + cc.PAR_CC_DESIRED_SPEED,
+                                 "set_cc_desired_speed"])
+        event = trace["traceEvents"][0]
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"], {"vid": "v.0"})
+        self.assertEqual(trace["otherData"]["dropped"], 0)
+
+    def test_uninstall(self):
+        self.tracer.uninstall()
+        self.assertNotIn("simulationStep", vars(self.sim))
+        self.assertNotIn("_set_par", vars(self.plexe.plexe))
+        self.sim.simulationStep()
+        self.plexe.set_cc_desired_speed("v.0", 30)
+        self.assertEqual(len(self.tracer.spans), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#
+# Copyright (c) 2018-2022 Michele Segata <segata@ccs-labs.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see http://www.gnu.org/licenses/.
+#
+"""
+Tests of the parameter writes sent to SUMO when deferring writes and when
+mirroring parameters, driven by the stand-in simulation
+"""
+import unittest
+from plexe import Plexe
+from plexe.platoon import Platoon
+from plexe.plexe_imp import ccparams as cc
+from plexe.standin import Simulation
+
+
+class WritesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = Simulation()
+        self.sim.vehicle.add("v.0", departPos="100", departSpeed="20")
+        self.sim.vehicle.add("v.1", departPos="80", departSpeed="20")
+        # parameter writes received by the simulation, in order
+        self.writes = []
+        set_parameter = self.sim.vehicle.setParameter
+
+        def record(vid, key, value):
+            self.writes.append((vid, key[len(cc.PREFIX):], value))
+            set_parameter(vid, key, value)
+        self.sim.vehicle.setParameter = record
+
+    def create(self, **kwargs):
+        plexe = Plexe(connection=self.sim, **kwargs)
+        self.sim.addStepListener(plexe)
+        return plexe
+
+    def test_coalescing(self):
+        plexe = self.create()
+        with plexe.batch_writes():
+            plexe.set_cc_desired_speed("v.0", 10)
+            plexe.set_cc_desired_speed("v.1", 15)
+            plexe.set_cc_desired_speed("v.0", 20)
+            self.assertEqual(self.writes, [])
+        self.assertEqual(self.writes, [("v.1", cc.PAR_CC_DESIRED_SPEED, "15"),
+                                       ("v.0", cc.PAR_CC_DESIRED_SPEED, "20")])
+
+    def test_commands_are_not_coalesced(self):
+        plexe = self.create()
+        with plexe.batch_writes():
+            plexe.add_member("v.0", "v.1", 1)
+            plexe.add_member("v.0", "v.1", 1)
+        self.assertEqual(len(self.writes), 2)
+
+    def test_order_of_last_writes(self):
+        plexe = self.create()
+        with plexe.batch_writes():
+            plexe.perform_platoon_lane_change("v.0", 1)
+            plexe.enable_auto_lane_changing("v.0", True)
+            plexe.perform_platoon_lane_change("v.0", 2)
+        self.assertEqual(self.writes,
+                         [("v.0", cc.PAR_ENABLE_AUTO_LANE_CHANGE, "1"),
+                          ("v.0", cc.PAR_PLATOON_FIXED_LANE, "2")])
+
+    def test_lane_change_after_auto_lane_changing(self):
+        plexe = self.create(cache_parameters=True)
+        plexe.perform_platoon_lane_change("v.0", 1)
+        plexe.enable_auto_lane_changing("v.0", True)
+        plexe.enable_auto_lane_changing("v.0", False)
+        plexe.perform_platoon_lane_change("v.0", 1)
+        self.assertEqual(self.writes,
+                         [("v.0", cc.PAR_PLATOON_FIXED_LANE, "1"),
+                          ("v.0", cc.PAR_ENABLE_AUTO_LANE_CHANGE, "1"),
+                          ("v.0", cc.PAR_ENABLE_AUTO_LANE_CHANGE, "0"),
+                          ("v.0", cc.PAR_PLATOON_FIXED_LANE, "1")])
+
+    def test_deferred_writes_flushed_by_step(self):
+        plexe = self.create(defer_writes=True)
+        plexe.set_cc_desired_speed("v.0", 25)
+        self.assertEqual(self.writes, [])
+        self.sim.simulationStep()
+        self.assertEqual(self.writes,
+                         [("v.0", cc.PAR_CC_DESIRED_SPEED, "25")])
+
+    def test_platoon_members(self):
+        plexe = self.create()
+        self.sim.vehicle.add("v.2", departPos="60", departSpeed="20")
+        platoon = Platoon(["v.0", "v.1", "v.2"])
+        platoon.apply(plexe)
+        self.writes = []
+        platoon.split("v.1").apply(plexe)
+        members = [w for w in self.writes
+                   if w[1] in (cc.PAR_ADD_MEMBER, cc.PAR_REMOVE_MEMBER)]
+        self.assertEqual(sorted(members),
+                         [("v.0", cc.PAR_REMOVE_MEMBER, "v.1"),
+                          ("v.0", cc.PAR_REMOVE_MEMBER, "v.2"),
+                          ("v.1", cc.PAR_ADD_MEMBER, "v.2:1")])
+
+
+if __name__ == "__main__":
+    unittest.main()